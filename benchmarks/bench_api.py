@@ -0,0 +1,142 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import os
+import tempfile
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.backfill import ContentsBackfill, ContentsStore
+from fetchai.ledger.contract import Contract
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.testing import MockLedgerNode
+from harness import benchmark
+
+NUM_TRANSACTIONS = 100
+
+# the round trip time to a node which is not on the local machine
+REMOTE_LATENCY = 0.005
+
+CONTRACT_TEXT = """
+persistent sharded balance_state : UInt64;
+persistent owner_name : String;
+
+@action
+function transfer(from: Address, to: Address, amount: UInt64)
+  use owner_name;
+  use balance_state[from, to];
+endfunction
+"""
+
+ENTITY = Entity.from_hex('6e8339a0c6d51fc58b4365bf2ce18ff2698d2b8c40bb13fcef7e1ba05df18e4b')
+TARGET = Entity.from_hex('7da0e3fa62a916238decd4f54d43301c809595d66dd469f82f29e076752b155c')
+
+
+def _submit_transfers(api: LedgerApi, count: int):
+    return [api.tokens.transfer(ENTITY, TARGET, 1, 20) for _ in range(count)]
+
+
+@benchmark('api.sync', items=NUM_TRANSACTIONS)
+def sync():
+    with MockLedgerNode(block_interval=None) as node:
+        api = LedgerApi(node.host, node.port)
+        digests = _submit_transfers(api, NUM_TRANSACTIONS)
+
+        yield lambda: api.sync(digests)
+
+
+@benchmark('api.status')
+def status():
+    with MockLedgerNode(block_interval=None) as node:
+        api = LedgerApi(node.host, node.port)
+        yield api.server.status
+
+
+@benchmark('api.tokens.balance')
+def balance():
+    with MockLedgerNode(block_interval=None) as node:
+        api = LedgerApi(node.host, node.port)
+        yield lambda: api.tokens.balance(ENTITY)
+
+
+@benchmark('api.tokens.balance.remote', items=NUM_TRANSACTIONS)
+def balance_remote():
+    addresses = [Address(Entity()) for _ in range(NUM_TRANSACTIONS)]
+    with MockLedgerNode(block_interval=None, latency=REMOTE_LATENCY) as node:
+        api = LedgerApi(node.host, node.port)
+        yield lambda: [api.tokens.balance(address) for address in addresses]
+
+
+@benchmark('api.tokens.balances.remote', items=NUM_TRANSACTIONS)
+def balances_remote():
+    addresses = [Address(Entity()) for _ in range(NUM_TRANSACTIONS)]
+    with MockLedgerNode(block_interval=None, latency=REMOTE_LATENCY) as node:
+        api = LedgerApi(node.host, node.port)
+        yield lambda: api.tokens.balances(addresses)
+
+
+@benchmark('api.tx.contents.remote', items=NUM_TRANSACTIONS)
+def contents_remote():
+    with MockLedgerNode(block_interval=None, latency=REMOTE_LATENCY) as node:
+        api = LedgerApi(node.host, node.port)
+        digests = _submit_transfers(api, NUM_TRANSACTIONS)
+        yield lambda: [api.tx.contents(digest) for digest in digests]
+
+
+@benchmark('api.tx.contents.backfill.remote', items=NUM_TRANSACTIONS)
+def contents_backfill_remote():
+    with MockLedgerNode(block_interval=None, latency=REMOTE_LATENCY) as node, tempfile.TemporaryDirectory() as path:
+        api = LedgerApi(node.host, node.port)
+        digests = _submit_transfers(api, NUM_TRANSACTIONS)
+
+        def target():
+            # every run starts from an empty store, so that every transaction is fetched
+            with ContentsStore(os.path.join(path, 'contents.db')) as store:
+                ContentsBackfill(api, store).run(digests)
+            os.remove(os.path.join(path, 'contents.db'))
+
+        yield target
+
+
+@benchmark('api.tokens.transfer')
+def transfer():
+    with MockLedgerNode(block_interval=None) as node:
+        api = LedgerApi(node.host, node.port)
+        yield lambda: api.tokens.transfer(ENTITY, TARGET, 1, 20)
+
+
+@benchmark('api.contract.action')
+def contract_action():
+    contract = Contract(CONTRACT_TEXT, ENTITY, b'nonce')
+    with MockLedgerNode(lanes=16, block_interval=None) as node:
+        api = LedgerApi(node.host, node.port)
+        yield lambda: contract.action(api, 'transfer', 100, ENTITY, Address(ENTITY), Address(TARGET), 10)
+
+
+@benchmark('api.contract.batch', items=NUM_TRANSACTIONS)
+def contract_batch():
+    contract = Contract(CONTRACT_TEXT, ENTITY, b'nonce')
+    with MockLedgerNode(lanes=16, block_interval=None) as node:
+        api = LedgerApi(node.host, node.port)
+
+        def run():
+            batch = contract.batch(ENTITY, 100)
+            for amount in range(NUM_TRANSACTIONS):
+                batch.add('transfer', Address(ENTITY), Address(TARGET), amount)
+            batch.submit(api)
+
+        yield run
@@ -0,0 +1,41 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+from fetchai.ledger.crypto import Entity, Identity
+from harness import benchmark
+
+ENTITY = Entity.from_hex('6e8339a0c6d51fc58b4365bf2ce18ff2698d2b8c40bb13fcef7e1ba05df18e4b')
+MESSAGE = bytes(range(256))
+
+
+@benchmark('crypto.entity.sign')
+def entity_sign():
+    yield lambda: ENTITY.sign(MESSAGE)
+
+
+@benchmark('crypto.identity.verify')
+def identity_verify():
+    identity = Identity(ENTITY.public_key_bytes)
+    signature = ENTITY.sign(MESSAGE)
+    yield lambda: identity.verify(MESSAGE, signature)
+
+
+@benchmark('crypto.identity.from_bytes')
+def identity_from_bytes():
+    public_key_bytes = ENTITY.public_key_bytes
+    yield lambda: Identity(public_key_bytes)
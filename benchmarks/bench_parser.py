@@ -0,0 +1,94 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+from fetchai.ledger.contract import Contract
+from fetchai.ledger.crypto import Entity
+from fetchai.ledger.parser.etch_parser import EtchParser, clear_cache
+from harness import benchmark
+
+CONTRACT_TEXT = """
+persistent sharded balance_state : UInt64;
+persistent owner_name : String;
+
+@init
+function setup(owner : Address)
+  use balance_state[owner];
+  balance_state.set(owner, 1000000u64);
+endfunction
+
+@action
+function transfer(from: Address, to: Address, amount: UInt64)
+  use owner_name;
+  use balance_state[from, to];
+
+  // Check if the sender has enough balance to proceed
+  if (balance_state.get(from) >= amount)
+
+    // update the account balances
+    balance_state.set(from, balance_state.get(from) - amount);
+    balance_state.set(to, balance_state.get(to, 0u64) + amount);
+  endif
+
+endfunction
+
+@query
+function balance(address: Address) : UInt64
+    use balance_state[address];
+    return balance_state.get(address, 0u64);
+endfunction
+"""
+
+
+@benchmark('parser.construct')
+def construct():
+    yield EtchParser
+
+
+@benchmark('parser.parse')
+def parse():
+    parser = EtchParser()
+    yield lambda: parser.parse(CONTRACT_TEXT)
+
+
+@benchmark('parser.parse.uncached')
+def parse_uncached():
+    parser = EtchParser()
+
+    def run():
+        clear_cache()
+        parser.parse(CONTRACT_TEXT)
+
+    yield run
+
+
+@benchmark('parser.construct_and_parse')
+def construct_and_parse():
+    yield lambda: EtchParser(CONTRACT_TEXT)
+
+
+@benchmark('parser.used_globals_to_addresses')
+def used_globals_to_addresses():
+    parser = EtchParser(CONTRACT_TEXT)
+    yield lambda: parser.used_globals_to_addresses('transfer', ['abc', 'def', 100])
+
+
+@benchmark('contract.build_shard_mask')
+def build_shard_mask():
+    contract = Contract(CONTRACT_TEXT, Entity.from_hex('6e8339a0c6d51fc58b4365bf2ce18ff2698d2b8c40bb13fcef7e1ba05df18e4b'),
+                        b'nonce')
+    yield lambda: contract._build_shard_mask(256, 'transfer', ['abc', 'def', 100])
@@ -0,0 +1,100 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import random
+
+from fetchai.ledger.bitvector import BitVector
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.scheduler import TransactionScheduler
+from fetchai.ledger.transaction import Transaction
+from harness import benchmark
+
+NUM_TRANSACTIONS = 1000
+NUM_LANES = 16
+WILDCARD_RATE = 0.01
+
+CONTRACT = Address(Entity.from_hex('6e8339a0c6d51fc58b4365bf2ce18ff2698d2b8c40bb13fcef7e1ba05df18e4b'))
+
+
+def _contract_tx(lanes) -> Transaction:
+    tx = Transaction()
+    tx.target_contract(CONTRACT, BitVector.from_indices(lanes, NUM_LANES) if lanes else BitVector())
+    tx.action = 'action'
+    return tx
+
+
+def _uniform_workload():
+    # each transaction touches one or two random lanes, with an occasional wildcard
+    txs = []
+    for _ in range(NUM_TRANSACTIONS):
+        if random.random() < WILDCARD_RATE:
+            txs.append(_contract_tx(None))
+        else:
+            txs.append(_contract_tx(random.sample(range(NUM_LANES), random.choice([1, 1, 2]))))
+    return txs
+
+
+def _hotspot_workload():
+    # half of the transactions touch the same hot lane, e.g. a popular contract's global state
+    txs = []
+    for _ in range(NUM_TRANSACTIONS):
+        lanes = {random.randrange(NUM_LANES)}
+        if random.random() < 0.5:
+            lanes.add(0)
+        txs.append(_contract_tx(lanes))
+    return txs
+
+
+WORKLOADS = {
+    'uniform': _uniform_workload,
+    'hotspot': _hotspot_workload,
+}
+
+
+def _scheduler(txs, preserve_order: bool) -> TransactionScheduler:
+    scheduler = TransactionScheduler(NUM_LANES, preserve_order=preserve_order)
+    scheduler.extend(txs)
+    return scheduler
+
+
+def _register(workload: str, preserve_order: bool):
+    mode = 'ordered' if preserve_order else 'packed'
+
+    @benchmark('scheduler.plan.{}.{}'.format(workload, mode), items=NUM_TRANSACTIONS)
+    def plan():
+        yield _scheduler(WORKLOADS[workload](), preserve_order).plan
+
+
+for _workload in sorted(WORKLOADS):
+    _register(_workload, True)
+    _register(_workload, False)
+
+
+def main():
+    # report the lane utilisation achieved for each of the workloads
+    for workload in sorted(WORKLOADS):
+        for preserve_order in (True, False):
+            random.seed(0)
+            waves = _scheduler(WORKLOADS[workload](), preserve_order).plan()
+            utilisation = sum(wave.utilisation for wave in waves) / len(waves)
+            print('{:<10} {:<8} waves: {:>5} utilisation: {:.1%}'.format(
+                workload, 'ordered' if preserve_order else 'packed', len(waves), utilisation))
+
+
+if __name__ == '__main__':
+    main()
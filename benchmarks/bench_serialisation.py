@@ -0,0 +1,335 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import io
+import os
+import random
+import tempfile
+
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.archive import TransactionArchive
+from fetchai.ledger.bitvector import BitVector
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.serialisation import integer, payload
+from fetchai.ledger.serialisation.shardmask import ShardMask
+from fetchai.ledger.serialisation.transaction import encode_transaction, decode_transaction
+from fetchai.ledger.session import SenderSession
+from fetchai.ledger.signing import sign_compact, sign_partial, decode_signature_response
+from fetchai.ledger.transaction import Transaction
+from harness import benchmark
+
+NUM_INTEGERS = 1000
+NUM_RESOURCES = 100
+NUM_LANES = 256
+NUM_PAYLOADS = 100
+NUM_ARCHIVED = 100
+NUM_BOARD = 20
+
+ENTITY = Entity.from_hex('6e8339a0c6d51fc58b4365bf2ce18ff2698d2b8c40bb13fcef7e1ba05df18e4b')
+TARGET = Entity.from_hex('7da0e3fa62a916238decd4f54d43301c809595d66dd469f82f29e076752b155c')
+
+
+def _integer_workload():
+    # a mix of the values commonly seen in transactions: small lengths, amounts, fees and block numbers
+    values = []
+    for _ in range(NUM_INTEGERS):
+        num_bits = random.choice([4, 7, 8, 16, 32, 63])
+        value = random.getrandbits(num_bits)
+        values.append(-value if random.random() < 0.1 else value)
+    return values
+
+
+def _build_transaction() -> Transaction:
+    tx = Transaction()
+    tx.from_address = ENTITY
+    tx.add_transfer(TARGET, 1000000)
+    tx.valid_from = 100
+    tx.valid_until = 200
+    tx.charge_rate = 1
+    tx.charge_limit = 500
+    tx.counter = 0x0102030405060708
+    tx.add_signer(ENTITY)
+    tx.sign(ENTITY)
+    return tx
+
+
+def _build_contract_transaction() -> Transaction:
+    tx = Transaction()
+    tx.from_address = ENTITY
+    tx.valid_from = 100
+    tx.valid_until = 200
+    tx.charge_rate = 1
+    tx.charge_limit = 500
+    tx.counter = 0x0102030405060708
+    tx.target_contract(Address(TARGET), BitVector.from_indices([1, 5, 9], 16))
+    tx.action = 'transfer'
+    tx.data = b'\x93\xa3abc\xa3def\xcd\x03\xe8'
+    tx.add_signer(ENTITY)
+    tx.sign(ENTITY)
+    return tx
+
+
+def _archive_workload():
+    txs = []
+    for counter in range(NUM_ARCHIVED):
+        tx = _build_transaction()
+        tx.counter = counter
+        txs.append(tx)
+    return txs
+
+
+@benchmark('serialisation.integer.encode', items=NUM_INTEGERS)
+def integer_encode():
+    values = _integer_workload()
+
+    def target():
+        buffer = io.BytesIO()
+        for value in values:
+            integer.encode(buffer, value)
+
+    yield target
+
+
+@benchmark('serialisation.integer.decode', items=NUM_INTEGERS)
+def integer_decode():
+    buffer = io.BytesIO()
+    for value in _integer_workload():
+        integer.encode(buffer, value)
+    encoded = buffer.getvalue()
+
+    def target():
+        stream = io.BytesIO(encoded)
+        for _ in range(NUM_INTEGERS):
+            integer.decode(stream)
+
+    yield target
+
+
+@benchmark('serialisation.integer.encode_many', items=NUM_INTEGERS)
+def integer_encode_many():
+    values = _integer_workload()
+    yield lambda: integer.encode_many(io.BytesIO(), values)
+
+
+@benchmark('serialisation.integer.decode_many', items=NUM_INTEGERS)
+def integer_decode_many():
+    buffer = io.BytesIO()
+    integer.encode_many(buffer, _integer_workload())
+    encoded = buffer.getvalue()
+
+    yield lambda: integer.decode_many(io.BytesIO(encoded), NUM_INTEGERS)
+
+
+@benchmark('serialisation.transaction.encode.transfer')
+def encode_transfer():
+    tx = _build_transaction()
+    yield lambda: encode_transaction(tx)
+
+
+@benchmark('serialisation.transaction.build.transfer')
+def build_transfer():
+    def build():
+        tx = TokenTxFactory.transfer(ENTITY, TARGET, 1000000, 500, [ENTITY])
+        tx.valid_from = 100
+        tx.valid_until = 200
+        return tx.encode_payload()
+
+    yield build
+
+
+@benchmark('serialisation.transaction.build.transfer.session')
+def build_transfer_session():
+    session = SenderSession(ENTITY)
+    target = Address(TARGET)
+    yield lambda: session.encode_transfer_payload(target, 1000000, 500, 200, 100)
+
+
+@benchmark('serialisation.transaction.build.chain_code')
+def build_chain_code():
+    def build():
+        tx = TokenTxFactory._create_chain_code_action_tx(500, ENTITY, 'addStake', [ENTITY], BitVector())
+        tx.valid_from = 100
+        tx.valid_until = 200
+        tx.data = b'{"amount": 1000}'
+        return tx.encode_payload()
+
+    yield build
+
+
+@benchmark('serialisation.transaction.build.chain_code.template')
+def build_chain_code_template():
+    template = TokenTxFactory.compile_chain_code_action(ENTITY, 'addStake', [ENTITY])
+    yield lambda: template.encode_payload(200, 500, 0x0102030405060708, b'{"amount": 1000}', 100)
+
+
+@benchmark('serialisation.transaction.encode.contract')
+def encode_contract():
+    tx = _build_contract_transaction()
+    yield lambda: encode_transaction(tx)
+
+
+@benchmark('serialisation.transaction.decode.transfer')
+def decode_transfer():
+    encoded = encode_transaction(_build_transaction())
+    yield lambda: decode_transaction(io.BytesIO(encoded))
+
+
+@benchmark('serialisation.transaction.decode.contract')
+def decode_contract():
+    encoded = encode_transaction(_build_contract_transaction())
+    yield lambda: decode_transaction(io.BytesIO(encoded))
+
+
+def _multisig_workload():
+    board = [Entity() for _ in range(NUM_BOARD)]
+    tx = TokenTxFactory.transfer(ENTITY, TARGET, 1000000, 500, board)
+    tx.valid_from = 100
+    tx.valid_until = 200
+    return board, tx
+
+
+@benchmark('serialisation.signature_response.partial')
+def signature_response_partial():
+    board, tx = _multisig_workload()
+    reply = sign_partial(board[-1], tx.encode_partial())
+
+    def apply():
+        _, other_tx = Transaction.decode_partial(reply)
+        tx.merge_signatures(other_tx)
+
+    yield apply
+
+
+@benchmark('serialisation.signature_response.compact')
+def signature_response_compact():
+    board, tx = _multisig_workload()
+    payload = tx.encode_payload()
+    signers = tx.signers
+    reply = sign_compact(board[-1], tx.encode_partial())
+
+    def apply():
+        _, index, signature = decode_signature_response(reply)
+        identity = signers[index]
+        if identity.verify(payload, signature):
+            tx.add_signature(identity, signature)
+
+    yield apply
+
+
+@benchmark('crypto.address.from_bytes')
+def address_from_bytes():
+    raw = bytes(Address(ENTITY))
+    yield lambda: Address(raw)
+
+
+@benchmark('crypto.address.from_str')
+def address_from_str():
+    display = str(Address(ENTITY))
+    yield lambda: Address(display)
+
+
+@benchmark('crypto.address.from_identity')
+def address_from_identity():
+    yield lambda: Address(ENTITY)
+
+
+@benchmark('bitvector.from_indices')
+def bitvector_from_indices():
+    indices = random.sample(range(NUM_LANES), 16)
+    yield lambda: BitVector.from_indices(indices, NUM_LANES)
+
+
+@benchmark('bitvector.bytes')
+def bitvector_bytes():
+    bits = BitVector.from_indices(random.sample(range(NUM_LANES), 16), NUM_LANES)
+    yield lambda: bytes(bits)
+
+
+@benchmark('bitvector.from_bytes')
+def bitvector_from_bytes():
+    data = bytes(BitVector.from_indices(random.sample(range(NUM_LANES), 16), NUM_LANES))
+    yield lambda: BitVector.from_bytes(data, NUM_LANES)
+
+
+@benchmark('bitvector.as_binary')
+def bitvector_as_binary():
+    bits = BitVector.from_indices(random.sample(range(NUM_LANES), 16), NUM_LANES)
+    yield bits.as_binary
+
+
+@benchmark('bitvector.get', items=NUM_LANES)
+def bitvector_get():
+    bits = BitVector.from_indices(random.sample(range(NUM_LANES), 16), NUM_LANES)
+
+    def target():
+        for n in range(NUM_LANES):
+            bits.get(n)
+
+    yield target
+
+
+@benchmark('bitvector.union', items=100)
+def bitvector_union():
+    masks = [BitVector.from_indices(random.sample(range(NUM_LANES), 4), NUM_LANES) for _ in range(100)]
+
+    def target():
+        combined = BitVector(NUM_LANES)
+        for mask in masks:
+            combined |= mask
+        return combined.popcount()
+
+    yield target
+
+
+@benchmark('shardmask.resources_to_shard_mask', items=NUM_RESOURCES)
+def resources_to_shard_mask():
+    resources = ['fetch.contract.state.{}.balance.{}'.format(str(Address(ENTITY)), n) for n in range(NUM_RESOURCES)]
+    yield lambda: ShardMask.resources_to_shard_mask(resources, NUM_LANES)
+
+
+def _payload_workload():
+    target = Address(TARGET)
+    return [(Address(ENTITY), target, random.getrandbits(32), 'memo') for _ in range(NUM_PAYLOADS)]
+
+
+@benchmark('payload.encode_arguments', items=NUM_PAYLOADS)
+def payload_encode_arguments():
+    calls = _payload_workload()
+    yield lambda: [payload.encode_arguments(args) for args in calls]
+
+
+@benchmark('payload.encode_arguments_many', items=NUM_PAYLOADS)
+def payload_encode_arguments_many():
+    calls = _payload_workload()
+    yield lambda: payload.encode_arguments_many(calls)
+
+
+@benchmark('archive.extend', items=NUM_ARCHIVED)
+def archive_extend():
+    encoded = [tx.encode() for tx in _archive_workload()]
+    with tempfile.TemporaryDirectory() as directory:
+        with TransactionArchive(os.path.join(directory, 'txs')) as archive:
+            yield lambda: archive.extend(encoded)
+
+
+@benchmark('archive.get', items=NUM_ARCHIVED)
+def archive_get():
+    with tempfile.TemporaryDirectory() as directory:
+        with TransactionArchive(os.path.join(directory, 'txs')) as archive:
+            digests = archive.extend(_archive_workload())
+            yield lambda: [archive.get(digest).data for digest in digests]
@@ -0,0 +1,207 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import contextlib
+import fnmatch
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+RESULTS_VERSION = 1
+
+# the registry of all known benchmarks, populated by the @benchmark decorator
+BENCHMARKS = OrderedDict()  # type: Dict[str, Benchmark]
+
+
+class Benchmark:
+    def __init__(self, name: str, factory: Callable, items: int = 1):
+        self.name = name
+        self.factory = contextlib.contextmanager(factory)
+        self.items = int(items)
+
+
+def benchmark(name: str, items: int = 1):
+    """
+    Registers a benchmark. The decorated generator performs any setup, yields the callable to be timed and then
+    performs any required cleanup.
+
+    :param name: The dot separated name of the benchmark
+    :param items: The number of items processed by each call of the timed callable
+    """
+
+    def decorator(factory):
+        if name in BENCHMARKS:
+            raise RuntimeError('Duplicate benchmark name: {}'.format(name))
+        BENCHMARKS[name] = Benchmark(name, factory, items)
+        return factory
+
+    return decorator
+
+
+def _calibrate(target: Callable, min_time: float) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            target()
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time:
+            return number
+
+        # estimate the number of loops required, growing by at most 10x at a time
+        if elapsed > 0:
+            number = max(number + 1, min(number * 10, int(number * min_time * 1.2 / elapsed)))
+        else:
+            number *= 10
+
+
+def _time(target: Callable, number: int) -> float:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            target()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def run_benchmark(bench: Benchmark, repeat: int = 5, min_time: float = 0.2) -> dict:
+    # every benchmark sees the same pseudo random sequence so that the generated workloads are reproducible
+    random.seed(0)
+
+    with bench.factory() as target:
+        number = _calibrate(target, min_time)
+        samples = [_time(target, number) / number for _ in range(repeat)]
+
+    median = statistics.median(samples)
+    return OrderedDict([
+        ('loops', number),
+        ('repeat', repeat),
+        ('items', bench.items),
+        ('min', min(samples)),
+        ('median', median),
+        ('mean', statistics.mean(samples)),
+        ('stdev', statistics.stdev(samples) if len(samples) > 1 else 0.0),
+        ('items_per_sec', bench.items / median if median > 0 else None),
+    ])
+
+
+def select(patterns: Optional[List[str]] = None) -> List[Benchmark]:
+    if not patterns:
+        return list(BENCHMARKS.values())
+
+    return [bench for name, bench in BENCHMARKS.items() if any(fnmatch.fnmatch(name, p) for p in patterns)]
+
+
+def run_all(benchmarks: List[Benchmark], repeat: int = 5, min_time: float = 0.2, stream=sys.stdout) -> dict:
+    results = OrderedDict()
+    for bench in benchmarks:
+        result = run_benchmark(bench, repeat=repeat, min_time=min_time)
+        results[bench.name] = result
+
+        print('{:<50} {:>12} {:>14}/s'.format(
+            bench.name, _format_time(result['median']), _format_rate(result['items_per_sec'])), file=stream)
+
+    return OrderedDict([
+        ('version', RESULTS_VERSION),
+        ('timestamp', time.time()),
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('platform', platform.platform()),
+        ('results', results),
+    ])
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    """
+    Compares two sets of results
+
+    :param baseline: The reference results
+    :param current: The results to be checked
+    :param threshold: The relative slow down of the median time that is treated as a regression
+    :return: The list of comparisons for every benchmark present in both result sets
+    """
+    comparisons = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+
+        ratio = result['median'] / reference['median'] if reference['median'] > 0 else float('inf')
+        comparisons.append(OrderedDict([
+            ('name', name),
+            ('baseline', reference['median']),
+            ('current', result['median']),
+            ('ratio', ratio),
+            ('regression', ratio > 1.0 + threshold),
+            ('improvement', ratio < 1.0 / (1.0 + threshold)),
+        ]))
+
+    return comparisons
+
+
+def print_comparison(comparisons: List[dict], stream=sys.stdout):
+    for item in comparisons:
+        if item['regression']:
+            flag = 'REGRESSION'
+        elif item['improvement']:
+            flag = 'improved'
+        else:
+            flag = ''
+
+        print('{:<50} {:>12} {:>12} {:>8.2f}x {}'.format(
+            item['name'], _format_time(item['baseline']), _format_time(item['current']), item['ratio'], flag),
+            file=stream)
+
+
+def load_results(path: str) -> dict:
+    with open(path, 'r') as results_file:
+        results = json.load(results_file)
+
+    if results.get('version') != RESULTS_VERSION:
+        raise RuntimeError('Unsupported results version in {}'.format(path))
+
+    return results
+
+
+def save_results(path: str, results: dict):
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3f} {}'.format(seconds / scale, unit)
+    return '{:.1f} ns'.format(seconds / 1e-9)
+
+
+def _format_rate(rate: Optional[float]) -> str:
+    if rate is None:
+        return '-'
+    return '{:.1f}'.format(rate)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import argparse
+import os
+import sys
+
+import harness
+
+# importing the benchmark modules registers their benchmarks
+import bench_api
+import bench_crypto
+import bench_parser
+import bench_scheduler
+import bench_serialisation
+
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description='Runs the performance benchmarks for the ledger API')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('-k', '--filter', dest='patterns', action='append',
+                            help='Only run benchmarks matching this glob pattern (can be repeated)')
+    run_parser.add_argument('-o', '--output', help='Path to write the JSON results to')
+    run_parser.add_argument('-r', '--repeat', type=int, default=5, help='The number of timed samples per benchmark')
+    run_parser.add_argument('-t', '--min-time', type=float, default=0.2,
+                            help='The minimum duration of each timed sample in seconds')
+    run_parser.add_argument('-b', '--baseline', help='Compare the results against this previous run')
+    run_parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Relative slow down that is flagged as a regression')
+
+    list_parser = subparsers.add_parser('list', help='List the available benchmarks')
+    list_parser.add_argument('-k', '--filter', dest='patterns', action='append')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two sets of results')
+    compare_parser.add_argument('baseline', help='The reference results')
+    compare_parser.add_argument('current', help='The results to be checked')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Relative slow down that is flagged as a regression')
+
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        sys.exit(2)
+
+    return args
+
+
+def _report(baseline: dict, current: dict, threshold: float) -> bool:
+    comparisons = harness.compare(baseline, current, threshold)
+    harness.print_comparison(comparisons)
+
+    regressions = [item['name'] for item in comparisons if item['regression']]
+    if regressions:
+        print('\n{} regression(s) detected: {}'.format(len(regressions), ', '.join(regressions)))
+        return False
+
+    return True
+
+
+def main():
+    args = parse_commandline()
+
+    if args.command == 'list':
+        for bench in harness.select(args.patterns):
+            print(bench.name)
+        return
+
+    if args.command == 'compare':
+        success = _report(harness.load_results(args.baseline), harness.load_results(args.current), args.threshold)
+        sys.exit(0 if success else 1)
+
+    benchmarks = harness.select(args.patterns)
+    if not benchmarks:
+        print('No benchmarks match the specified filters')
+        sys.exit(2)
+
+    # load the baseline up front so that a bad path is detected before spending time benchmarking
+    baseline = harness.load_results(args.baseline) if args.baseline else None
+
+    results = harness.run_all(benchmarks, repeat=args.repeat, min_time=args.min_time)
+
+    if args.output:
+        harness.save_results(os.path.abspath(args.output), results)
+
+    if baseline is not None:
+        print()
+        if not _report(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,10 +18,17 @@
 
 # Demonstrates the distributed sharing of a multi-sig transaction before submission
 
+import os
+import socket
+import tempfile
+import threading
+
 from fetchai.ledger.api import LedgerApi
 from fetchai.ledger.api.token import TokenTxFactory
 from fetchai.ledger.crypto import Entity
 from fetchai.ledger.crypto.deed import Deed, Operation
+from fetchai.ledger.signing import SignatureCoordinator, SigningError, UnixSocketSignerTransport, read_frame, \
+    sign_compact, write_frame
 from fetchai.ledger.transaction import Transaction
 
 HOST = '127.0.0.1'
@@ -35,6 +42,24 @@ def print_signing_votes(voting_weights, signers):
     print("Votes: {} Total weight: {}".format(', '.join(str(v) for v in votes), sum(votes)))
 
 
+def run_signer(entity, path, ready):
+    # a remote signer: receives partial transactions on a unix socket and replies with its signature
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen()
+        ready.set()
+
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                try:
+                    # the signer checks that it is a signatory, it could also inspect the transaction before signing
+                    write_frame(connection, sign_compact(entity, read_frame(connection)))
+                except (SigningError, EOFError, OSError) as ex:
+                    # closing the connection without a reply tells the coordinator that the request was refused
+                    print('Signer refused request:', ex)
+
+
 def main():
     # create the APIs
     api = LedgerApi(HOST, PORT)
@@ -151,6 +176,34 @@ def main():
     print('Balance 1:', api.tokens.balance(multi_sig_identity))
     print('Balance 2:', api.tokens.balance(other_identity))
 
+    # coordinated example
+    print("\nGathering signatures from signers listening on local endpoints...")
+
+    # each of the signers would normally run in its own process or on its own machine, here they run in threads
+    directory = tempfile.mkdtemp()
+    transports = {}
+    for n, signer in enumerate(board):
+        path = os.path.join(directory, 'signer{}.sock'.format(n))
+        ready = threading.Event()
+        threading.Thread(target=run_signer, args=(signer, path, ready), daemon=True).start()
+        ready.wait()
+        transports[signer] = UnixSocketSignerTransport(path)
+
+    def build(signatories):
+        tx = TokenTxFactory.transfer(multi_sig_identity, other_identity, 250, 20, signatories=signatories)
+        api.set_validity_period(tx)
+        return tx
+
+    # the coordinator chooses the signers needed to meet the transfer threshold and asks them all at once
+    with SignatureCoordinator(transports, deed=deed, timeout=2.0) as coordinator:
+        tx = coordinator.sign(Operation.transfer, build)
+
+    api.sync(api.submit_signed_tx(tx))
+
+    print("\nAfter coordinated multisig-transfer")
+    print('Balance 1:', api.tokens.balance(multi_sig_identity))
+    print('Balance 2:', api.tokens.balance(other_identity))
+
 
 if __name__ == '__main__':
     main()
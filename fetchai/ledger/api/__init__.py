@@ -28,6 +28,7 @@ from fetchai.ledger import __compatible__, IncompatibleLedgerVersion
 from fetchai.ledger.api import bootstrap
 from fetchai.ledger.api.server import ServerApi
 from fetchai.ledger.transaction import Transaction
+from .cache import BlockTracker, QueryCache
 from .common import ApiEndpoint, ApiError, submit_json_transaction
 from .contracts import ContractsApi
 from .governance import GovernanceApi
@@ -101,9 +102,21 @@ class LedgerApi:
         self.server = ServerApi(host, port)
         self.governance = GovernanceApi(host, port)
 
+        # shared view of the current block number
+        self.block_tracker = BlockTracker(self.tokens)
+
         # Check that ledger version is compatible with API version
         check_version_compatibility(self.server.version(), __compatible__)
 
+    def enable_query_cache(self, ttl: Optional[float] = None, maxsize: int = 1024):
+        """
+        Caches the results of contract queries until the block number changes
+
+        :param ttl: The optional maximum number of seconds for which a result is kept
+        :param maxsize: The maximum number of results kept
+        """
+        self.contracts.query_cache = QueryCache(self.block_tracker, ttl=ttl, maxsize=maxsize)
+
     def sync(self, txs: Transactions, timeout: Optional[int] = None, hold_state_sec: int = 0,
              extend_success_status: Optional[Sequence[str]] = None):
         """
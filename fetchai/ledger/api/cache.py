@@ -0,0 +1,161 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional
+
+from .common import ApiEndpoint
+
+# the default minimum number of seconds between queries of the block number
+DEFAULT_POLL_INTERVAL = 1.0
+
+# the default maximum number of cached query results
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+
+class BlockTracker:
+    """
+    Tracks the current block number of the ledger, querying the node at most once per poll interval so that it can
+    be shared by all the components which need to know the height of the chain
+    """
+
+    def __init__(self, endpoint: ApiEndpoint, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        :param endpoint: The API endpoint used to query the block number
+        :param poll_interval: The minimum number of seconds between queries of the block number
+        """
+        self._endpoint = endpoint
+        self._poll_interval = float(poll_interval)
+        self._lock = threading.Lock()
+        self._block_number = None  # type: Optional[int]
+        self._expiry = 0.0
+
+    @property
+    def poll_interval(self) -> float:
+        return self._poll_interval
+
+    def block_number(self) -> int:
+        """Returns the current block number, querying the node if the last known value is too old"""
+        with self._lock:
+            now = time.monotonic()
+            if self._block_number is None or now >= self._expiry:
+                self._block_number = self._endpoint.current_block_number()
+                self._expiry = now + self._poll_interval
+            return self._block_number
+
+    def update(self, block_number: int):
+        """Records a block number learnt elsewhere, e.g. from a status response"""
+        with self._lock:
+            if self._block_number is None or block_number >= self._block_number:
+                self._block_number = int(block_number)
+                self._expiry = time.monotonic() + self._poll_interval
+
+    def invalidate(self):
+        """Forces the next request to query the node"""
+        with self._lock:
+            self._expiry = 0.0
+
+
+class QueryCache:
+    """
+    Caches the results of read only queries. Results are discarded when the block number changes or after a TTL, and
+    concurrent requests for the same query are collapsed into a single request.
+    """
+
+    def __init__(self, block_tracker: Optional[BlockTracker] = None, ttl: Optional[float] = None,
+                 maxsize: int = DEFAULT_QUERY_CACHE_SIZE):
+        """
+        :param block_tracker: Results are discarded when the block number reported by the tracker changes
+        :param ttl: The maximum number of seconds for which a result is kept, None for no limit
+        :param maxsize: The maximum number of results kept
+        """
+        if block_tracker is None and ttl is None:
+            raise ValueError('Query cache requires a block tracker, a TTL or both')
+
+        self._block_tracker = block_tracker
+        self._ttl = ttl
+        self._maxsize = int(maxsize)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._in_flight = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key: Hashable, query: Callable[[], object], cacheable: Callable[[object], bool] = None):
+        """
+        Returns the cached result for the key, making the query if there is no valid result
+
+        :param key: The hashable key identifying the query
+        :param query: Makes the query and returns the result
+        :param cacheable: Optionally decides if a result should be cached, e.g. to skip failures
+        :return: The result of the query
+        """
+        block_number = self._block_tracker.block_number() if self._block_tracker is not None else None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_block, expiry, result = entry
+                if entry_block == block_number and (expiry is None or time.monotonic() < expiry):
+                    self._entries.move_to_end(key)
+                    return result
+                del self._entries[key]
+
+            # join a matching request that is already in progress, only if it was made at the same block number
+            in_flight_key = (key, block_number)
+            future = self._in_flight.get(in_flight_key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[in_flight_key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = query()
+        except BaseException as ex:
+            with self._lock:
+                del self._in_flight[in_flight_key]
+            future.set_exception(ex)
+            raise
+
+        with self._lock:
+            del self._in_flight[in_flight_key]
+
+            # a query made at an earlier block number must not replace the result of one made at a later block number
+            current = self._entries.get(key)
+            superseded = current is not None and block_number is not None and current[0] is not None \
+                and current[0] > block_number
+
+            if not superseded and (cacheable is None or cacheable(result)):
+                expiry = None if self._ttl is None else time.monotonic() + self._ttl
+                self._entries[key] = (block_number, expiry, result)
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+
+        future.set_result(result)
+        return result
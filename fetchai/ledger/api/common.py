@@ -20,18 +20,26 @@ import base64
 import functools
 import json
 import warnings
-from typing import Optional, Union, Iterable
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Optional, Union, Iterable, List
 
-import msgpack
 import requests
 
 from fetchai.ledger.bitvector import BitVector
 from fetchai.ledger.crypto import Address, Identity
-from fetchai.ledger.serialisation import transaction
+from fetchai.ledger.serialisation import payload, transaction
+from fetchai.ledger.serialisation.transaction import TxTemplate
 from fetchai.ledger.transaction import Transaction
 
 DEFAULT_BLOCK_VALIDITY_PERIOD = 100
 
+# the maximum number of transactions submitted in a single request
+BULK_SUBMIT_SIZE = 100
+
+# the default number of concurrent requests made by the bulk query methods, kept below the size of the connection pool
+DEFAULT_QUERY_WORKERS = 8
+
 AddressLike = Union[Address, Identity]
 
 
@@ -190,6 +198,34 @@ class ApiEndpoint(object):
 
         raise RuntimeError('Unable to query current block number')
 
+    @staticmethod
+    def _map_concurrent(func: Callable, items: List[Hashable], workers: Optional[int] = None) -> list:
+        """
+        Calls the function once for each distinct item, using a bounded pool of threads
+
+        :param func: The function making the request for a single item
+        :param items: The hashable items, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The results in the order of the input items, with the exception raised in place of any failed result
+        """
+
+        def call(item):
+            try:
+                return func(item)
+            except Exception as ex:
+                return ex
+
+        unique = list(OrderedDict.fromkeys(items))
+        workers = min(workers or DEFAULT_QUERY_WORKERS, len(unique))
+
+        if workers <= 1:
+            results = {item: call(item) for item in unique}
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = dict(zip(unique, executor.map(call, unique)))
+
+        return [results[item] for item in items]
+
     def _get_json(self, path, **kwargs):
         args = dict(**kwargs)
         params = args if len(args) > 0 else None
@@ -282,6 +318,51 @@ class ApiEndpoint(object):
         if len(tx_list):
             return tx_list[0]
 
+    def _post_tx_json_many(self, tx_data: Iterable[bytes]) -> List[str]:
+        """
+        Submits a number of transactions to the ledger in a single request
+
+        :param tx_data: The binary encoded transactions
+        :return: The hexadecimal digests of the submitted transactions
+        """
+        headers = {
+            'content-type': 'application/vnd+fetch.transaction+json',
+        }
+
+        tx_payload = [dict(ver="1.2", data=base64.b64encode(data).decode()) for data in tx_data]
+
+        # format the URL
+        url = format_contract_url(self.host, self.port, None, None, protocol=self.protocol)
+
+        # make the request
+        r = self._session.post(url, json=tx_payload, headers=headers)
+        if not 200 <= r.status_code < 300:
+            raise ApiError('Unable to fulfil bulk transaction request. Status Code {}'.format(r.status_code))
+
+        tx_list = r.json().get('txs', [])
+        if len(tx_list) != len(tx_payload):
+            raise ApiError('Expected {} transaction digests, received {}'.format(len(tx_payload), len(tx_list)))
+
+        return tx_list
+
+    def submit_signed_txs(self, txs: Iterable[Union[Transaction, bytes]],
+                          chunk_size: int = BULK_SUBMIT_SIZE) -> List[str]:
+        """
+        Submits a number of signed transactions, batching them into as few requests as possible
+
+        :param txs: The signed transactions, or their binary encodings
+        :param chunk_size: The maximum number of transactions per request
+        :return: The digests of the submitted transactions, in order
+        :raises: ApiError on any failures
+        """
+        encoded = [tx if isinstance(tx, bytes) else transaction.encode_transaction(tx) for tx in txs]
+
+        digests = []
+        for n in range(0, len(encoded), chunk_size):
+            digests.extend(self._post_tx_json_many(encoded[n:n + chunk_size]))
+
+        return digests
+
     def submit_signed_tx(self, tx: Transaction):
         """
         Appends signatures to a transaction and submits it, returning the transaction digest
@@ -321,6 +402,38 @@ class TransactionFactory:
 
         return tx
 
+    @classmethod
+    def compile_chain_code_action(cls, from_address: AddressLike, action: str, signatories: Iterable[Identity],
+                                  shard_mask: Optional[BitVector] = None) -> TxTemplate:
+        """
+        Compiles a template for repeated calls of a chain code action, see `TxTemplate`
+
+        :param from_address: The address sending every transaction
+        :param action: The name of the action
+        :param signatories: The identities signing every transaction
+        :param shard_mask: The shard mask of every transaction, a wildcard if not specified
+        :return: The compiled template
+        """
+        return TxTemplate(cls._create_chain_code_action_tx(0, from_address, action, signatories,
+                                                           shard_mask or BitVector()))
+
+    @classmethod
+    def compile_smart_contract_action(cls, from_address: AddressLike, contract_address: AddressLike, action: str,
+                                      signatories: Iterable[Identity],
+                                      shard_mask: Optional[BitVector] = None) -> TxTemplate:
+        """
+        Compiles a template for repeated calls of a smart contract action, see `TxTemplate`
+
+        :param from_address: The address sending every transaction
+        :param contract_address: The address of the contract
+        :param action: The name of the action
+        :param signatories: The identities signing every transaction
+        :param shard_mask: The shard mask of every transaction, a wildcard if not specified
+        :return: The compiled template
+        """
+        return TxTemplate(cls._create_smart_contract_action_tx(0, from_address, contract_address, action, signatories,
+                                                               shard_mask or BitVector()))
+
     @classmethod
     def _create_smart_contract_action_tx(cls, fee: int, from_address: AddressLike, contract_address: AddressLike,
                                          action: str, signatories: Iterable[Identity],
@@ -340,19 +453,4 @@ class TransactionFactory:
 
     @classmethod
     def _encode_msgpack_payload(cls, *args):
-        items = []
-        for value in args:
-            if cls._is_primitive(value):
-                items.append(value)
-            elif isinstance(value, Address):
-                items.append(msgpack.ExtType(77, bytes(value)))
-            else:
-                raise RuntimeError('Unknown item to pack: ' + value.__class__.__name__)
-        return msgpack.packb(items)
-
-    @staticmethod
-    def _is_primitive(value):
-        for type in (bool, int, float, str):
-            if isinstance(value, type):
-                return True
-        return False
+        return payload.encode_arguments(args)
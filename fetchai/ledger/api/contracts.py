@@ -15,16 +15,16 @@
 #   limitations under the License.
 #
 # ------------------------------------------------------------------------------
+import json
 import logging
-from typing import List, Optional, Iterable, Union
-
-import msgpack
+from typing import List, Optional, Iterable, Tuple, Union
 
 from fetchai.ledger.api.common import TransactionFactory
 from fetchai.ledger.bitvector import BitVector
 from fetchai.ledger.crypto import Address, Entity, Identity
-from fetchai.ledger.serialisation import transaction
+from fetchai.ledger.serialisation import payload, transaction
 from fetchai.ledger.transaction import Transaction
+from .cache import QueryCache
 from .common import ApiEndpoint
 
 EntityList = List[Entity]
@@ -34,6 +34,12 @@ AddressLike = Union[Address, str]
 class ContractsApi(ApiEndpoint):
     API_PREFIX = 'fetch.contract'
 
+    def __init__(self, host, port, query_cache: Optional[QueryCache] = None):
+        super().__init__(host, port)
+
+        # optional cache of query results, shared query results must not be modified
+        self.query_cache = query_cache
+
     def create(self, owner: Entity, contract: 'Contract', fee: int, shard_mask: Optional[BitVector] = None):
         ENDPOINT = 'create'
 
@@ -67,14 +73,39 @@ class ContractsApi(ApiEndpoint):
         return self._post_tx_json(encoded_tx, None)
 
     def query(self, contract_owner: Address, query: str, **kwargs):
-        return self._post_json(query, prefix=str(contract_owner), data=self._encode_json_payload(**kwargs))
+        data = self._encode_json_payload(**kwargs)
+        if self.query_cache is None:
+            return self._post_json(query, prefix=str(contract_owner), data=data)
+
+        key = (str(contract_owner), query, json.dumps(data, sort_keys=True))
+        return self.query_cache.get(key, lambda: self._post_json(query, prefix=str(contract_owner), data=data),
+                                    cacheable=lambda response: response[0])
+
+    def query_many(self, contract_owner: Address, queries: Iterable[Tuple[str, dict]],
+                   workers: Optional[int] = None) -> list:
+        """
+        Makes many queries of a contract, several requests at a time
+
+        :param contract_owner: The address of the contract
+        :param queries: The (query name, keyword arguments) pairs, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The (success, response) results in the order of the input queries, with the exception raised in
+            place of any query which could not be made
+        """
+        keys = []
+        arguments = {}
+        for query, kwargs in queries:
+            key = (query, json.dumps(self._encode_json_payload(**kwargs), sort_keys=True))
+            arguments[key] = kwargs
+            keys.append(key)
+
+        return self._map_concurrent(lambda key: self.query(contract_owner, key[0], **arguments[key]), keys, workers)
 
     def action(self, contract_address: Address, action: str, fee: int, signer: Entity, *args,
                shard_mask: Optional[BitVector] = None):
 
         tx = ContractTxFactory.action(Address(signer), contract_address, action, fee, [signer], *args,
                                       shard_mask=shard_mask)
-        tx.data = self._encode_msgpack_payload(*args)
         self._set_validity_period(tx)
         tx.sign(signer)
 
@@ -84,15 +115,7 @@ class ContractsApi(ApiEndpoint):
 
     @classmethod
     def _encode_msgpack_payload(cls, *args):
-        items = []
-        for value in args:
-            if cls._is_primitive(value):
-                items.append(value)
-            elif isinstance(value, Address):
-                items.append(msgpack.ExtType(77, bytes(value)))
-            else:
-                raise RuntimeError('Unknown item to pack: ' + value.__class__.__name__)
-        return msgpack.packb(items)
+        return payload.encode_arguments(args)
 
     @classmethod
     def _encode_json_payload(cls, **kwargs):
@@ -149,7 +172,7 @@ class ContractTxFactory(TransactionFactory):
 
     @classmethod
     def action(cls, from_address: Address, contract_address: Address, action: str, fee: int, signers: List[Identity],
-               *args, shard_mask: Optional[BitVector] = None) -> Transaction:
+               *args, shard_mask: Optional[BitVector] = None, data: Optional[bytes] = None) -> Transaction:
 
         # Default to wildcard shard mask if none supplied
         if not shard_mask:
@@ -165,6 +188,6 @@ class ContractTxFactory(TransactionFactory):
 
         # build up the basic transaction information
         tx = cls._create_smart_contract_action_tx(fee, from_address, contract_address, action, signers, shard_mask)
-        tx.data = cls._encode_msgpack_payload(*args)
+        tx.data = cls._encode_msgpack_payload(*args) if data is None else data
 
         return tx
@@ -15,14 +15,33 @@
 #   limitations under the License.
 #
 # ------------------------------------------------------------------------------
+import logging
+import time
+from typing import Optional
+
 from .common import ApiEndpoint, ApiError
 
+# the default number of seconds for which the server topology (version and lanes) is cached
+DEFAULT_TOPOLOGY_TTL = 60.0
+
 
 class ServerApi(ApiEndpoint):
 
+    def __init__(self, host, port, topology_ttl: Optional[float] = DEFAULT_TOPOLOGY_TTL):
+        """
+        :param host: The host of the ledger node
+        :param port: The port of the ledger node
+        :param topology_ttl: The number of seconds the cached status is used to answer topology queries (version and
+            number of lanes), None to keep it until invalidated or 0 to disable the cache
+        """
+        super().__init__(host, port)
+        self._topology_ttl = topology_ttl
+        self._topology = None  # type: Optional[dict]
+        self._topology_expiry = 0.0
+
     def status(self):
         """
-        Gets the status of a constellation server
+        Gets the status of a constellation server. This always queries the server and refreshes the cached topology.
 
         :return: dict of info returned by the /api/status endpoint
         """
@@ -37,11 +56,40 @@ class ServerApi(ApiEndpoint):
         except Exception as ex:
             raise ApiError('Error decoding response from status API: {}'.format(ex))
 
+        self._update_topology(response)
+
         return response
 
+    def topology(self):
+        """
+        Gets the status of a constellation server, using the cached copy when it has not expired
+
+        :return: dict of info returned by the /api/status endpoint
+        """
+        topology = self._topology
+        if topology is None or (self._topology_ttl is not None and time.monotonic() >= self._topology_expiry):
+            # status refreshes the cached topology
+            topology = self.status()
+        return topology
+
+    def invalidate(self):
+        """Discards the cached topology, the next query will fetch the status from the server"""
+        self._topology = None
+
     def num_lanes(self):
         """Queries the ledger for the number of lanes currently active"""
-        return self.status()['lanes']
+        return self.topology()['lanes']
 
     def version(self):
-        return self.status()['version']
+        return self.topology()['version']
+
+    def _update_topology(self, status: dict):
+        previous = self._topology
+        if previous is not None and previous is not status:
+            for key in ('lanes', 'version'):
+                if previous.get(key) != status.get(key):
+                    logging.warning('Server {} changed from {} to {}'.format(key, previous.get(key), status.get(key)))
+
+        if self._topology_ttl is not None:
+            self._topology_expiry = time.monotonic() + self._topology_ttl
+        self._topology = status
@@ -15,7 +15,7 @@
 #   limitations under the License.
 #
 # ------------------------------------------------------------------------------
-from typing import Union, Iterable, Optional
+from typing import Union, Iterable, List, Optional
 
 from fetchai.ledger.api import ApiEndpoint, ApiError
 from fetchai.ledger.api.common import TransactionFactory, unstable
@@ -27,6 +27,14 @@ from fetchai.ledger.serialisation import transaction
 AddressLike = Union[Address, Identity, str, bytes]
 
 
+def _try_address(address: AddressLike):
+    # invalid addresses are passed on unchanged, so that the error is raised in place of the result for that address
+    try:
+        return Address(address)
+    except ValueError:
+        return address
+
+
 class TokenApi(ApiEndpoint):
     API_PREFIX = 'fetch.token'
 
@@ -58,6 +66,16 @@ class TokenApi(ApiEndpoint):
         # return the balance
         return int(data['balance'])
 
+    def balances(self, addresses: Iterable[AddressLike], workers: Optional[int] = None) -> list:
+        """
+        Query the balances for many addresses from the remote node, making several requests concurrently
+
+        :param addresses: The addresses to query, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The balances in the order of the input addresses, with the exception raised in place of any failed query
+        """
+        return self._map_concurrent(self.balance, [_try_address(address) for address in addresses], workers)
+
     @unstable
     def stake(self, address: AddressLike):
         """
@@ -67,7 +85,20 @@ class TokenApi(ApiEndpoint):
         :return: The balance value retried
         :raises: ApiError on any failures
         """
+        return self._stake(address)
+
+    @unstable
+    def stakes(self, addresses: Iterable[AddressLike], workers: Optional[int] = None) -> list:
+        """
+        Query the stakes for many addresses from the remote node, making several requests concurrently
+
+        :param addresses: The addresses to query, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The stakes in the order of the input addresses, with the exception raised in place of any failed query
+        """
+        return self._map_concurrent(self._stake, [_try_address(address) for address in addresses], workers)
 
+    def _stake(self, address: AddressLike):
         # convert the input to an address
         address = Address(address)
 
@@ -96,7 +127,20 @@ class TokenApi(ApiEndpoint):
         :return: The balance value retried
         :raises: ApiError on any failures
         """
+        return self._stake_cooldown(address)
+
+    @unstable
+    def stake_cooldowns(self, addresses: Iterable[AddressLike], workers: Optional[int] = None) -> list:
+        """
+        Query the stake on cooldown for many addresses from the remote node, making several requests concurrently
+
+        :param addresses: The addresses to query, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The results in the order of the input addresses, with the exception raised in place of any failed query
+        """
+        return self._map_concurrent(self._stake_cooldown, [_try_address(address) for address in addresses], workers)
 
+    def _stake_cooldown(self, address: AddressLike):
         # convert the input to an address
         address = Address(address)
 
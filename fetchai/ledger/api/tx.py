@@ -20,7 +20,7 @@ from typing import Union, List, Dict, Optional
 
 from fetchai.ledger.crypto import Address, Identity
 from fetchai.ledger.decode import decode_hex_or_b64
-from .common import ApiEndpoint
+from .common import ApiEndpoint, ApiError
 
 AddressLike = Union[Address, Identity, bytes, str]
 
@@ -118,7 +118,7 @@ class TxContents:
 
         # Extract contents from json, converting as necessary
         return TxContents(
-            bytes.fromhex(data.get('digest').lstrip('0x')),
+            decode_hex_or_b64(data.get('digest')),
             data.get('action'),
             data.get('chainCode'),
             data.get('from'),
@@ -145,6 +145,16 @@ class TransactionApi(ApiEndpoint):
 
         return self._status(tx_digest)
 
+    def statuses(self, tx_digests: List[str], workers: Optional[int] = None) -> list:
+        """
+        Determines the status of many transactions at the node, making several requests concurrently
+
+        :param tx_digests: The hex-encoded strings of the target tx digests, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The statuses in the order of the input digests, with the exception raised in place of any failed query
+        """
+        return self._map_concurrent(self._status, list(tx_digests), workers)
+
     def _status(self, tx_digest) -> TxStatus:
         url = '{}://{}:{}/api/status/tx/{}'.format(self.protocol, self.host, self.port, tx_digest)
 
@@ -168,9 +178,45 @@ class TransactionApi(ApiEndpoint):
 
         return self._contents(tx_digest)
 
-    def _contents(self, tx_digest) -> Optional[TxContents]:
+    def contents_many(self, tx_digests: List[str], workers: Optional[int] = None) -> list:
+        """
+        Returns the contents of many transactions at the node, making several requests concurrently
+
+        :param tx_digests: The hex-encoded strings of the target tx digests, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The contents in the order of the input digests, with the exception raised in place of any failed query,
+            including an ApiError for any query the node does not respond to successfully
+        """
+        return self._map_concurrent(self._contents, list(tx_digests), workers)
+
+    def contents_json_many(self, tx_digests: List[str], workers: Optional[int] = None) -> list:
+        """
+        Returns the contents of many transactions at the node as the JSON objects returned by the node, making several
+        requests concurrently
+
+        :param tx_digests: The hex-encoded strings of the target tx digests, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The JSON objects in the order of the input digests, with the exception raised in place of any failed
+            query
+        """
+        return self._map_concurrent(self.contents_json, list(tx_digests), workers)
+
+    def contents_json(self, tx_digest) -> dict:
+        """
+        Returns the contents of the transaction at the node as the JSON object returned by the node, which is empty
+        if the transaction is not known
+
+        :param tx_digest: The hex-encoded string of the target tx digest
+        :return: The JSON object, see `TxContents.from_json`
+        :raises: ApiError if the node does not respond successfully
+        """
         url = '{}://{}:{}/api/tx/{}'.format(self.protocol, self.host, self.port, tx_digest)
 
-        response = self._session.get(url).json()
+        response = self._session.get(url)
+        if response.status_code != 200:
+            raise ApiError('Unable to query transaction {}. Status Code {}'.format(tx_digest, response.status_code))
 
-        return TxContents.from_json(response)
+        return response.json()
+
+    def _contents(self, tx_digest) -> Optional[TxContents]:
+        return TxContents.from_json(self.contents_json(tx_digest))
@@ -0,0 +1,406 @@
+import io
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from fetchai.ledger.crypto import Address
+from fetchai.ledger.serialisation import bytearray, sha256_hash
+from fetchai.ledger.serialisation import transaction as tx_serialisation
+from fetchai.ledger.transaction import Transaction
+
+ARCHIVE_MAGIC = b'FTXA'
+INDEX_MAGIC = b'FTXI'
+ARCHIVE_VERSION = 1
+
+# the header at the start of both the archive and the index files
+_HEADER = struct.Struct('>4sB')
+
+# the length prefix of each record in the archive
+_LENGTH = struct.Struct('>I')
+
+# each index entry: digest, from address, counter and the offset of the record in the archive
+_INDEX_ENTRY = struct.Struct('>32s32sQQ')
+
+DigestLike = Union[bytes, str]
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _to_digest(digest: DigestLike) -> bytes:
+    if isinstance(digest, str):
+        digest = bytes.fromhex(digest[2:] if digest.startswith('0x') else digest)
+    return bytes(digest)
+
+
+def _decode_transaction(data: bytes) -> Transaction:
+    # archived transactions were complete when they were written, so the signatures are not verified again
+    stream = io.BytesIO(data)
+    tx = tx_serialisation.decode_payload(stream)
+    for identity in tx.signers:
+        tx.add_signature(identity, bytearray.decode(stream))
+    return tx
+
+
+class ArchiveEntry:
+    """A transaction in the archive, decoded when it is first accessed"""
+
+    def __init__(self, data: memoryview, offset: int, digest: bytes, from_address: bytes, counter: int):
+        self._data = data
+        self._offset = offset
+        self._digest = digest
+        self._from_address = from_address
+        self._counter = counter
+        self._tx = None  # type: Optional[Transaction]
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def data(self) -> memoryview:
+        """The encoded transaction, a zero copy view of the archive"""
+        return self._data
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @property
+    def digest(self) -> bytes:
+        return self._digest
+
+    @property
+    def from_address(self) -> Address:
+        return Address(self._from_address)
+
+    @property
+    def counter(self) -> int:
+        return self._counter
+
+    @property
+    def transaction(self) -> Transaction:
+        if self._tx is None:
+            self._tx = _decode_transaction(bytes(self._data))
+        return self._tx
+
+
+class TransactionArchive:
+    """
+    An append-only file of encoded transactions with an index by digest and by sender.
+
+    Each record in the archive is the length prefixed encoding of a complete transaction. The index is kept in a
+    sidecar file of fixed size entries (digest, from address, counter, offset). Both files are read through `mmap`, so
+    only the records which are accessed are read from disk.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        """
+        :param path: The path of the archive, the index is stored alongside it with an `.idx` suffix
+        :param readonly: Open an existing archive without allowing any changes
+        """
+        self._path = os.path.abspath(path)
+        self._index_path = self._path + '.idx'
+        self._readonly = bool(readonly)
+        self._lock = threading.RLock()
+
+        if self._readonly and not os.path.exists(self._path):
+            raise ArchiveError('Archive {} does not exist'.format(self._path))
+
+        mode = 'rb' if self._readonly else 'a+b'
+        self._data_file = open(self._path, mode)
+        self._index_file = open(self._index_path, mode) if os.path.exists(self._index_path) or not readonly else None
+
+        self._data_map = None  # type: Optional[mmap.mmap]
+        self._index_map = None  # type: Optional[mmap.mmap]
+
+        # lookups built from the index when they are first needed
+        self._by_digest = None  # type: Optional[Dict[bytes, int]]
+        self._by_sender = None  # type: Optional[Dict[bytes, List[int]]]
+
+        try:
+            self._recover()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def index_path(self) -> str:
+        return self._index_path
+
+    def _recover(self):
+        """Discards partially written records and index entries, and indexes any records which were not indexed"""
+        if self._index_file is None:
+            raise ArchiveError('Index {} does not exist'.format(self._index_path))
+
+        data_size = self._check_header(self._data_file, ARCHIVE_MAGIC)
+        index_size = self._check_header(self._index_file, INDEX_MAGIC)
+        self._data_map = self._map(self._data_file, data_size)
+        self._index_map = self._map(self._index_file, index_size)
+
+        # records are written before their index entries, so only the end of the files needs to be checked
+        count = (index_size - _HEADER.size) // _INDEX_ENTRY.size
+        end = _HEADER.size
+        while count > 0:
+            end = self._record_end(self._index_entry(count - 1)[3], data_size)
+            if end is not None:
+                break
+            count -= 1
+        else:
+            end = _HEADER.size
+
+        missing = []
+        while True:
+            record_end = self._record_end(end, data_size)
+            if record_end is None:
+                break
+
+            encoded = bytes(self._data_map[end + _LENGTH.size:record_end])
+            tx = tx_serialisation.decode_payload(io.BytesIO(encoded))
+            missing.append(_INDEX_ENTRY.pack(sha256_hash(encoded), bytes(tx.from_address), tx.counter, end))
+            end = record_end
+
+        index_end = _HEADER.size + count * _INDEX_ENTRY.size
+        if end != data_size or index_end != index_size or missing:
+            if self._readonly:
+                raise ArchiveError('Archive {} was not closed cleanly'.format(self._path))
+
+            if end != data_size:
+                self._truncate(self._data_file, end)
+                self._data_map = self._map(self._data_file, end)
+            if index_end != index_size:
+                self._truncate(self._index_file, index_end)
+                self._index_map = self._map(self._index_file, index_end)
+
+        self._data_size = end
+        self._count = count
+
+        if missing:
+            self._write_index(missing)
+
+    def _record_end(self, offset: int, data_size: int) -> Optional[int]:
+        """The end of the record at the offset, or None if the record is incomplete"""
+        if offset + _LENGTH.size > data_size:
+            return None
+        length, = _LENGTH.unpack_from(self._data_map, offset)
+        end = offset + _LENGTH.size + length
+        return end if end <= data_size else None
+
+    def _check_header(self, fp, magic: bytes) -> int:
+        fp.seek(0, os.SEEK_END)
+        size = fp.tell()
+
+        if size == 0 and not self._readonly:
+            fp.write(_HEADER.pack(magic, ARCHIVE_VERSION))
+            fp.flush()
+            return _HEADER.size
+
+        fp.seek(0)
+        header = fp.read(_HEADER.size)
+        if len(header) != _HEADER.size or _HEADER.unpack(header) != (magic, ARCHIVE_VERSION):
+            raise ArchiveError('Invalid or incompatible archive file: {}'.format(fp.name))
+
+        return size
+
+    @staticmethod
+    def _map(fp, size: int) -> mmap.mmap:
+        return mmap.mmap(fp.fileno(), size, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _unmap(mapping: Optional[mmap.mmap]):
+        # a mapping can not be closed while the data of an entry refers to it, it is then released with the entry
+        if mapping is not None and not mapping.closed:
+            try:
+                mapping.close()
+            except BufferError:
+                pass
+
+    def _data(self, end: int) -> mmap.mmap:
+        # appends do not remap the files, they are only remapped when a read first goes past the end of the mapping
+        if end > len(self._data_map):
+            self._unmap(self._data_map)
+            self._data_map = self._map(self._data_file, self._data_size)
+        return self._data_map
+
+    def _index(self, end: int) -> mmap.mmap:
+        if end > len(self._index_map):
+            self._unmap(self._index_map)
+            self._index_map = self._map(self._index_file, _HEADER.size + self._count * _INDEX_ENTRY.size)
+        return self._index_map
+
+    @staticmethod
+    def _truncate(fp, size: int):
+        fp.flush()
+        fp.truncate(size)
+        fp.flush()
+
+    def _index_entry(self, position: int) -> Tuple[bytes, bytes, int, int]:
+        offset = _HEADER.size + position * _INDEX_ENTRY.size
+        return _INDEX_ENTRY.unpack_from(self._index(offset + _INDEX_ENTRY.size), offset)
+
+    def _write_index(self, entries: List[bytes]):
+        self._index_file.write(b''.join(entries))
+        self._index_file.flush()
+
+        first = self._count
+        self._count += len(entries)
+
+        # the lookups are updated from the new entries, so that the index does not need to be remapped
+        if self._by_digest is not None:
+            for position, entry in enumerate(entries, first):
+                self._add_lookup(position, _INDEX_ENTRY.unpack(entry))
+
+    def _add_lookup(self, position: int, entry: Tuple[bytes, bytes, int, int]):
+        digest, from_address, _, _ = entry
+        self._by_digest[digest] = position
+        self._by_sender.setdefault(from_address, []).append(position)
+
+    def _lookups(self):
+        if self._by_digest is None:
+            self._by_digest = {}
+            self._by_sender = {}
+            for position in range(self._count):
+                self._add_lookup(position, self._index_entry(position))
+
+    def _entry(self, position: int) -> ArchiveEntry:
+        digest, from_address, counter, offset = self._index_entry(position)
+        length, = _LENGTH.unpack_from(self._data(offset + _LENGTH.size), offset)
+        start = offset + _LENGTH.size
+        data = memoryview(self._data(start + length))[start:start + length]
+        return ArchiveEntry(data, offset, digest, from_address, counter)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, digest: DigestLike) -> bool:
+        return self.get(digest) is not None
+
+    def __iter__(self) -> Iterator[ArchiveEntry]:
+        with self._lock:
+            count = self._count
+        for position in range(count):
+            with self._lock:
+                entry = self._entry(position)
+            yield entry
+
+    def append(self, tx: Union[Transaction, bytes]) -> bytes:
+        """
+        Appends a transaction to the archive
+
+        :param tx: The complete transaction, or its encoding
+        :return: The digest of the transaction
+        """
+        return self.extend([tx])[0]
+
+    def extend(self, txs: Iterable[Union[Transaction, bytes]]) -> List[bytes]:
+        """
+        Appends a number of transactions to the archive with a single write
+
+        :param txs: The complete transactions, or their encodings
+        :return: The digests of the transactions
+        """
+        if self._readonly:
+            raise ArchiveError('Unable to modify a read only archive')
+
+        records = []
+        entries = []
+        digests = []
+        with self._lock:
+            offset = self._data_size
+            for tx in txs:
+                if isinstance(tx, Transaction):
+                    encoded = tx.encode()
+                    if encoded is None:
+                        raise ArchiveError('Unable to archive an incomplete transaction')
+                else:
+                    encoded = bytes(tx)
+                    tx = tx_serialisation.decode_payload(io.BytesIO(encoded))
+
+                digest = sha256_hash(encoded)
+                records.append(_LENGTH.pack(len(encoded)))
+                records.append(encoded)
+                entries.append(_INDEX_ENTRY.pack(digest, bytes(tx.from_address), tx.counter, offset))
+                digests.append(digest)
+                offset += _LENGTH.size + len(encoded)
+
+            if not digests:
+                return digests
+
+            # the records are written before the index, so that the index never refers to missing records
+            self._data_file.write(b''.join(records))
+            self._data_file.flush()
+            self._data_size = offset
+
+            self._write_index(entries)
+
+        return digests
+
+    def sync(self):
+        """Ensures that everything appended has been written to disk"""
+        with self._lock:
+            if not self._readonly:
+                for fp in (self._data_file, self._index_file):
+                    fp.flush()
+                    os.fsync(fp.fileno())
+
+    def get(self, digest: DigestLike) -> Optional[ArchiveEntry]:
+        """
+        Looks up a transaction by its digest
+
+        :param digest: The digest, as bytes or a hex string
+        :return: The archived transaction, or None if it is not present
+        """
+        with self._lock:
+            self._lookups()
+            position = self._by_digest.get(_to_digest(digest))
+            return None if position is None else self._entry(position)
+
+    def by_sender(self, address: Address) -> List[ArchiveEntry]:
+        """
+        Looks up the transactions sent from an address
+
+        :param address: The from address of the transactions
+        :return: The archived transactions in the order they were appended
+        """
+        with self._lock:
+            self._lookups()
+            return [self._entry(position) for position in self._by_sender.get(bytes(Address(address)), [])]
+
+    def find(self, address: Address, counter: int) -> Optional[ArchiveEntry]:
+        """
+        Looks up a transaction by its from address and counter
+
+        :param address: The from address of the transaction
+        :param counter: The counter of the transaction
+        :return: The most recently appended matching transaction, or None if there is none
+        """
+        with self._lock:
+            self._lookups()
+            for position in reversed(self._by_sender.get(bytes(Address(address)), [])):
+                if self._index_entry(position)[2] == counter:
+                    return self._entry(position)
+        return None
+
+    def close(self):
+        """
+        Closes the archive files and their mappings. A mapping which is still referenced by the data of an entry can
+        not be closed, it stays open until the last such entry has been released.
+        """
+        with self._lock:
+            for mapping in (self._data_map, self._index_map):
+                self._unmap(mapping)
+            for fp in (self._data_file, self._index_file):
+                if fp is not None and not fp.closed:
+                    fp.close()
@@ -0,0 +1,213 @@
+import json
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.api.common import DEFAULT_QUERY_WORKERS
+from fetchai.ledger.api.tx import TxContents
+
+# the number of digests looked up and fetched together
+DEFAULT_BATCH_SIZE = 1000
+
+# the number of digests in each lookup query, below the SQLite limit on the number of query parameters
+_LOOKUP_SIZE = 500
+
+DigestLike = Union[bytes, str]
+
+
+def _to_digest(digest: DigestLike) -> bytes:
+    if isinstance(digest, str):
+        digest = bytes.fromhex(digest[2:] if digest.startswith('0x') else digest)
+    return bytes(digest)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ContentsStore:
+    """
+    A local SQLite database of transaction contents keyed by digest.
+
+    The JSON returned by the node is stored unchanged, so that `TxContents` can be rebuilt from it exactly as if it
+    had just been fetched.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: The path of the database, created if it does not exist
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS tx_contents (digest BLOB PRIMARY KEY, contents TEXT NOT NULL) '
+                         'WITHOUT ROWID')
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM tx_contents').fetchone()[0]
+
+    def __contains__(self, digest: DigestLike) -> bool:
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM tx_contents WHERE digest = ?', (_to_digest(digest),)).fetchone()
+        return row is not None
+
+    def get_json(self, digest: DigestLike) -> Optional[dict]:
+        """
+        Looks up the stored contents of a transaction
+
+        :param digest: The digest, as bytes or a hex string
+        :return: The JSON object returned by the node, or None if the transaction is not stored
+        """
+        with self._lock:
+            row = self._db.execute('SELECT contents FROM tx_contents WHERE digest = ?',
+                                   (_to_digest(digest),)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get(self, digest: DigestLike) -> Optional[TxContents]:
+        """
+        Looks up the stored contents of a transaction
+
+        :param digest: The digest, as bytes or a hex string
+        :return: The contents, or None if the transaction is not stored
+        """
+        data = self.get_json(digest)
+        return None if data is None else TxContents.from_json(data)
+
+    def missing(self, digests: Iterable[DigestLike]) -> List[bytes]:
+        """
+        Determines which transactions are not stored
+
+        :param digests: The digests, as bytes or hex strings
+        :return: The distinct digests which are not stored, in the order they were given
+        """
+        digests = list(dict.fromkeys(_to_digest(digest) for digest in digests))
+
+        present = set()
+        with self._lock:
+            for chunk in _chunks(digests, _LOOKUP_SIZE):
+                query = 'SELECT digest FROM tx_contents WHERE digest IN ({})'.format(', '.join('?' * len(chunk)))
+                present.update(bytes(row[0]) for row in self._db.execute(query, chunk))
+
+        return [digest for digest in digests if digest not in present]
+
+    def put_many(self, items: Iterable[Tuple[DigestLike, dict]]):
+        """
+        Stores the contents of many transactions in a single database transaction
+
+        :param items: The digest and the JSON object returned by the node for each transaction
+        """
+        rows = [(_to_digest(digest), json.dumps(data, separators=(',', ':'))) for digest, data in items]
+        with self._lock:
+            with self._db:
+                self._db.executemany('INSERT OR REPLACE INTO tx_contents (digest, contents) VALUES (?, ?)', rows)
+
+    def digests(self) -> List[bytes]:
+        with self._lock:
+            return [bytes(row[0]) for row in self._db.execute('SELECT digest FROM tx_contents')]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class BackfillResult:
+    def __init__(self):
+        self.fetched = 0
+        self.skipped = 0
+        self.not_found = []  # type: List[bytes]
+        self.failed = {}  # type: Dict[bytes, Exception]
+
+    @property
+    def complete(self) -> bool:
+        return not self.not_found and not self.failed
+
+
+class ContentsBackfill:
+    """
+    Fetches the contents of many transactions from a node into a `ContentsStore`.
+
+    The digests are processed in batches. Transactions which are already stored are skipped, so an interrupted backfill
+    can be run again and will only fetch what is missing. Each batch is fetched concurrently and stored as soon as it
+    has been fetched, and requests which fail are retried.
+    """
+
+    def __init__(self, api: LedgerApi, store: ContentsStore, workers: int = DEFAULT_QUERY_WORKERS,
+                 batch_size: int = DEFAULT_BATCH_SIZE, retries: int = 3, retry_interval: float = 0.5):
+        """
+        :param api: The API used to query the node
+        :param store: The store the contents are written to
+        :param workers: The maximum number of concurrent requests
+        :param batch_size: The number of digests processed together
+        :param retries: The number of times a failed request is retried
+        :param retry_interval: The number of seconds to wait before retrying failed requests
+        """
+        self._api = api
+        self._store = store
+        self._workers = int(workers)
+        self._batch_size = max(int(batch_size), 1)
+        self._retries = max(int(retries), 0)
+        self._retry_interval = float(retry_interval)
+
+    def run(self, digests: Iterable[DigestLike]) -> BackfillResult:
+        """
+        Fetches the contents of every transaction which is not already stored
+
+        :param digests: The digests, as bytes or hex strings, which may be a generator
+        :return: A summary of the transactions fetched, skipped, not found and failed
+        """
+        result = BackfillResult()
+        for batch in _chunks(digests, self._batch_size):
+            missing = self._store.missing(batch)
+            result.skipped += len(set(_to_digest(digest) for digest in batch)) - len(missing)
+            self._fetch(missing, result)
+        return result
+
+    def _fetch(self, digests: List[bytes], result: BackfillResult):
+        failed = {}  # type: Dict[bytes, Exception]
+        for attempt in range(self._retries + 1):
+            if attempt > 0:
+                time.sleep(self._retry_interval)
+
+            responses = self._api.tx.contents_json_many([digest.hex() for digest in digests], self._workers)
+
+            found = []
+            failed = {}
+            for digest, response in zip(digests, responses):
+                if isinstance(response, Exception):
+                    failed[digest] = response
+                elif response:
+                    found.append((digest, response))
+                else:
+                    result.not_found.append(digest)
+
+            # successful requests are stored straight away, so that they are not fetched again if a later retry fails
+            self._store.put_many(found)
+            result.fetched += len(found)
+
+            digests = list(failed)
+            if not digests:
+                break
+
+        result.failed.update(failed)
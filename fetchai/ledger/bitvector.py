@@ -1,4 +1,16 @@
+from typing import Iterable, Iterator
+
+
+def _is_power_of_two(value: int) -> bool:
+    return value > 0 and (value & (value - 1)) == 0
+
+
 class BitVector:
+    """
+    A fixed size vector of bits, stored as a single integer where bit n of the integer is bit n of the vector.
+
+    The binary representation (`bytes(bits)`) is big-endian, i.e. the last byte contains bits 0 to 7.
+    """
 
     @staticmethod
     def from_bytes(data: bytes, bit_size: int):
@@ -8,12 +20,7 @@ class BitVector:
         max_size = len(data) * 8
         assert min_size <= bit_size <= max_size
 
-        bits = BitVector()
-        bits._size = bit_size
-        bits._byte_size = (bit_size + 7) // 8
-        bits._buffer = bytearray(reversed(data))
-
-        return bits
+        return BitVector.from_int(int.from_bytes(data, 'big'), bit_size)
 
     @classmethod
     def from_hex_string(cls, hex_data):
@@ -22,18 +29,31 @@ class BitVector:
 
     @staticmethod
     def from_array(bit_array: list):
-        bits = BitVector(len(bit_array))
-        for i, v in enumerate(reversed(bit_array)):
-            if v:
-                bits.set(i, True)
-        return bits
+        value = 0
+        for v in bit_array:
+            value = (value << 1) | (1 if v else 0)
+        return BitVector.from_int(value, len(bit_array))
 
     @staticmethod
-    def from_indices(indices: list, size: int):
-        bits = BitVector(size)
+    def from_indices(indices: Iterable[int], size: int):
+        value = 0
         for i in indices:
             assert 0 <= i < size, "Index exceeds list size"
-            bits.set(i, True)
+            value |= 1 << i
+        return BitVector.from_int(value, size)
+
+    @staticmethod
+    def from_int(value: int, size: int):
+        """
+        Creates a bit vector from the integer representation of the bits
+
+        :param value: The integer whose bit n is bit n of the vector, bits beyond the size are discarded
+        :param size: The number of bits in the vector
+        :return: The new bit vector
+        """
+        bits = BitVector.__new__(BitVector)
+        bits._size = size = int(size)
+        bits._value = int(value) & ((1 << size) - 1)
         return bits
 
     def __init__(self, size=None):
@@ -42,45 +62,141 @@ class BitVector:
 
         if isinstance(size, BitVector):
             self._size = size._size
-            self._byte_size = size._byte_size
-            self._buffer = bytearray(size._buffer)
+            self._value = size._value
         else:
             self._size = int(size)
-            self._byte_size = (self._size + 7) // 8
-            self._buffer = bytearray([0] * self._byte_size)
+            self._value = 0
 
     def __bytes__(self):
-        return bytes(reversed(self._buffer))
+        return self._value.to_bytes(self.byte_length, 'big')
+
+    def __int__(self):
+        return self._value
 
     def __len__(self):
         return self._size
 
     def __eq__(self, other):
-        if len(self) == len(other):
-            return bytes(self) == bytes(other)
+        if isinstance(other, BitVector):
+            return self._size == other._size and self._value == other._value
         return False
 
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __repr__(self):
+        return '<BitVector size={} bits={}>'.format(self._size, self.as_binary())
+
+    def _check_compatible(self, other: 'BitVector'):
+        if not isinstance(other, BitVector):
+            raise TypeError('Expected BitVector, received {}'.format(other.__class__.__name__))
+        if self._size != other._size:
+            raise ValueError('Bit vector sizes do not match: {} != {}'.format(self._size, other._size))
+
+    def __or__(self, other: 'BitVector') -> 'BitVector':
+        self._check_compatible(other)
+        return BitVector.from_int(self._value | other._value, self._size)
+
+    def __and__(self, other: 'BitVector') -> 'BitVector':
+        self._check_compatible(other)
+        return BitVector.from_int(self._value & other._value, self._size)
+
+    def __xor__(self, other: 'BitVector') -> 'BitVector':
+        self._check_compatible(other)
+        return BitVector.from_int(self._value ^ other._value, self._size)
+
+    def __invert__(self) -> 'BitVector':
+        return BitVector.from_int(~self._value, self._size)
+
+    def __ior__(self, other: 'BitVector') -> 'BitVector':
+        self._check_compatible(other)
+        self._value |= other._value
+        return self
+
+    def __iand__(self, other: 'BitVector') -> 'BitVector':
+        self._check_compatible(other)
+        self._value &= other._value
+        return self
+
+    def __ixor__(self, other: 'BitVector') -> 'BitVector':
+        self._check_compatible(other)
+        self._value ^= other._value
+        return self
+
     @property
     def byte_length(self):
-        return self._byte_size
+        return (self._size + 7) // 8
 
     def get(self, bit: int) -> int:
-        byte_index = bit // 8
-        bit_index = bit & 0x7
+        if bit >= self._size or bit < 0:
+            raise IndexError('Bit index {} out of range'.format(bit))
 
-        return (self._buffer[byte_index] >> bit_index) & 0x1
+        return 1 if self._value & (1 << bit) else 0
 
     def set(self, bit: int, value: int):
         assert 0 <= value <= 1
-        byte_index = bit // 8
-        bit_index = bit & 0x7
-        self._buffer[byte_index] |= (value & 0x1) << bit_index
+        if not 0 <= bit < self._size:
+            raise IndexError('Bit index {} out of range'.format(bit))
+
+        if value:
+            self._value |= 1 << bit
+        else:
+            self._value &= ~(1 << bit)
+
+    def popcount(self) -> int:
+        """The number of set bits"""
+        return bin(self._value).count('1')
+
+    def any(self) -> bool:
+        """True if any of the bits are set"""
+        return self._value != 0
+
+    def overlaps(self, other: 'BitVector') -> bool:
+        """True if any bit is set in both vectors"""
+        self._check_compatible(other)
+        return (self._value & other._value) != 0
+
+    def iter_set_bits(self) -> Iterator[int]:
+        """Iterates over the indices of the set bits in ascending order"""
+        value = self._value
+        while value:
+            lowest = value & -value
+            yield lowest.bit_length() - 1
+            value ^= lowest
+
+    def resize(self, size: int) -> 'BitVector':
+        """
+        Converts a lane mask to a different number of lanes.
+
+        Resources map to lanes by `group & (lanes - 1)`, so when shrinking, lane n maps to lane n % size and when
+        growing, lane n maps to every lane m where m % len(self) == n. Both sizes must be powers of two.
+
+        :param size: The new number of lanes
+        :return: The resized bit vector
+        """
+        size = int(size)
+        if not (_is_power_of_two(self._size) and _is_power_of_two(size)):
+            raise ValueError('Resizing requires power of two sizes, {} to {}'.format(self._size, size))
+
+        value = 0
+        if size <= self._size:
+            # fold the upper lanes down onto the lower ones
+            mask = (1 << size) - 1
+            remaining = self._value
+            while remaining:
+                value |= remaining & mask
+                remaining >>= size
+        else:
+            # replicate the lanes across the new range
+            for offset in range(0, size, self._size):
+                value |= self._value << offset
+
+        return BitVector.from_int(value, size)
 
     def as_binary(self):
-        output = ''
-        for n in bytes(self):
-            output += ''.join(str(1 & (int(n) >> i)) for i in range(8)[::-1])
-        return output
+        if self._size == 0:
+            return ''
+        return format(self._value, '0{}b'.format(self.byte_length * 8))
 
     def as_hex(self):
         return bytes(self).hex()
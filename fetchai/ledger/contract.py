@@ -3,14 +3,18 @@ import hashlib
 import json
 import logging
 from os import urandom
-from typing import Union, List, Optional, Iterable, Any
+from typing import Union, List, Optional, Iterable, Any, Dict, Sequence, Tuple
 
+from fetchai.ledger.api.common import DEFAULT_BLOCK_VALIDITY_PERIOD
 from fetchai.ledger.api.contracts import ContractTxFactory
 from fetchai.ledger.bitvector import BitVector
-from fetchai.ledger.crypto import Identity
+from fetchai.ledger.crypto import Identity, sign_many
+from fetchai.ledger.parser.analysis import AnalysisCache, ContractAnalysis, ShardMaskTemplate
 from fetchai.ledger.parser.etch_parser import EtchParser, UnparsableAddress, UseWildcardShardMask, EtchParserError
-from fetchai.ledger.serialisation import sha256_hash
+from fetchai.ledger.serialisation import payload, sha256_hash
 from fetchai.ledger.serialisation.shardmask import ShardMask
+from fetchai.ledger.serialisation.transaction import encode_transaction
+from fetchai.ledger.transaction import Transaction
 from .api import LedgerApi
 from .crypto import Entity, Address
 
@@ -22,6 +26,9 @@ def _compute_digest(source) -> Address:
 
 
 class Contract:
+    # optional on-disk cache of contract analysis results, shared by all contracts
+    analysis_cache = None  # type: Optional[AnalysisCache]
+
     def __init__(self, source: str, owner: AddressLike, nonce: Optional[bytes] = None):
         self._source = str(source)
         self._digest = _compute_digest(self._source)
@@ -34,11 +41,17 @@ class Contract:
 
         self._address = Address(hasher.digest())
 
-        # Etch parser for analysing contract
-        self._parser = EtchParser(self._source)
+        # Etch parser for analysing contract, only created when the analysis does not cover an entry point
+        self._parser = None  # type: Optional[EtchParser]
+        self._shard_mask_templates = {}  # type: Dict[Optional[str], ShardMaskTemplate]
+
+        if self.analysis_cache is not None:
+            self._analysis = self.analysis_cache.get_or_analyse(self._source, self.digest)
+        else:
+            self._analysis = ContractAnalysis.from_source(self._source, self.digest)
 
         # Generate set of action and query entry points
-        entries = self._parser.entry_points(['init', 'action', 'query'])
+        entries = self._analysis.entry_points()
         self._actions = list(set(entries.get('action', [])))
         self._queries = list(set(entries.get('query', [])))
 
@@ -47,6 +60,12 @@ class Contract:
             raise RuntimeError('Contract may not have more than one @init function, found: {}'.format(', '.join(init)))
         self._init = init[0] if len(init) else None
 
+    @property
+    def parser(self) -> EtchParser:
+        if self._parser is None:
+            self._parser = EtchParser(self._source, digest=self.digest)
+        return self._parser
+
     @property
     def name(self) -> str:
         return str(self.address)
@@ -116,7 +135,29 @@ class Contract:
 
         # make the required query on the API
         success, response = api.contracts.query(self.address, name, **kwargs)
+        return self._query_result(success, response)
+
+    def query_many(self, api: LedgerApi, queries: Iterable[Tuple[str, dict]], workers: Optional[int] = None) -> list:
+        """
+        Makes many queries of the contract, several requests at a time
+
+        :param api: The ledger API
+        :param queries: The (query name, keyword arguments) pairs, duplicates are only requested once
+        :param workers: The maximum number of concurrent requests
+        :return: The results in the order of the input queries, with the exception raised in place of any failed query
+        """
+        results = []
+        for item in api.contracts.query_many(self.address, queries, workers):
+            if not isinstance(item, Exception):
+                try:
+                    item = self._query_result(*item)
+                except RuntimeError as ex:
+                    item = ex
+            results.append(item)
+        return results
 
+    @staticmethod
+    def _query_result(success: bool, response):
         if not success:
             if response is not None and "msg" in response:
                 raise RuntimeError('Failed to make requested query: ' + response["msg"])
@@ -141,19 +182,26 @@ class Contract:
 
         return api.contracts.action(self.address, name, fee, signer, *args, shard_mask=shard_mask)
 
+    def batch(self, signer: Entity, fee: int, validity_period: Optional[int] = None) -> 'ContractBatch':
+        """Creates a batch of actions on this contract, all signed by the same entity"""
+        return ContractBatch(self, signer, fee, validity_period)
+
     def _build_shard_mask(self, num_lanes: int, name: Optional[str], arguments: List[Any]) -> BitVector:
         try:
-            resource_addresses = [
-                'fetch.contract.state.{}'.format(str(self.address)),
-            ]
+            template = self._shard_mask_template(name)
+            if template is not None:
+                shard_mask = template.build(num_lanes, arguments)
 
-            # only process the init functions resources if this function is actually present
-            if name is not None:
-                variables = self._parser.used_globals_to_addresses(name, arguments)
+            else:
+                resource_addresses = [
+                    'fetch.contract.state.{}'.format(str(self.address)),
+                ]
+
+                variables = self.parser.used_globals_to_addresses(name, arguments)
                 for variable in variables:
                     resource_addresses.append(ShardMask.state_to_address(str(self.address), variable))
 
-            shard_mask = ShardMask.resources_to_shard_mask(resource_addresses, num_lanes)
+                shard_mask = ShardMask.resources_to_shard_mask(resource_addresses, num_lanes)
 
         except (UnparsableAddress, UseWildcardShardMask, EtchParserError, AssertionError) as ex:
             logging.debug('Parser Error: {}'.format(ex))
@@ -162,6 +210,25 @@ class Contract:
 
         return shard_mask
 
+    def _shard_mask_template(self, name: Optional[str]) -> Optional[ShardMaskTemplate]:
+        """Returns the compiled shard mask template for an entry point, None if it must be analysed by the parser"""
+        template = self._shard_mask_templates.get(name)
+        if template is None:
+            base_resources = ['fetch.contract.state.{}'.format(str(self.address))]
+
+            # only process the init functions resources if this function is actually present
+            if name is None:
+                template = ShardMaskTemplate(None, base_resources)
+            elif self._analysis.has_used_globals(name):
+                prefix = ShardMask.state_to_address(str(self.address), '')
+                template = self._analysis.shard_mask_template(name, prefix, base_resources)
+            else:
+                return None
+
+            self._shard_mask_templates[name] = template
+
+        return template
+
     @staticmethod
     def _convert_to_single_entity(value: Union[Iterable[Entity], Entity]):
         if isinstance(value, Entity):
@@ -200,3 +267,77 @@ class Contract:
             'owner': None if self._owner is None else str(self._owner),
             'source': self.encoded_source
         }
+
+
+class ContractBatch:
+    """
+    Accumulates many action calls to a single contract which are then built, signed and submitted together. The
+    block number and lane count are looked up once for the whole batch, signing is spread over a pool of processes
+    and the transactions are submitted in bulk.
+    """
+
+    def __init__(self, contract: Contract, signer: Entity, fee: int, validity_period: Optional[int] = None):
+        self._contract = contract
+        self._signer = signer
+        self._fee = int(fee)
+        self._validity_period = validity_period or DEFAULT_BLOCK_VALIDITY_PERIOD
+        self._calls = []  # type: List[Tuple[str, tuple]]
+
+    def __len__(self):
+        return len(self._calls)
+
+    def add(self, action: str, *args):
+        """Adds a call of an action to the batch"""
+        self._calls.append((str(action), args))
+
+    def extend(self, calls: Iterable[Tuple[str, Sequence[Any]]]):
+        """Adds a number of (action, arguments) calls to the batch"""
+        for action, args in calls:
+            self.add(action, *args)
+
+    def build(self, api: LedgerApi, workers: Optional[int] = None) -> List[Transaction]:
+        """
+        Builds and signs the transactions for all the calls in the batch
+
+        :param api: The ledger API used to look up the current block number and lane count
+        :param workers: The number of signing processes, defaults to the number of CPUs
+        :return: The list of signed transactions, in the order of the calls
+        """
+        return [tx for tx, _ in self._build(api, workers)]
+
+    def submit(self, api: LedgerApi, workers: Optional[int] = None) -> List[str]:
+        """
+        Builds, signs and submits the transactions for all the calls in the batch, clearing the batch
+
+        :param api: The ledger API to submit to
+        :param workers: The number of signing processes, defaults to the number of CPUs
+        :return: The digests of the submitted transactions, which can be awaited together with `api.sync`
+        """
+        encoded = [encode_transaction(tx, tx_payload) for tx, tx_payload in self._build(api, workers)]
+        digests = api.contracts.submit_signed_txs(encoded)
+        self._calls = []
+        return digests
+
+    def _build(self, api: LedgerApi, workers: Optional[int]) -> List[Tuple[Transaction, bytes]]:
+        num_lanes = api.server.num_lanes()
+        block_number = api.contracts.current_block_number()
+
+        signer = self._signer
+        from_address = Address(signer)
+        contract_address = self._contract.address
+
+        txs = []
+        data = payload.encode_arguments_many(args for _, args in self._calls)
+        for (action, args), tx_data in zip(self._calls, data):
+            shard_mask = self._contract._build_shard_mask(num_lanes, action, list(args))
+            tx = ContractTxFactory.action(from_address, contract_address, action, self._fee, [signer], *args,
+                                          shard_mask=shard_mask, data=tx_data)
+            tx.valid_from = block_number
+            tx.valid_until = block_number + self._validity_period
+            txs.append(tx)
+
+        payloads = [tx.encode_payload() for tx in txs]
+        for tx, signature in zip(txs, sign_many(signer, payloads, workers)):
+            tx.add_signature(signer, signature)
+
+        return list(zip(txs, payloads))
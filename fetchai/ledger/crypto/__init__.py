@@ -19,3 +19,6 @@
 from .address import Address
 from .entity import Entity
 from .identity import Identity
+from .keystore import Keystore
+from .generate import generate_entities
+from .signing import sign_many
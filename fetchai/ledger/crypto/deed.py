@@ -18,7 +18,7 @@
 import json
 import logging
 from enum import Enum
-from typing import Union, Dict
+from typing import Union, Dict, Iterable, List, Optional
 
 from fetchai.ledger.crypto import Address, Identity
 
@@ -59,6 +59,10 @@ class Deed:
         self._thresholds = {}  # type: Dict[Operation, int]
         self._required_amend = True  # type: bool
 
+        # the running total of the voting weights, and whether the deed is known to be valid
+        self._total_votes = 0  # type: int
+        self._valid = False  # type: bool
+
     def __eq__(self, other: 'Deed'):
         if self is other:
             return True
@@ -86,7 +90,7 @@ class Deed:
 
     @property
     def total_votes(self):
-        return sum(v for v in self._signees.values())
+        return self._total_votes
 
     @property
     def require_amend(self):
@@ -105,17 +109,21 @@ class Deed:
         signee = Address(signee)
         voting_weight = _one_or_greater(voting_weight)
 
+        self._total_votes += int(voting_weight) - self._signees.get(signee, 0)
         self._signees[signee] = int(voting_weight)
+        self._valid = False
 
     def remove_signee(self, signee: AddressLike):
         signee = Address(signee)
         if signee in self._signees:
-            del self._signees[signee]
+            self._total_votes -= self._signees.pop(signee)
+            self._valid = False
 
     def set_operation(self, operation: Operation, threshold: int):
         threshold = _one_or_greater(threshold)
 
         self._thresholds[operation] = int(threshold)
+        self._valid = False
 
     def remove_operation(self, operation: Operation):
         if operation in self._thresholds:
@@ -124,14 +132,37 @@ class Deed:
     def get_threshold(self, operation: Operation):
         return self._thresholds[operation] if operation in self._thresholds else None
 
+    def votes_for(self, signers: Iterable[AddressLike]) -> int:
+        """
+        Determines the total voting weight of a group of signers
+
+        :param signers: The signers, duplicates and signers which are not signees of the deed are ignored
+        :return: The total voting weight
+        """
+        return sum(self._signees.get(signer, 0) for signer in set(Address(s) for s in signers))
+
+    def is_satisfied(self, operation: Operation, signers: Iterable[AddressLike]) -> bool:
+        """
+        Determines if a group of signers meets the threshold of an operation
+
+        :param operation: The operation
+        :param signers: The signers
+        :return: True if the operation is allowed, False if the threshold is not met or the operation is not present
+        """
+        threshold = self.get_threshold(operation)
+        return threshold is not None and self.votes_for(signers) >= threshold
+
     def validate(self):
         if not self.require_amend:
             logging.warning("Creating deed without amend threshold - future amendment will be impossible")
         elif Operation.amend not in self._thresholds:
             raise InvalidDeedError("The '{}' operation is mandatory but it not present".format(Operation.amend))
 
-        # cache the total voting weight
-        total_voting_weight = self.total_votes
+        # nothing has changed since the thresholds were last checked
+        if self._valid:
+            return
+
+        total_voting_weight = self._total_votes
 
         for operation, threshold in self._thresholds.items():
             if threshold > total_voting_weight:
@@ -139,6 +170,8 @@ class Deed:
                     "Threshold value {} for '{}' operation is greater than total voting weight {}".format(
                         threshold, operation, total_voting_weight))
 
+        self._valid = True
+
     def to_json(self):
         self.validate()
 
@@ -158,6 +191,7 @@ class Deed:
         signees = json_deed['signees']
         for signee, voting_weight in signees.items():
             deed._signees[Address(signee)] = int(voting_weight)
+        deed._total_votes = sum(deed._signees.values())
 
         thresholds = json_deed['thresholds']
         for operation, threshold in thresholds.items():
@@ -167,3 +201,169 @@ class Deed:
         deed.validate()
 
         return deed
+
+
+class SigningTally:
+    """
+    Keeps a running total of the votes behind a transaction as the signatures arrive, so that a coordinator can tell
+    when the threshold of an operation has been reached without recounting.
+    """
+
+    def __init__(self, deed: Deed, operation: Operation):
+        """
+        :param deed: The deed controlling the account
+        :param operation: The operation being authorised
+        """
+        threshold = deed.get_threshold(operation)
+        if threshold is None:
+            raise InvalidDeedError("The '{}' operation is not present in the deed".format(operation))
+
+        self._deed = deed
+        self._operation = operation
+        self._threshold = threshold
+        self._signed = set()
+        self._votes = 0
+
+    @property
+    def operation(self) -> Operation:
+        return self._operation
+
+    @property
+    def threshold(self) -> int:
+        return self._threshold
+
+    @property
+    def votes(self) -> int:
+        return self._votes
+
+    @property
+    def remaining(self) -> int:
+        """The number of votes still required to meet the threshold"""
+        return max(self._threshold - self._votes, 0)
+
+    @property
+    def satisfied(self) -> bool:
+        return self._votes >= self._threshold
+
+    @property
+    def signed(self) -> set:
+        return set(self._signed)
+
+    def add(self, signer: AddressLike) -> bool:
+        """
+        Records a signature
+
+        :param signer: The signer whose signature has been received
+        :return: True if the threshold has been met
+        """
+        signer = Address(signer)
+        if signer not in self._signed:
+            self._signed.add(signer)
+            self._votes += self._deed.get_signee(signer) or 0
+        return self.satisfied
+
+    def add_transaction(self, tx: 'Transaction') -> bool:
+        """
+        Records every signature present on a transaction
+
+        :param tx: The partially signed transaction
+        :return: True if the threshold has been met
+        """
+        for identity in tx.present_signers:
+            self.add(identity)
+        return self.satisfied
+
+    def merge(self, tx: 'Transaction', other_tx: 'Transaction') -> bool:
+        """
+        Merges the signatures of another copy of a transaction, see `Transaction.merge_signatures`, and records them
+
+        :param tx: The transaction being gathered
+        :param other_tx: The copy of the transaction signed by one or more signers
+        :return: True if the threshold has been met
+        """
+        if tx.merge_signatures(other_tx):
+            self.add_transaction(tx)
+        return self.satisfied
+
+
+class SigningPlanner:
+    """
+    Chooses which signees should sign a transaction for an operation, preferring the signees which have been the
+    fastest to respond in the past.
+
+    Every signatory listed in a transaction must sign it, so the signatories should be the smallest group of signees
+    which meets the threshold.
+    """
+
+    def __init__(self, deed: Deed, smoothing: float = 0.2):
+        """
+        :param deed: The deed controlling the account
+        :param smoothing: The weight of each new latency measurement in the running average
+        """
+        self._deed = deed
+        self._smoothing = float(smoothing)
+        self._latencies = {}  # type: Dict[Address, float]
+
+    def record_latency(self, signee: AddressLike, seconds: float):
+        """Records the time a signee took to return a signature"""
+        signee = Address(signee)
+        previous = self._latencies.get(signee)
+        if previous is None:
+            self._latencies[signee] = float(seconds)
+        else:
+            self._latencies[signee] = previous + self._smoothing * (float(seconds) - previous)
+
+    def latency(self, signee: AddressLike) -> Optional[float]:
+        """The average latency of a signee, or None if it is not known"""
+        return self._latencies.get(Address(signee))
+
+    def tally(self, operation: Operation) -> SigningTally:
+        return SigningTally(self._deed, operation)
+
+    def plan(self, operation: Operation, available: Optional[Iterable[AddressLike]] = None,
+             exclude: Iterable[AddressLike] = ()) -> List[Address]:
+        """
+        Chooses the signatories for a transaction
+
+        :param operation: The operation being authorised
+        :param available: The signees which can be asked to sign, every signee of the deed if not specified
+        :param exclude: Signees which must not be asked, e.g. because they failed to respond
+        :return: The signatories, fastest first
+        :raises: InvalidDeedError if the threshold can not be met by the available signees
+        """
+        threshold = self._deed.get_threshold(operation)
+        if threshold is None:
+            raise InvalidDeedError("The '{}' operation is not present in the deed".format(operation))
+
+        excluded = set(Address(signee) for signee in exclude)
+        if available is None:
+            candidates = self._deed.signees
+        else:
+            candidates = set(Address(signee) for signee in available)
+        candidates = [
+            (signee, self._deed.get_signee(signee)) for signee in candidates
+            if signee not in excluded and self._deed.get_signee(signee)
+        ]
+
+        # the fastest signees first, unknown signees after all the known ones and the heaviest votes first for ties
+        candidates.sort(key=lambda item: (self._latencies.get(item[0], float('inf')), -item[1], bytes(item[0])))
+
+        chosen = []
+        votes = 0
+        for signee, weight in candidates:
+            if votes >= threshold:
+                break
+            chosen.append((signee, weight))
+            votes += weight
+
+        if votes < threshold:
+            raise InvalidDeedError("Available signees have {} votes but '{}' requires {}".format(
+                votes, operation, threshold))
+
+        # the slowest signee bounds the time taken, so drop any faster signees whose votes are no longer required
+        for signee, weight in sorted(chosen[:-1], key=lambda item: item[1]):
+            if votes - weight >= threshold:
+                chosen.remove((signee, weight))
+                votes -= weight
+
+        return [signee for signee, _ in chosen]
@@ -0,0 +1,123 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+import ecdsa
+
+from fetchai.ledger.serialisation import sha256_hash
+from .address import Address
+from .entity import Entity, WEAK_PASSWORD_TEXT
+from .identity import Identity
+from .keystore import Keystore, KeystoreError
+
+# below this number of keys per worker it is cheaper to generate the keys in process
+MIN_KEYS_PER_WORKER = 64
+
+
+class GeneratedKey(namedtuple('GeneratedKey', ['private_key_bytes', 'public_key_bytes', 'address_bytes'])):
+    """The compact binary representation of a generated key pair"""
+    __slots__ = ()
+
+    @property
+    def address(self) -> Address:
+        return Address(self.address_bytes)
+
+    def to_entity(self) -> Entity:
+        return Entity(self.private_key_bytes)
+
+
+def _generate_keys(count: int) -> List[GeneratedKey]:
+    keys = []
+    for _ in range(count):
+        signing_key = ecdsa.SigningKey.generate(curve=Identity.curve, hashfunc=Identity.hash_function)
+        private_key_bytes = signing_key.to_string()
+        public_key_bytes = signing_key.get_verifying_key().to_string()
+        keys.append(GeneratedKey(private_key_bytes, public_key_bytes, sha256_hash(public_key_bytes)))
+
+    return keys
+
+
+def _encrypt_keys(items: List[Tuple[bytes, str]]) -> List[dict]:
+    # encrypting is by far the most expensive step, so it is also done in the workers
+    return [Entity(private_key_bytes)._to_json_object(password) for private_key_bytes, password in items]
+
+
+def _split(total: int, parts: int) -> List[int]:
+    base, remainder = divmod(total, parts)
+    return [base + (1 if n < remainder else 0) for n in range(parts) if base or n < remainder]
+
+
+def _map_chunks(func: Callable[[Any], list], chunks: list, workers: int) -> list:
+    if workers == 1:
+        return [item for chunk in chunks for item in func(chunk)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in executor.map(func, chunks):
+            results.extend(chunk)
+    return results
+
+
+def _keystore_password(keystore: Keystore, address: Address, password: Optional[str]) -> str:
+    expected = keystore._password_for(address)
+    if password is not None and password != expected:
+        raise KeystoreError('Password does not match the keystore password for {}'.format(address))
+    if not Entity.is_strong_password(expected):
+        raise KeystoreError(WEAK_PASSWORD_TEXT)
+    return expected
+
+
+def generate_entities(n: int, workers: Optional[int] = None, keystore: Optional[Keystore] = None,
+                      password: Optional[str] = None) -> List[GeneratedKey]:
+    """
+    Generates a large number of key pairs, spreading the work over a pool of processes
+
+    :param n: The number of keys to generate
+    :param workers: The number of worker processes, defaults to the number of CPUs
+    :param keystore: Optional keystore to which the keys are written, encrypted with the keystore password
+    :param password: Optional password which must match the keystore password of every key
+    :return: The list of generated keys
+    """
+    n = int(n)
+    if n < 0:
+        raise ValueError('Number of keys must not be negative')
+    if password is not None and keystore is None:
+        raise KeystoreError('A password can only be specified when writing keys to a keystore')
+
+    workers = int(workers or os.cpu_count() or 1)
+
+    # split the work into a few chunks per worker to even out the load
+    generate_workers = max(1, min(workers, n // MIN_KEYS_PER_WORKER))
+    keys = _map_chunks(_generate_keys, _split(n, generate_workers * 4), generate_workers)
+
+    if keystore is not None:
+        # every password is checked before anything is written, so that a mismatch leaves the keystore unchanged
+        items = [(key.private_key_bytes, _keystore_password(keystore, key.address, password)) for key in keys]
+
+        # every key is expensive to encrypt, so it is always worth distributing the work
+        encrypt_workers = max(1, min(workers, n))
+        key_objects = _map_chunks(_encrypt_keys, [[item] for item in items], encrypt_workers)
+
+        for key, key_object in zip(keys, key_objects):
+            keystore.add_encrypted(key.address, key_object)
+
+    return keys
@@ -0,0 +1,285 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .address import Address
+from .entity import Entity, WEAK_PASSWORD_TEXT
+from .identity import Identity
+
+AddressLike = Union[Address, Identity, str, bytes]
+PasswordSource = Union[str, Callable[[Address], str]]
+
+KEY_FILE_EXTENSION = '.key'
+
+
+class KeystoreError(RuntimeError):
+    pass
+
+
+class Keystore:
+    """
+    A directory of encrypted key files, indexed by address.
+
+    Key files use the same format as `Entity.dump` and are named `<address>.key`. Keys are decrypted lazily on first
+    use (or in bulk with `unlock`) on a pool of worker threads, and the unlocked entities are held in memory for `ttl`
+    seconds so that the expensive key derivation is only paid once per key.
+    """
+
+    def __init__(self, directory: str, password: PasswordSource, ttl: Optional[float] = None,
+                 workers: Optional[int] = None):
+        """
+        :param directory: The directory containing the key files
+        :param password: The password for all the keys, or a callable returning the password for a given address
+        :param ttl: The number of seconds an unlocked entity is kept in memory, None to keep it indefinitely
+        :param workers: The maximum number of keys that will be decrypted concurrently
+        """
+        self._directory = str(directory)
+        self._password = password
+        self._ttl = None if ttl is None else float(ttl)
+        self._workers = workers
+        self._executor = None  # type: Optional[ThreadPoolExecutor]
+        self._lock = threading.RLock()
+        self._paths = {}  # type: Dict[Address, str]
+        self._unlocked = {}  # type: Dict[Address, Tuple[Entity, Optional[float]]]
+        self._pending = {}  # type: Dict[Address, Future]
+
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, address: AddressLike):
+        try:
+            return Address(address) in self._paths
+        except ValueError:
+            return False
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def addresses(self) -> List[Address]:
+        with self._lock:
+            return list(self._paths.keys())
+
+    @property
+    def unlocked(self) -> List[Address]:
+        """The addresses whose entities are currently held in memory"""
+        with self._lock:
+            self._evict_expired()
+            return list(self._unlocked.keys())
+
+    def refresh(self):
+        """Rescans the keystore directory for key files"""
+        paths = {}
+        for filename in os.listdir(self._directory):
+            stem, ext = os.path.splitext(filename)
+            if ext != KEY_FILE_EXTENSION:
+                continue
+
+            try:
+                address = Address(stem)
+            except ValueError:
+                logging.warning('Ignoring key file with non address name: {}'.format(filename))
+                continue
+
+            paths[address] = os.path.join(self._directory, filename)
+
+        with self._lock:
+            self._paths = paths
+
+            # drop any entities whose key files have been removed
+            for address in list(self._unlocked.keys()):
+                if address not in self._paths:
+                    del self._unlocked[address]
+
+    def add(self, entity: Entity, password: Optional[str] = None) -> Address:
+        """
+        Encrypts and writes the entity to the keystore, keeping it unlocked in memory
+
+        :param entity: The entity to be stored
+        :param password: The password to use, defaults to the keystore password for the entity's address
+        :return: The address of the entity
+        """
+        address = Address(entity)
+        password = password or self._password_for(address)
+        if not Entity.is_strong_password(password):
+            raise KeystoreError(WEAK_PASSWORD_TEXT)
+
+        self.add_encrypted(address, entity._to_json_object(password))
+
+        with self._lock:
+            self._store(address, entity)
+
+        return address
+
+    def add_encrypted(self, address: AddressLike, key_object: dict):
+        """
+        Writes an already encrypted key object (in the `Entity.dump` format) to the keystore
+
+        :param address: The address of the key
+        :param key_object: The encrypted key object
+        """
+        address = Address(address)
+        path = os.path.join(self._directory, str(address) + KEY_FILE_EXTENSION)
+
+        # write to a temporary file first so that a partially written key is never indexed
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as key_file:
+            json.dump(key_object, key_file)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._paths[address] = path
+
+    def get(self, address: AddressLike) -> Entity:
+        """
+        Looks up the entity for an address, decrypting its key if it is not already unlocked
+
+        :param address: The address of the entity
+        :return: The unlocked entity
+        :raises: KeyError if the address is not present in the keystore
+        """
+        address = Address(address)
+
+        with self._lock:
+            entity = self._lookup(address)
+            if entity is not None:
+                return entity
+
+            future = self._submit(address)
+
+        return future.result()
+
+    def __getitem__(self, address: AddressLike) -> Entity:
+        return self.get(address)
+
+    def unlock(self, addresses: Optional[Iterable[AddressLike]] = None) -> List[Entity]:
+        """
+        Decrypts the keys for the specified addresses concurrently
+
+        :param addresses: The addresses to unlock, defaults to every key in the keystore
+        :return: The unlocked entities in the order of the input addresses
+        """
+        if addresses is None:
+            addresses = self.addresses
+        addresses = [Address(address) for address in addresses]
+
+        pending = []
+        with self._lock:
+            for address in addresses:
+                entity = self._lookup(address)
+                pending.append(self._submit(address) if entity is None else entity)
+
+        return [item.result() if isinstance(item, Future) else item for item in pending]
+
+    def lock(self, addresses: Optional[Iterable[AddressLike]] = None):
+        """
+        Removes unlocked entities from memory
+
+        :param addresses: The addresses to lock, defaults to every unlocked entity
+        """
+        with self._lock:
+            if addresses is None:
+                self._unlocked.clear()
+            else:
+                for address in addresses:
+                    self._unlocked.pop(Address(address), None)
+
+    def close(self):
+        """Locks all the keys and stops the worker pool"""
+        self.lock()
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _lookup(self, address: Address) -> Optional[Entity]:
+        if address not in self._paths:
+            raise KeyError('Address {} not present in keystore'.format(address))
+
+        entry = self._unlocked.get(address)
+        if entry is None:
+            return None
+
+        entity, expiry = entry
+        if expiry is not None and expiry <= time.monotonic():
+            del self._unlocked[address]
+            return None
+
+        return entity
+
+    def _submit(self, address: Address) -> Future:
+        # ensure that concurrent requests for the same key share the same decryption
+        future = self._pending.get(address)
+        if future is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers or os.cpu_count() or 1)
+
+            future = self._executor.submit(self._decrypt, address, self._paths[address])
+            self._pending[address] = future
+
+        return future
+
+    def _decrypt(self, address: Address, path: str) -> Entity:
+        try:
+            with open(path, 'r') as key_file:
+                entity = Entity.load(key_file, self._password_for(address))
+
+            if Address(entity) != address:
+                raise KeystoreError('Unable to unlock key for {}, invalid password or key file'.format(address))
+
+            with self._lock:
+                self._store(address, entity)
+
+            return entity
+
+        finally:
+            with self._lock:
+                self._pending.pop(address, None)
+
+    def _store(self, address: Address, entity: Entity):
+        expiry = None if self._ttl is None else time.monotonic() + self._ttl
+        self._unlocked[address] = (entity, expiry)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [address for address, (_, expiry) in self._unlocked.items() if expiry is not None and expiry <= now]
+        for address in expired:
+            del self._unlocked[address]
+
+    def _password_for(self, address: Address) -> str:
+        if callable(self._password):
+            return self._password(address)
+        return self._password
@@ -0,0 +1,56 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from .entity import Entity
+
+# below this number of messages per worker it is cheaper to sign the messages in process
+MIN_SIGNATURES_PER_WORKER = 64
+
+
+def _sign_messages(private_key_bytes: bytes, messages: Sequence[bytes]) -> List[bytes]:
+    entity = Entity(private_key_bytes)
+    return [entity.sign(message) for message in messages]
+
+
+def sign_many(entity: Entity, messages: Sequence[bytes], workers: Optional[int] = None) -> List[bytes]:
+    """
+    Signs a large number of messages, spreading the work over a pool of processes
+
+    :param entity: The entity signing the messages
+    :param messages: The messages to be signed
+    :param workers: The number of worker processes, defaults to the number of CPUs
+    :return: The list of signatures, in the same order as the messages
+    """
+    messages = list(messages)
+    workers = min(workers or os.cpu_count() or 1, len(messages) // MIN_SIGNATURES_PER_WORKER)
+    if workers <= 1:
+        return _sign_messages(entity.private_key_bytes, messages)
+
+    chunk_size = -(-len(messages) // workers)
+    chunks = [messages[n:n + chunk_size] for n in range(0, len(messages), chunk_size)]
+
+    signatures = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_signatures in executor.map(_sign_messages, [entity.private_key_bytes] * len(chunks), chunks):
+            signatures.extend(chunk_signatures)
+
+    return signatures
@@ -0,0 +1,546 @@
+import itertools
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Union
+
+import requests
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.api.common import ApiError, BULK_SUBMIT_SIZE
+from fetchai.ledger.serialisation import sha256_hash
+from fetchai.ledger.transaction import Transaction
+
+QUEUE_MAGIC = b'FTXQ'
+QUEUE_VERSION = 1
+
+# the types of the records in the log
+ENQUEUED = 1
+SUBMITTED = 2
+COMPLETED = 3
+
+# the states reported for transactions which have not completed
+QUEUED_STATUS = 'Queued'
+SUBMITTED_STATUS = 'Submitted to node'
+
+# the final state of transactions which the node rejected every time they were submitted
+REJECTED_STATUS = 'Rejected by node'
+
+# the default number of times a transaction is submitted before it is given up as rejected
+DEFAULT_MAX_ATTEMPTS = 5
+
+# the default number of completed transactions after which the log is rewritten
+DEFAULT_COMPACT_THRESHOLD = 10000
+
+# the number of completed statuses remembered in memory
+COMPLETED_HISTORY_SIZE = 10000
+
+_HEADER = struct.Struct('>4sB')
+_RECORD = struct.Struct('>BI')
+_CHECKSUM = struct.Struct('>I')
+
+
+class QueueError(Exception):
+    pass
+
+
+class OutboundQueue:
+    """
+    A durable queue of signed transactions waiting to be submitted to the ledger.
+
+    Every transaction is written to a log and synced to disk before it is submitted, and its progress (submitted,
+    completed) is recorded in the same log. Concurrent callers share fsyncs, so the cost of durability is spread
+    across all the transactions written while a sync is in progress. A background thread submits the queued
+    transactions in batches and polls the status of the submitted ones.
+
+    When the queue is reopened after a crash every transaction which had not completed is reconciled with the node:
+    those unknown to the node are submitted again. Resubmission is idempotent, since an encoded transaction always has
+    the same digest.
+    """
+
+    def __init__(self, path: str, api: LedgerApi, batch_size: int = BULK_SUBMIT_SIZE, poll_interval: float = 1.0,
+                 retry_interval: float = 1.0, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        :param path: The path of the log file
+        :param api: The API used to submit the transactions and to query their status
+        :param batch_size: The maximum number of transactions submitted in a single request
+        :param poll_interval: The number of seconds between queries of the status of submitted transactions
+        :param retry_interval: The number of seconds to wait after a failed submission
+        :param compact_threshold: The number of completed transactions after which the log is rewritten
+        :param max_attempts: The number of times the node may reject a transaction before it is given up
+        """
+        self._path = os.path.abspath(path)
+        self._api = api
+        self._batch_size = int(batch_size)
+        self._poll_interval = float(poll_interval)
+        self._retry_interval = float(retry_interval)
+        self._compact_threshold = int(compact_threshold)
+        self._max_attempts = max(int(max_attempts), 1)
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+        # the encoded transactions by digest, which are being written, waiting to be submitted or to complete
+        self._pending = OrderedDict()  # type: Dict[bytes, bytes]
+        self._queued = OrderedDict()  # type: Dict[bytes, bytes]
+        self._submitted = OrderedDict()  # type: Dict[bytes, bytes]
+        self._completed = OrderedDict()  # type: Dict[bytes, str]
+        self._num_completed_records = 0
+
+        # the number of times the node has rejected each queued transaction
+        self._attempts = {}  # type: Dict[bytes, int]
+
+        # the sequence numbers of the writes to the log and of the last write known to be on disk
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+
+        # the records written to the old log while it is being compacted, None when no compaction is in progress
+        self._compaction_tail = None  # type: Optional[List[bytes]]
+
+        self._thread = None  # type: Optional[threading.Thread]
+        self._running = False
+        self._reconciled = False
+
+        self._file = self._open()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        """The number of transactions which have not completed"""
+        with self._lock:
+            return len(self._pending) + len(self._queued) + len(self._submitted)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _open(self):
+        """Replays the log, discarding any partially written record at its end"""
+        fp = open(self._path, 'a+b')
+        fp.seek(0)
+        data = fp.read()
+
+        if not data:
+            fp.write(_HEADER.pack(QUEUE_MAGIC, QUEUE_VERSION))
+            fp.flush()
+            os.fsync(fp.fileno())
+            return fp
+
+        if len(data) < _HEADER.size or _HEADER.unpack_from(data) != (QUEUE_MAGIC, QUEUE_VERSION):
+            fp.close()
+            raise QueueError('Invalid or incompatible queue file: {}'.format(self._path))
+
+        offset = _HEADER.size
+        while offset + _RECORD.size <= len(data):
+            record_type, length = _RECORD.unpack_from(data, offset)
+            start = offset + _RECORD.size
+            end = start + length + _CHECKSUM.size
+            if end > len(data):
+                break
+
+            body = data[start:start + length]
+            checksum, = _CHECKSUM.unpack_from(data, start + length)
+            if checksum != zlib.crc32(bytes([record_type]) + body):
+                break
+
+            self._replay(record_type, body)
+            offset = end
+
+        if offset != len(data):
+            logging.warning('Discarding {} bytes of incomplete records from {}'.format(len(data) - offset, self._path))
+            fp.truncate(offset)
+            fp.flush()
+
+        return fp
+
+    def _replay(self, record_type: int, body: bytes):
+        if record_type == ENQUEUED:
+            digest = sha256_hash(body)
+            if digest not in self._submitted:
+                self._queued[digest] = body
+        elif record_type == SUBMITTED:
+            encoded = self._queued.pop(body, None)
+            if encoded is not None:
+                self._submitted[body] = encoded
+        elif record_type == COMPLETED:
+            digest, status = body[:32], body[32:].decode('ascii')
+            self._queued.pop(digest, None)
+            self._submitted.pop(digest, None)
+            self._remember(digest, status)
+            self._num_completed_records += 1
+        else:
+            raise QueueError('Unknown record type {} in {}'.format(record_type, self._path))
+
+    def _remember(self, digest: bytes, status: str):
+        self._completed[digest] = status
+        while len(self._completed) > COMPLETED_HISTORY_SIZE:
+            self._completed.popitem(last=False)
+
+    @staticmethod
+    def _encode_record(record_type: int, body: bytes) -> bytes:
+        checksum = zlib.crc32(bytes([record_type]) + body)
+        return _RECORD.pack(record_type, len(body)) + body + _CHECKSUM.pack(checksum)
+
+    def _write(self, records: List[bytes]) -> int:
+        """Writes records to the log, returns the sequence number of the write. The lock must be held"""
+        data = b''.join(records)
+        self._file.write(data)
+        if self._compaction_tail is not None:
+            self._compaction_tail.append(data)
+        self._written += 1
+        return self._written
+
+    def _wait_durable(self, sequence: int):
+        """Blocks until a write is on disk, sharing each fsync between every caller waiting at the time"""
+        with self._lock:
+            while self._synced < sequence:
+                if self._syncing:
+                    self._changed.wait()
+                    continue
+
+                # sync everything written so far on behalf of all the waiting callers
+                self._syncing = True
+                target = self._written
+                self._file.flush()
+                fd = self._file.fileno()
+
+                self._lock.release()
+                try:
+                    os.fsync(fd)
+                finally:
+                    self._lock.acquire()
+                    self._syncing = False
+                    self._changed.notify_all()
+
+                self._synced = max(self._synced, target)
+
+    def enqueue(self, tx: Union[Transaction, bytes]) -> str:
+        """
+        Adds a signed transaction to the queue, returning once it has been written to disk
+
+        :param tx: The complete transaction, or its encoding
+        :return: The hex encoded digest of the transaction
+        """
+        return self.enqueue_many([tx])[0]
+
+    def enqueue_many(self, txs: Iterable[Union[Transaction, bytes]]) -> List[str]:
+        """
+        Adds a number of signed transactions to the queue with a single write, returning once they are on disk
+
+        :param txs: The complete transactions, or their encodings
+        :return: The hex encoded digests of the transactions
+        """
+        encoded_txs = []
+        for tx in txs:
+            encoded = tx.encode() if isinstance(tx, Transaction) else bytes(tx)
+            if encoded is None:
+                raise QueueError('Unable to queue an incomplete transaction')
+            encoded_txs.append(encoded)
+
+        digests = [sha256_hash(encoded) for encoded in encoded_txs]
+
+        with self._lock:
+            records = []
+            for digest, encoded in zip(digests, encoded_txs):
+                # queueing the same transaction again has no effect
+                if digest in self._pending or digest in self._queued or digest in self._submitted:
+                    continue
+                records.append(self._encode_record(ENQUEUED, encoded))
+
+                # the transactions are tracked from the moment they are written, so that compaction keeps them
+                self._pending[digest] = encoded
+
+            sequence = self._write(records) if records else self._written
+
+        self._wait_durable(sequence)
+
+        # only hand the transactions to the sender once they are durable
+        with self._lock:
+            for digest in digests:
+                encoded = self._pending.pop(digest, None)
+                if encoded is not None:
+                    self._completed.pop(digest, None)
+                    self._queued[digest] = encoded
+            self._changed.notify_all()
+
+        return [digest.hex() for digest in digests]
+
+    def status(self, digest: str) -> Optional[str]:
+        """
+        Determines the progress of a transaction
+
+        :param digest: The hex encoded digest of the transaction
+        :return: QUEUED_STATUS, SUBMITTED_STATUS, the final status reported by the node, or None if it is not known
+        """
+        digest = bytes.fromhex(digest[2:] if digest.startswith('0x') else digest)
+        with self._lock:
+            if digest in self._pending or digest in self._queued:
+                return QUEUED_STATUS
+            if digest in self._submitted:
+                return SUBMITTED_STATUS
+            return self._completed.get(digest)
+
+    def wait(self, digests: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for transactions to complete
+
+        :param digests: The hex encoded digests to wait for, every queued transaction if not specified
+        :param timeout: The maximum number of seconds to wait
+        :return: True if the transactions completed within the timeout
+        """
+        if digests is not None:
+            digests = [bytes.fromhex(d[2:] if d.startswith('0x') else d) for d in digests]
+
+        def done():
+            if digests is None:
+                return not self._pending and not self._queued and not self._submitted
+            return not any(d in self._pending or d in self._queued or d in self._submitted for d in digests)
+
+        with self._lock:
+            return self._changed.wait_for(done, timeout)
+
+    def reconcile(self):
+        """
+        Determines the state of every transaction which has not completed from the node. Transactions which the node
+        does not know are queued for submission again, and those which have finished are completed.
+        """
+        with self._lock:
+            unfinished = list(self._queued.items()) + list(self._submitted.items())
+
+        if not unfinished:
+            return
+
+        statuses = self._api.tx.statuses([digest.hex() for digest, _ in unfinished])
+
+        with self._lock:
+            completed = []
+            for (digest, encoded), status in zip(unfinished, statuses):
+                if isinstance(status, Exception):
+                    logging.warning('Unable to determine status of {}: {}'.format(digest.hex(), status))
+                    continue
+
+                if status.status == 'Unknown':
+                    self._submitted.pop(digest, None)
+                    self._queued[digest] = encoded
+                elif status.non_terminal:
+                    if self._queued.pop(digest, None) is not None:
+                        self._submitted[digest] = encoded
+                else:
+                    completed.append((digest, status.status))
+
+            self._complete(completed)
+            self._changed.notify_all()
+
+        self._maybe_compact()
+
+    def _complete(self, completed: List[tuple]):
+        """Records that transactions have completed. The lock must be held"""
+        if not completed:
+            return
+
+        self._write([self._encode_record(COMPLETED, digest + status.encode('ascii')) for digest, status in completed])
+        for digest, status in completed:
+            self._queued.pop(digest, None)
+            self._submitted.pop(digest, None)
+            self._attempts.pop(digest, None)
+            self._remember(digest, status)
+
+        self._num_completed_records += len(completed)
+
+    def _maybe_compact(self):
+        """Compacts the log once enough transactions have completed. The lock must not be held"""
+        with self._lock:
+            due = self._num_completed_records >= self._compact_threshold and self._compaction_tail is None
+        if due:
+            self._compact()
+
+    def _compact(self):
+        """
+        Rewrites the log with only the transactions which have not completed. The new log is written and synced
+        without the lock held, so that enqueueing is not blocked. The records written to the old log in the meantime
+        are copied across before the new log replaces it.
+        """
+        with self._lock:
+            if self._compaction_tail is not None:
+                return
+            self._compaction_tail = []
+
+            records = [_HEADER.pack(QUEUE_MAGIC, QUEUE_VERSION)]
+            for encoded in self._submitted.values():
+                records.append(self._encode_record(ENQUEUED, encoded))
+            for digest in self._submitted.keys():
+                records.append(self._encode_record(SUBMITTED, digest))
+            for encoded in itertools.chain(self._queued.values(), self._pending.values()):
+                records.append(self._encode_record(ENQUEUED, encoded))
+            num_compacted = self._num_completed_records
+
+        tmp_path = '{}.{}.tmp'.format(self._path, os.getpid())
+        fp = open(tmp_path, 'wb')
+        try:
+            while True:
+                fp.write(b''.join(records))
+                fp.flush()
+                os.fsync(fp.fileno())
+
+                with self._lock:
+                    # wait for any sync in progress on the old file, the records it covers are already in the tail
+                    while self._syncing:
+                        self._changed.wait()
+
+                    records, self._compaction_tail = self._compaction_tail, []
+                    if records:
+                        continue
+
+                    # everything written to the old log is now on disk in the new one
+                    self._file.close()
+                    os.replace(tmp_path, self._path)
+                    self._file = fp
+                    self._synced = self._written
+                    self._num_completed_records -= num_compacted
+                    self._compaction_tail = None
+                    return
+        except BaseException:
+            fp.close()
+            os.unlink(tmp_path)
+            with self._lock:
+                self._compaction_tail = None
+            raise
+
+    def start(self):
+        """Reconciles the queue with the node and starts submitting transactions in the background"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+
+        if not self._reconciled:
+            self.reconcile()
+            self._reconciled = True
+
+        self._thread = threading.Thread(target=self._run, name='OutboundQueue', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the background sender, the remaining transactions stay in the queue"""
+        with self._lock:
+            self._running = False
+            self._changed.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+
+    def _run(self):
+        next_poll = time.monotonic() + self._poll_interval
+        while True:
+            with self._lock:
+                if not self._running:
+                    return
+                batch = list(itertools.islice(self._queued.items(), self._batch_size))
+
+            # submitted transactions are still polled while submission is failing
+            backoff = bool(batch) and not self._submit(batch)
+
+            if time.monotonic() >= next_poll:
+                self._poll()
+                next_poll = time.monotonic() + self._poll_interval
+
+            with self._lock:
+                if not self._running:
+                    continue
+                if backoff:
+                    self._changed.wait(min(self._retry_interval, max(next_poll - time.monotonic(), 0.0)))
+                elif not self._queued:
+                    self._changed.wait(max(next_poll - time.monotonic(), 0.0))
+
+    def _submit(self, batch: List[tuple]) -> bool:
+        """
+        Submits a batch of queued transactions. When the node rejects the batch it is split in half and each half is
+        submitted separately, until the rejected transactions have been found. A transaction which is rejected on its
+        own is given up once it has been rejected `max_attempts` times.
+
+        :return: True if any progress was made
+        """
+        try:
+            self._api.tokens.submit_signed_txs([encoded for _, encoded in batch], chunk_size=self._batch_size)
+        except (ApiError, ValueError) as ex:
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                submitted_first = self._submit(batch[:middle])
+                submitted_second = self._submit(batch[middle:])
+                return submitted_first or submitted_second
+
+            digest, _ = batch[0]
+            logging.warning('Node rejected queued transaction {}: {}'.format(digest.hex(), ex))
+            with self._lock:
+                attempts = self._attempts.get(digest, 0) + 1
+                if attempts < self._max_attempts:
+                    self._attempts[digest] = attempts
+                    return False
+                if digest in self._queued:
+                    self._complete([(digest, REJECTED_STATUS)])
+                    self._changed.notify_all()
+            self._maybe_compact()
+            return True
+        except (requests.RequestException, OSError) as ex:
+            # the node can not be reached, so the transactions are not at fault
+            logging.warning('Failed to submit {} queued transactions: {}'.format(len(batch), ex))
+            return False
+
+        # losing these records in a crash only means the transactions are reconciled with the node on restart
+        with self._lock:
+            records = []
+            for digest, encoded in batch:
+                self._attempts.pop(digest, None)
+                if self._queued.pop(digest, None) is not None:
+                    self._submitted[digest] = encoded
+                    records.append(self._encode_record(SUBMITTED, digest))
+            if records:
+                self._write(records)
+            self._changed.notify_all()
+
+        return True
+
+    def _poll(self):
+        with self._lock:
+            digests = list(self._submitted.keys())
+
+        if not digests:
+            return
+
+        statuses = self._api.tx.statuses([digest.hex() for digest in digests])
+
+        with self._lock:
+            completed = []
+            for digest, status in zip(digests, statuses):
+                if isinstance(status, Exception) or digest not in self._submitted:
+                    continue
+                if status.status == 'Unknown':
+                    # the node has lost the transaction, submitting it again is harmless
+                    self._queued[digest] = self._submitted.pop(digest)
+                elif not status.non_terminal:
+                    completed.append((digest, status.status))
+
+            self._complete(completed)
+            self._changed.notify_all()
+
+        self._maybe_compact()
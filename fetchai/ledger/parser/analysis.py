@@ -0,0 +1,363 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from fetchai.ledger.bitvector import BitVector
+from fetchai.ledger.parser.etch_parser import EtchParser, EtchParserError, Parameter, PersistentGlobal, \
+    StringConcat, StringLiteral, UnparsableAddress, UseWildcardShardMask, load_grammar, PARSE_CACHE_SIZE, _LRUCache
+from fetchai.ledger.serialisation.shardmask import ShardMask
+
+# the version of the analysis format, must be incremented when the analysis of a contract would change
+ANALYSIS_VERSION = 2
+
+# maps the recorded analysis errors to the exceptions raised by the parser
+_ERRORS = {
+    'wildcard': UseWildcardShardMask,
+    'parse': EtchParserError,
+    'unparsable': UnparsableAddress,
+    'invalid': AssertionError,
+}
+
+
+# recently analysed contracts, shared by all contracts with the same source
+_analysis_cache = _LRUCache(PARSE_CACHE_SIZE)
+
+
+@functools.lru_cache(maxsize=None)
+def parser_version() -> str:
+    """The version of the parser, which changes with the analysis format or the Etch grammar"""
+    grammar_digest = hashlib.sha256(load_grammar().encode('ascii')).hexdigest()
+    return '{}-{}'.format(ANALYSIS_VERSION, grammar_digest[:16])
+
+
+class _Placeholder:
+    """Stands in for a parameter value while recording a used globals template"""
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+def _template_part(item) -> list:
+    if isinstance(item, Parameter) and isinstance(item.value, _Placeholder):
+        return ['param', item.value.index]
+    elif isinstance(item, StringLiteral):
+        return ['literal', item.value]
+    raise ValueError('Unable to build template for shard use: {}'.format(item))
+
+
+def _used_globals_template(parser: EtchParser, entry_point: str) -> Optional[dict]:
+    try:
+        num_parameters = len(parser.parameters(entry_point))
+    except EtchParserError:
+        num_parameters = 0
+
+    template = {'parameters': num_parameters}
+
+    try:
+        usages = parser.globals_used(entry_point, [_Placeholder(i) for i in range(num_parameters)])
+    except UseWildcardShardMask as ex:
+        template['error'], template['message'] = 'wildcard', str(ex)
+        return template
+    except EtchParserError as ex:
+        template['error'], template['message'] = 'parse', str(ex)
+        return template
+    except UnparsableAddress as ex:
+        template['error'], template['message'] = 'unparsable', str(ex)
+        return template
+    except AssertionError as ex:
+        template['error'], template['message'] = 'invalid', str(ex)
+        return template
+    except Exception as ex:
+        # leave anything unexpected to the parser
+        logging.debug('Unable to analyse entry point {}: {}'.format(entry_point, ex))
+        return None
+
+    used_globals = []
+    for usage in usages:
+        if isinstance(usage, str):
+            used_globals.append(usage)
+            continue
+
+        # sharded globals are (name, shard use) pairs, state named by a parameter is a plain shard use
+        name, shard_use = usage if isinstance(usage, tuple) else (None, usage)
+        items = shard_use.items if isinstance(shard_use, StringConcat) else [shard_use]
+        try:
+            parts = [_template_part(item) for item in items]
+        except ValueError as ex:
+            logging.debug('Unable to analyse entry point {}: {}'.format(entry_point, ex))
+            return None
+
+        used_globals.append({
+            'global': name,
+            'concat': isinstance(shard_use, StringConcat),
+            'parts': parts,
+        })
+
+    template['globals'] = used_globals
+    return template
+
+
+class ContractAnalysis:
+    """The results of parsing a contract which are required to build its shard masks"""
+
+    def __init__(self, digest: str, entry_points: Dict[str, List[str]], globals_declared: Dict[str, dict],
+                 global_using_subfunctions: List[str], used_globals: Dict[str, dict]):
+        self._digest = digest
+        self._entry_points = entry_points
+        self._globals_declared = globals_declared
+        self._global_using_subfunctions = global_using_subfunctions
+        self._used_globals = used_globals
+
+    @staticmethod
+    def from_parser(parser: EtchParser, digest: str) -> 'ContractAnalysis':
+        """
+        Analyses a contract using a parser which has already parsed its source
+
+        :param parser: The parser
+        :param digest: The hex encoded digest of the contract source
+        :return: The analysis of the contract
+        """
+        entry_points = parser.entry_points()
+
+        try:
+            globals_declared = {
+                name: {'sharded': pg.is_sharded, 'type': pg.gtype}
+                for name, pg in parser.globals_declared().items()
+            }
+        except (EtchParserError, AssertionError):
+            globals_declared = {}
+
+        try:
+            global_using_subfunctions = sorted(parser.global_using_subfunctions())
+        except EtchParserError:
+            global_using_subfunctions = []
+
+        used_globals = {}
+        for names in entry_points.values():
+            for name in names:
+                template = _used_globals_template(parser, name)
+                if template is not None:
+                    used_globals[name] = template
+
+        return ContractAnalysis(digest, entry_points, globals_declared, global_using_subfunctions, used_globals)
+
+    @staticmethod
+    def from_source(source: str, digest: str) -> 'ContractAnalysis':
+        """
+        Analyses a contract, reusing the analysis of a recently analysed contract with the same digest
+
+        :param source: The contract source
+        :param digest: The hex encoded digest of the contract source
+        :return: The analysis of the contract
+        """
+        analysis = _analysis_cache.get(digest)
+        if analysis is None:
+            analysis = ContractAnalysis.from_parser(EtchParser(source, digest=digest), digest)
+            _analysis_cache.put(digest, analysis)
+        return analysis
+
+    @staticmethod
+    def from_json(obj: dict) -> 'ContractAnalysis':
+        return ContractAnalysis(obj['digest'], obj['entry_points'], obj['globals_declared'],
+                                obj['global_using_subfunctions'], obj['used_globals'])
+
+    def to_json(self) -> dict:
+        return {
+            'version': parser_version(),
+            'digest': self._digest,
+            'entry_points': self._entry_points,
+            'globals_declared': self._globals_declared,
+            'global_using_subfunctions': self._global_using_subfunctions,
+            'used_globals': self._used_globals,
+        }
+
+    @property
+    def digest(self) -> str:
+        return self._digest
+
+    def entry_points(self) -> Dict[str, List[str]]:
+        return {ep: list(names) for ep, names in self._entry_points.items()}
+
+    def globals_declared(self) -> Dict[str, PersistentGlobal]:
+        return {
+            name: PersistentGlobal(name, info['sharded'], info['type'])
+            for name, info in self._globals_declared.items()
+        }
+
+    def global_using_subfunctions(self) -> Dict[str, list]:
+        return {name: [] for name in self._global_using_subfunctions}
+
+    def has_used_globals(self, entry_point: str) -> bool:
+        """True if the used globals of the entry point can be resolved without the parser"""
+        return entry_point in self._used_globals
+
+    def used_globals_to_addresses(self, entry_point: str, parameters: list) -> List[str]:
+        """Equivalent to `EtchParser.used_globals_to_addresses` using the recorded template for the entry point"""
+        return self.shard_mask_template(entry_point).resources(parameters)
+
+    def shard_mask_template(self, entry_point: str, prefix: str = '',
+                            base_resources: Optional[List[str]] = None) -> 'ShardMaskTemplate':
+        """
+        Compiles the used globals template of an entry point
+
+        :param entry_point: The name of the entry point
+        :param prefix: The prefix added to the name of each used global to form its resource address
+        :param base_resources: The resource addresses used by every call of the entry point
+        :return: The compiled template
+        """
+        template = self._used_globals[entry_point]
+        items = list(base_resources or [])
+
+        error = template.get('error')
+        if error is not None:
+            return ShardMaskTemplate(template['parameters'], items, (_ERRORS[error], template['message']),
+                                     check_parameters_first=error not in ('wildcard', 'parse'))
+
+        for usage in template['globals']:
+            if isinstance(usage, str):
+                items.append(prefix + usage)
+                continue
+
+            if usage['global'] is None:
+                resource_prefix = prefix
+            else:
+                resource_prefix = '{}{}.'.format(prefix, usage['global'])
+            parts = [value if kind == 'param' else str(value) for kind, value in usage['parts']]
+            if all(isinstance(part, str) for part in parts):
+                # only literals, this resource is the same for every call
+                items.append(resource_prefix + ''.join(parts))
+            else:
+                items.append((resource_prefix, usage['concat'], parts))
+
+        return ShardMaskTemplate(template['parameters'], items)
+
+
+class ShardMaskTemplate:
+    """
+    The resources used by a call of an entry point, with the fixed resource addresses precomputed and the indices of
+    the parameters which form the sharded keys recorded
+    """
+
+    def __init__(self, num_parameters: Optional[int], items: list, error: Optional[Tuple[type, str]] = None,
+                 check_parameters_first: bool = True):
+        """
+        :param num_parameters: The number of parameters of the entry point, None to ignore the parameters
+        :param items: The resource addresses, either fixed strings or (prefix, concat, parts) tuples where each part
+            is a literal string or a parameter index
+        :param error: The exception type and message raised for every call, when the resources can not be determined
+        :param check_parameters_first: Validate the parameters before raising the error
+        """
+        self._num_parameters = num_parameters
+        self._items = items
+        self._error = error
+        self._check_parameters_first = check_parameters_first
+
+    def resources(self, parameters: list) -> List[str]:
+        """
+        Determines the resource addresses used by a call
+
+        :param parameters: The values of the parameters of the call
+        :return: The list of resource addresses
+        """
+        if self._error is not None and not self._check_parameters_first:
+            self._raise_error()
+
+        if self._num_parameters is not None:
+            assert isinstance(parameters, list), "Expected parameter values as a list"
+            if not parameters:
+                parameters = [None] * self._num_parameters
+            assert len(parameters) == self._num_parameters, \
+                "Found {} parameters, but received {} parameter values".format(self._num_parameters, len(parameters))
+
+        if self._error is not None:
+            self._raise_error()
+
+        resources = []
+        for item in self._items:
+            if isinstance(item, str):
+                resources.append(item)
+            else:
+                resource_prefix, concat, parts = item
+                values = [part if isinstance(part, str) else parameters[part] for part in parts]
+                resources.append(resource_prefix + (''.join(values) if concat else '{}'.format(values[0])))
+
+        return resources
+
+    def _raise_error(self):
+        error_type, message = self._error
+        raise error_type(message)
+
+    def build(self, num_lanes: int, parameters: list) -> BitVector:
+        """
+        Builds the shard mask for a call
+
+        :param num_lanes: The number of lanes that are being targeted
+        :param parameters: The values of the parameters of the call
+        :return: The shard mask
+        """
+        return ShardMask.resources_to_shard_mask(self.resources(parameters), num_lanes)
+
+
+class AnalysisCache:
+    """An on-disk cache of contract analysis results, keyed by the contract digest and the parser version"""
+
+    def __init__(self, directory: str):
+        self._directory = os.path.abspath(directory)
+        os.makedirs(self._directory, exist_ok=True)
+        self._version = parser_version()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self._directory, '{}.{}.json'.format(digest, self._version))
+
+    def get(self, digest: str) -> Optional[ContractAnalysis]:
+        """
+        Loads the analysis of a contract
+
+        :param digest: The hex encoded digest of the contract source
+        :return: The analysis or None if it is not present in the cache
+        """
+        try:
+            with open(self._path(digest), 'r') as fp:
+                obj = json.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as ex:
+            logging.warning('Unable to read cached analysis for {}: {}'.format(digest, ex))
+            return None
+
+        if obj.get('version') != self._version or obj.get('digest') != digest:
+            return None
+
+        return ContractAnalysis.from_json(obj)
+
+    def put(self, analysis: ContractAnalysis):
+        """Stores the analysis of a contract, replacing any previous entry"""
+        path = self._path(analysis.digest)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            with open(tmp_path, 'w') as fp:
+                json.dump(analysis.to_json(), fp)
+            os.replace(tmp_path, path)
+        except OSError as ex:
+            logging.warning('Unable to cache analysis for {}: {}'.format(analysis.digest, ex))
+
+    def get_or_analyse(self, source: str, digest: str) -> ContractAnalysis:
+        """
+        Loads the analysis of a contract, parsing and analysing the source if it is not in the cache
+
+        :param source: The contract source
+        :param digest: The hex encoded digest of the contract source
+        :return: The analysis of the contract
+        """
+        analysis = self.get(digest)
+        if analysis is None:
+            analysis = ContractAnalysis.from_source(source, digest)
+            self.put(analysis)
+        return analysis
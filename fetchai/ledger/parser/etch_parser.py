@@ -1,5 +1,9 @@
+import hashlib
 import logging
 import re
+import threading
+from collections import OrderedDict
+from typing import Optional
 
 from lark import Lark, tree, lexer, ParseError, GrammarError, LexError, UnexpectedInput, UnexpectedCharacters, \
     UnexpectedToken
@@ -7,6 +11,104 @@ from lark.exceptions import LarkError, VisitError
 from pkg_resources import resource_string
 
 
+# the types through which contracts access state by name
+STATE_TYPES = ('State', 'ShardedState')
+
+# the number of contracts for which parse results are kept in memory
+PARSE_CACHE_SIZE = 128
+
+
+class _LRUCache:
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class _ParseFailure:
+    """A cached parse failure, only the type and message are kept so that the exception and its frames are not"""
+
+    def __init__(self, error: Exception):
+        self.error_type = type(error)
+        self.message = str(error)
+
+
+_grammar = None
+_parsers = {}
+_parsers_lock = threading.Lock()
+_parse_cache = _LRUCache(PARSE_CACHE_SIZE)
+_entry_point_cache = _LRUCache(PARSE_CACHE_SIZE)
+
+
+def load_grammar() -> str:
+    """Returns the Etch grammar, loaded on first use"""
+    global _grammar
+    if _grammar is None:
+        _grammar = resource_string(__name__, 'etch.grammar').decode('ascii')
+    return _grammar
+
+
+def get_parser(lalr: bool = False) -> Lark:
+    """
+    Returns the process wide Etch parser, which is built on first use
+
+    :param lalr: Request the faster LALR parser, falls back to the Earley parser if the grammar does not support it
+    :return: The parser
+    """
+    mode = 'lalr' if lalr else 'earley'
+    parser = _parsers.get(mode)
+    if parser is not None:
+        return parser
+
+    with _parsers_lock:
+        if mode not in _parsers:
+            parser = None
+            if lalr:
+                try:
+                    parser = Lark(load_grammar(), parser='lalr', propagate_positions=True)
+                except GrammarError as ex:
+                    logging.debug('Etch grammar is not LALR compatible, using Earley parser: {}'.format(ex))
+
+            if parser is None:
+                parser = _parsers.get('earley') or Lark(load_grammar(), propagate_positions=True)
+                _parsers['earley'] = parser
+
+            _parsers[mode] = parser
+
+        return _parsers[mode]
+
+
+def source_digest(etch_code: str) -> str:
+    """Computes the hex encoded SHA-256 digest of the contract source, matching `Contract.digest`"""
+    return hashlib.sha256(etch_code.encode('utf-8')).hexdigest()
+
+
+def clear_cache():
+    """Discards all the cached parse results"""
+    _parse_cache.clear()
+    _entry_point_cache.clear()
+
+
 # Utility function for checking if a node exists within a (sub)tree
 def tree_contains(tree_root: tree.Tree, tree_node: tree.Tree):
     return tree_node in tree_root.iter_subtrees_topdown()
@@ -186,16 +288,189 @@ class EtchParserError(Exception):
     pass
 
 
+class _Unresolved(ShardUse):
+    """A function parameter whose value can not be determined from the call site"""
+    pass
+
+
+def _callee_name(node: tree.Tree) -> Optional[str]:
+    """Returns the name of a called function, if it is a plain name rather than an expression"""
+    callee = node.children[0]
+    if isinstance(callee, tree.Tree) and len(callee.children) == 1 and isinstance(callee.children[0], tree.Tree) \
+            and callee.children[0].data == 'name' and isinstance(callee.children[0].children[0], lexer.Token):
+        return callee.children[0].children[0].value
+    return None
+
+
+def _bind_argument(node, bindings: dict) -> ShardUse:
+    """Resolves the value of a call argument in terms of the caller parameters and string literals"""
+    if isinstance(node, tree.Tree) and node.data == 'expression' and len(node.children) == 1:
+        child = node.children[0]
+        if isinstance(child, lexer.Token) and child.type == 'STRING_LITERAL':
+            return StringLiteral(child.value)
+        if isinstance(child, tree.Tree) and child.data == 'name' and isinstance(child.children[0], lexer.Token):
+            return bindings.get(child.children[0].value, _Unresolved())
+    return _Unresolved()
+
+
+def _state_construction(node: tree.Tree):
+    """Returns the (type name, input block) of a State<T>(...) construction, or None"""
+    if node.data == 'expression' and len(node.children) == 2 and isinstance(node.children[0], tree.Tree) \
+            and node.children[0].data == 'template_type' and isinstance(node.children[1], tree.Tree) \
+            and node.children[1].data == 'input_block':
+        type_name = node.children[0].children[0]
+        if isinstance(type_name, lexer.Token) and type_name.value in STATE_TYPES:
+            return type_name.value, node.children[1]
+    return None
+
+
+def _is_unresolved(use: ShardUse) -> bool:
+    if isinstance(use, StringConcat):
+        return any(_is_unresolved(item) for item in use.items)
+    return isinstance(use, _Unresolved)
+
+
+class _UseAnalysis:
+    """Collects the globals and state used by a function and all the user functions that it calls"""
+
+    def __init__(self, persistent_globals: dict, functions: dict):
+        self.persistent_globals = persistent_globals
+        self.functions = functions
+        self.used = []
+        self.use_any = False
+        self._visited = set()
+
+    def visit(self, function: Function, bindings: dict):
+        key = (function.name, tuple(sorted((name, self._binding_key(use)) for name, use in bindings.items())))
+        if key in self._visited:
+            return
+        self._visited.add(key)
+
+        if function.code_block is None:
+            return
+
+        self._check_state_usage(function)
+        self._walk(function.code_block, bindings, member=False)
+
+    @staticmethod
+    def _binding_key(use: ShardUse):
+        if isinstance(use, StringLiteral):
+            return 'literal', use.value
+        return 'object', id(use)
+
+    def _add(self, usage):
+        if usage not in self.used:
+            self.used.append(usage)
+
+    def _check_state_usage(self, function: Function):
+        # every reference to State must be a construction that can be analysed
+        references = len(list(function.code_block.scan_values(
+            lambda t: isinstance(t, lexer.Token) and t.value in STATE_TYPES)))
+        constructions = sum(1 for node in function.code_block.iter_subtrees() if _state_construction(node))
+        if references != constructions:
+            raise UseWildcardShardMask("Unrecognised State usage in {}".format(function.name))
+
+    def _walk(self, node, bindings: dict, member: bool):
+        if not isinstance(node, tree.Tree):
+            return
+
+        if node.data == 'use_global':
+            self._use_global(node, bindings)
+            return
+
+        state = _state_construction(node)
+        if state is not None:
+            self._use_state(state[0], state[1], bindings)
+            return
+
+        if node.data == 'function_call':
+            name = _callee_name(node)
+            if not member and name in self.functions:
+                self._call(self.functions[name], node.children[1], bindings)
+            self._walk(node.children[1], bindings, member=False)
+            return
+
+        for index, child in enumerate(node.children):
+            if node.data == 'dot_expansion':
+                # calls after the first element of a dot expansion are methods, not user functions
+                self._walk(child, bindings, member=index > 0)
+            elif node.data == 'expression':
+                self._walk(child, bindings, member=member)
+            else:
+                self._walk(child, bindings, member=False)
+
+    def _call(self, function: Function, input_block: tree.Tree, bindings: dict):
+        arguments = [_bind_argument(arg, bindings) for arg in input_block.children]
+        if len(arguments) != len(function.parameters):
+            raise UnparsableAddress("Call to {} with {} arguments, expected {}".format(
+                function.name, len(arguments), len(function.parameters)))
+
+        self.visit(function, {p.name: arg for p, arg in zip(function.parameters, arguments)})
+
+    def _use_state(self, type_name: str, input_block: tree.Tree, bindings: dict):
+        if type_name != 'State' or len(input_block.children) != 1:
+            raise UseWildcardShardMask("{} usage can not be resolved".format(type_name))
+
+        key = _bind_argument(input_block.children[0], bindings)
+        if isinstance(key, _Unresolved):
+            raise UseWildcardShardMask("State name can not be resolved")
+        elif isinstance(key, StringLiteral):
+            self._add(key.value)
+        else:
+            self._add(key)
+
+    def _use_global(self, gu: tree.Tree, bindings: dict):
+        assert isinstance(gu.children[0], lexer.Token) and gu.children[0].type == 'NAME', \
+            "Could not identify global name"
+        g_name = gu.children[0].value
+        persistent_globals = self.persistent_globals
+
+        # Handle use any
+        if g_name == 'any' and len(gu.children) == 1:
+            # Check if we have any sharded globals
+            if any(pg for pg in persistent_globals.values() if pg.is_sharded):
+                raise UseWildcardShardMask("use any + persistent sharded global")
+            self.use_any = True
+            return
+
+        assert g_name in persistent_globals, "Attempting to use undeclared global : {}".format(gu)
+
+        # Handle non-sharded global
+        if not persistent_globals[g_name].is_sharded:
+            assert len(gu.children) == 1, "Sharded use statement for non-sharded global: " + g_name
+            self._add(g_name)
+
+        # Handle sharded global
+        else:
+            # TODO: assert that any parameters used in shard access are never the target of an assignment
+            assert len(gu.children) > 1, "Non-sharded use statement for sharded global: " + g_name
+            for sh in gu.find_data('use_shard_item'):
+                try:
+                    use = ShardUse.from_tree(sh, bindings)
+                except KeyError as ex:
+                    raise UnparsableAddress("Shard key is not a parameter: {}".format(ex))
+
+                if _is_unresolved(use):
+                    raise UnparsableAddress("Shard key of {} can not be resolved".format(g_name))
+                self._add((g_name, use))
+
+
 class EtchParser:
-    def __init__(self, etch_code=None):
-        # Load grammar
-        self.grammar = resource_string(__name__, 'etch.grammar').decode('ascii')
-        self.parser = Lark(self.grammar, propagate_positions=True)
+    def __init__(self, etch_code=None, digest: str = None, lalr: bool = False):
+        """
+        :param etch_code: The optional source to be parsed
+        :param digest: The SHA-256 digest of the source, computed when not provided
+        :param lalr: Use the LALR parser if the grammar supports it
+        """
+        # Grammar and parser are shared by all instances
+        self.grammar = load_grammar()
+        self.parser = get_parser(lalr)
 
         self._parsed_tree = None
+        self._digest = None
         self.etch_code = None
         if etch_code:
-            self.parse(etch_code)
+            self.parse(etch_code, digest)
 
     @property
     def parsed_tree(self):
@@ -204,18 +479,33 @@ class EtchParser:
         else:
             raise EtchParserError()
 
-    def parse(self, etch_code):
-        """Parses the input code and stores the parsed tree"""
+    def parse(self, etch_code, digest: str = None):
+        """
+        Parses the input code and stores the parsed tree. Parse results are cached by the digest of the source, the
+        cached trees are shared and must not be modified.
+        """
         assert isinstance(etch_code, str), "Expecting string"
         self.etch_code = etch_code
-        try:
-            self._parsed_tree = self.parser.parse(etch_code)
-        except (LarkError, GrammarError, ParseError, LexError, UnexpectedInput,
-                UnexpectedCharacters, UnexpectedToken, VisitError) as e:
+        self._digest = digest or source_digest(etch_code)
+
+        key = (self._digest, self.parser.options.parser)
+        result = _parse_cache.get(key)
+        if result is None:
+            try:
+                result = self.parser.parse(etch_code)
+            except (LarkError, GrammarError, ParseError, LexError, UnexpectedInput,
+                    UnexpectedCharacters, UnexpectedToken, VisitError) as e:
+                result = _ParseFailure(e)
+
+            _parse_cache.put(key, result)
+
+        if isinstance(result, _ParseFailure):
+            self._parsed_tree = None
             logging.warning("Etch parsing failed, shard masks will be set to wildcard")
-            logging.warning(e)
+            logging.warning('{}: {}'.format(result.error_type.__name__, result.message))
             return False
 
+        self._parsed_tree = result
         return self.parsed_tree
 
     def entry_points(self, valid_entries=None):
@@ -224,6 +514,11 @@ class EtchParser:
         if not valid_entries:
             valid_entries = ['init', 'query', 'action']
 
+        key = (self._digest, tuple(valid_entries))
+        cached = _entry_point_cache.get(key) if self._digest else None
+        if cached is not None:
+            return {ep: list(names) for ep, names in cached.items()}
+
         # Build dict of lists of entry points of each type
         entry_points = {}
         for ep in valid_entries:
@@ -246,6 +541,9 @@ class EtchParser:
                 if ann in valid_entries:
                     entry_points[ann].append(func)
 
+        if self._digest:
+            _entry_point_cache.put(key, {ep: list(names) for ep, names in entry_points.items()})
+
         return entry_points
 
     def get_functions(self):
@@ -332,69 +630,38 @@ class EtchParser:
         return persistent_globals
 
     def globals_used(self, entry_point, parameter_values):
-        if 'State' in self.etch_code:
-            raise UseWildcardShardMask("State usage detected")
-
+        """
+        Identify the persistent globals and state used by an entry point, including those used by any functions it
+        calls, with the parameters of the called functions bound to the arguments of each call.
+
+        :param entry_point: The name of the entry point
+        :param parameter_values: The values of the entry point parameters
+        :return: A list of global names (non-sharded globals and state), (global name, ShardUse) tuples for sharded
+            globals and ShardUse objects for state whose name is determined by a parameter
+        """
         # First identify global definitions
         persistent_globals = self.globals_declared()
+        functions = {f.name: f for f in self.get_functions()}
 
-        # Now find use global statements within annotations
-        annotation_node = next(self.parsed_tree.find_pred(
-            lambda x: x.data == 'annotation' and x.children[1].children[0].value == entry_point))
+        entry = functions.get(entry_point)
+        if entry is None or entry.annotation is None:
+            raise EtchParserError("Unknown entry point: {}".format(entry_point))
 
         # Identify parameters of function
         assert isinstance(parameter_values, list), "Expected parameter values as a list"
         parameters = {p.name: p for p in self.parameters(entry_point, parameter_values)}
 
-        # Parse for functions called (TODO: refactor as class)
-        function_calls = annotation_node.find_data('function_call')
-        called_names = []
-        for f in function_calls:
-            function_name = list(f.children[0].scan_values(lambda t: isinstance(t, lexer.Token) and t.type == 'NAME'))
-            # len > 1 indicates dot-expanded name, assumed non-user defined, therefore not containing use statements
-            if len(function_name) == 1:
-                called_names.append(function_name[0].value)
-        # If any called functions use globals, we currently can't parse those usages
-        if any(fn in called_names for fn in self.global_using_subfunctions()):
-            raise UnparsableAddress("Calls global using subfunction")
-
-        # Build list of globals used
-        globals_used = []
-
-        # Find all global use statements within function
-        for gu in annotation_node.find_data('use_global'):
-            assert isinstance(gu.children[0], lexer.Token) and gu.children[0].type == 'NAME', \
-                "Could not identify global name"
-            g_name = gu.children[0].value
-
-            # Handle use any
-            if g_name == 'any' and len(gu.children) == 1:
-                # Check if we have any sharded globals
-                if any(pg for pg in persistent_globals.values() if pg.is_sharded):
-                    raise UseWildcardShardMask("use any + persistent sharded global")
-
-                # If we don't have sharded globals, add all globals to used list
-                globals_used = [g_name for g_name in persistent_globals.keys()]
-                # Return immediately as we're already using all globals
-                return globals_used
-
-            assert g_name in persistent_globals, "Attempting to use undeclared global : {}".format(gu)
-
-            # Handle non-sharded global
-            if not persistent_globals[g_name].is_sharded:
-                assert len(gu.children) == 1, "Sharded use statement for non-sharded global: " + g_name
-                globals_used.append(g_name)
-
-            # Handle sharded global
-            else:
-                # TODO: assert that any parameters used in shard access are never the target of an assignment
-                assert len(gu.children) > 1, "Non-sharded use statement for sharded global: " + g_name
-                shards = gu.find_data('use_shard_item')
+        analysis = _UseAnalysis(persistent_globals, functions)
+        analysis.visit(entry, parameters)
 
-                for sh in shards:
-                    globals_used.append((g_name, ShardUse.from_tree(sh, parameters)))
+        if analysis.use_any:
+            # all globals are used, along with any state
+            globals_used = list(persistent_globals.keys())
+            globals_used.extend(usage for usage in analysis.used if not isinstance(usage, tuple)
+                                and usage not in globals_used)
+            return globals_used
 
-        return globals_used
+        return analysis.used
 
     def used_globals_to_addresses(self, entry_point, parameters: list):
         # Identify globals used in function
@@ -412,6 +679,9 @@ class EtchParser:
             # Single strings represent non-sharded globals
             elif isinstance(usage, str):
                 addresses.append(usage)
+            # State accessed by a name determined by the parameters
+            elif isinstance(usage, ShardUse):
+                addresses.append('{}'.format(usage.value))
             else:
                 raise NotImplementedError()
 
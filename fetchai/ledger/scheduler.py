@@ -0,0 +1,216 @@
+import logging
+from typing import Iterable, List, Optional
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.bitvector import BitVector
+from fetchai.ledger.serialisation.shardmask import ShardMask
+from fetchai.ledger.transaction import Transaction
+
+TOKEN_STATE_PREFIX = 'fetch.token.state.'
+
+
+class Wave:
+    """A group of transactions whose lanes do not overlap and can therefore be executed in parallel"""
+
+    def __init__(self, num_lanes: int, wildcard: bool = False):
+        self.transactions = []  # type: List[Transaction]
+        self.mask = BitVector(num_lanes)
+        self.wildcard = bool(wildcard)
+        self._num_lanes = num_lanes
+
+    def __len__(self):
+        return len(self.transactions)
+
+    @property
+    def lanes_used(self) -> int:
+        return self._num_lanes if self.wildcard else self.mask.popcount()
+
+    @property
+    def utilisation(self) -> float:
+        """The fraction of the lanes doing useful work while this wave executes"""
+        if self.wildcard:
+            # a wildcard transaction locks every lane but only does one lane's worth of work
+            return 1.0 / self._num_lanes
+        return self.mask.popcount() / self._num_lanes
+
+    def add(self, tx: Transaction, mask: BitVector):
+        self.transactions.append(tx)
+        self.mask |= mask
+
+
+class ScheduleReport:
+    def __init__(self, waves: List[Wave], digests: List[List[str]]):
+        self.waves = waves
+        self.digests = digests
+
+    @property
+    def num_transactions(self) -> int:
+        return sum(len(wave) for wave in self.waves)
+
+    @property
+    def lane_utilisation(self) -> float:
+        """The mean fraction of lanes in use across all the waves"""
+        if not self.waves:
+            return 0.0
+        return sum(wave.utilisation for wave in self.waves) / len(self.waves)
+
+    @property
+    def parallelism(self) -> float:
+        """The mean number of transactions per wave"""
+        if not self.waves:
+            return 0.0
+        return self.num_transactions / len(self.waves)
+
+
+class TransactionScheduler:
+    """
+    Groups transactions into waves of non-overlapping shard masks so that the node can execute each wave in parallel.
+
+    Wildcard transactions lock every lane, so each one is scheduled in a wave of its own. When the order is preserved
+    a wildcard is executed at its input position, after every earlier transaction and before every later one. Otherwise
+    the wildcards are held back until after all the other transactions.
+    """
+
+    def __init__(self, num_lanes: int, preserve_order: bool = True):
+        """
+        :param num_lanes: The number of lanes on the target node
+        :param preserve_order: Ensure that transactions with overlapping lanes are submitted in their input order.
+            When disabled the transactions are packed as densely as possible regardless of their order.
+        """
+        if not (num_lanes > 0 and (num_lanes & (num_lanes - 1)) == 0):
+            raise ValueError('Expecting power of two number of lanes')
+
+        self._num_lanes = int(num_lanes)
+        self._preserve_order = bool(preserve_order)
+        self._pending = []  # type: List[Transaction]
+
+    @property
+    def num_lanes(self) -> int:
+        return self._num_lanes
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, tx: Transaction):
+        self._pending.append(tx)
+
+    def extend(self, txs: Iterable[Transaction]):
+        self._pending.extend(txs)
+
+    def lane_mask(self, tx: Transaction) -> Optional[BitVector]:
+        """
+        Determine the lanes that a transaction will lock on the node
+
+        :param tx: The transaction to be evaluated
+        :return: The lane mask, or None if the transaction is a wildcard
+        """
+        if tx.action:
+            mask = tx.shard_mask
+            if len(mask) <= 1:
+                return None
+            if len(mask) != self._num_lanes:
+                mask = mask.resize(self._num_lanes)
+            return mask
+
+        # plain transfers lock the token state of every address involved
+        resources = [TOKEN_STATE_PREFIX + str(tx.from_address)]
+        resources.extend(TOKEN_STATE_PREFIX + str(address) for address in tx.transfers.keys())
+        return ShardMask.resources_to_shard_mask(resources, self._num_lanes)
+
+    def plan(self) -> List[Wave]:
+        """Groups the pending transactions into waves, without submitting them"""
+        if self._preserve_order:
+            return self._plan_ordered()
+
+        masked = []
+        wildcards = []
+        for tx in self._pending:
+            mask = self.lane_mask(tx)
+            if mask is None:
+                wildcards.append(tx)
+            else:
+                masked.append((tx, mask))
+
+        waves = self._plan_packed(masked)
+        waves.extend(self._wildcard_wave(tx) for tx in wildcards)
+        return waves
+
+    def _wildcard_wave(self, tx: Transaction) -> Wave:
+        wave = Wave(self._num_lanes, wildcard=True)
+        wave.transactions.append(tx)
+        return wave
+
+    def _plan_ordered(self) -> List[Wave]:
+        waves = []  # type: List[Wave]
+
+        # a wildcard conflicts with everything, so no later transaction may be placed in a wave before it
+        barrier = 0
+        for tx in self._pending:
+            mask = self.lane_mask(tx)
+            if mask is None:
+                waves.append(self._wildcard_wave(tx))
+                barrier = len(waves)
+                continue
+
+            # find the last wave that conflicts with this transaction, it must be executed after it
+            index = len(waves)
+            while index > barrier and not waves[index - 1].mask.overlaps(mask):
+                index -= 1
+
+            if index == len(waves):
+                waves.append(Wave(self._num_lanes))
+            waves[index].add(tx, mask)
+
+        return waves
+
+    def _plan_packed(self, masked) -> List[Wave]:
+        # first fit decreasing: place the widest transactions first
+        masked = sorted(masked, key=lambda item: item[1].popcount(), reverse=True)
+
+        waves = []  # type: List[Wave]
+        for tx, mask in masked:
+            for wave in waves:
+                if not wave.mask.overlaps(mask):
+                    wave.add(tx, mask)
+                    break
+            else:
+                wave = Wave(self._num_lanes)
+                wave.add(tx, mask)
+                waves.append(wave)
+
+        # the best filled waves are submitted first
+        waves.sort(key=lambda w: w.lanes_used, reverse=True)
+        return waves
+
+    def submit(self, api: LedgerApi, wait: bool = False, timeout: Optional[int] = None) -> ScheduleReport:
+        """
+        Plans and submits all the pending transactions, wave by wave
+
+        :param api: The ledger API to submit the transactions to
+        :param wait: Wait for each wave to be executed before submitting the next
+        :param timeout: The maximum time to wait for each wave to be executed
+        :return: The report of the submitted waves and their transaction digests
+        """
+        waves = self.plan()
+
+        digests = []
+        submitted = set()
+        try:
+            for wave in waves:
+                wave_digests = []
+                for tx in wave.transactions:
+                    wave_digests.append(api.tokens.submit_signed_tx(tx))
+                    submitted.add(id(tx))
+                digests.append(wave_digests)
+
+                if wait:
+                    api.sync(wave_digests, timeout=timeout)
+        finally:
+            # transactions which were not submitted remain pending, so that they can be submitted again
+            self._pending = [tx for tx in self._pending if id(tx) not in submitted]
+
+        report = ScheduleReport(waves, digests)
+        logging.debug('Submitted {} transactions in {} waves, lane utilisation {:.1%}'.format(
+            report.num_transactions, len(waves), report.lane_utilisation))
+
+        return report
@@ -1,4 +1,17 @@
-from typing import IO
+from typing import IO, Iterable, List
+
+# maps the number of significant bytes in a value to the log2 of the encoded length
+_LOG2_NUM_BYTES = (0, 0, 1, 2, 2, 3, 3, 3, 3)
+
+# precomputed encodings for the single byte ranges: 0 to 127 and -1 to -31 (indexed by absolute value)
+_SMALL_UNSIGNED = tuple(bytes([value]) for value in range(0x80))
+_SMALL_SIGNED = tuple(bytes([0xE0 | value]) for value in range(0x20))
+
+# precomputed decodings for every single byte header, None for headers which are followed by a value
+_HEADER_VALUES = tuple(
+    header if header < 0x80 else -(header & 0x1F) if (header & 0xE0) == 0xE0 else None
+    for header in range(0x100)
+)
 
 
 def _calculate_log2_num_bytes(value: int) -> int:
@@ -10,13 +23,37 @@ def _calculate_log2_num_bytes(value: int) -> int:
     :param value:
     :return: The calculate the number of bytes
     """
-    for log2_num_bytes in range(4):
-        limit = 1 << ((1 << log2_num_bytes) * 8)
-        if value < limit:
-            return log2_num_bytes
+    num_bytes = (value.bit_length() + 7) // 8
+    if num_bytes < len(_LOG2_NUM_BYTES):
+        return _LOG2_NUM_BYTES[num_bytes]
     raise RuntimeError('Unable to calculate the number of bytes required for this value')
 
 
+def encode_to_bytes(value: int) -> bytes:
+    """
+    Encode a integer value into its serialised bytes
+
+    :param value: The value to be encoded
+    :return: The generated bytes
+    """
+    if 0 <= value < 0x80:
+        return _SMALL_UNSIGNED[value]
+
+    if value < 0:
+        abs_value = -value
+        if abs_value <= 0x1F:
+            return _SMALL_SIGNED[abs_value]
+        header = 0xD0
+    else:
+        abs_value = value
+        header = 0xC0
+
+    # determine the number of bytes that will be needed to encode this value
+    log2_num_bytes = _calculate_log2_num_bytes(abs_value)
+
+    return bytes([header | log2_num_bytes]) + abs_value.to_bytes(1 << log2_num_bytes, 'big')
+
+
 def decode(stream: IO[bytes]) -> int:
     """
     Decode an integer from the provided stream
@@ -25,29 +62,23 @@ def decode(stream: IO[bytes]) -> int:
     :return: The decoded integer value
     """
     header = stream.read(1)[0]
-    if (header & 0x80) == 0:
-        return header & 0x7F
-    else:
-        type = (header & 0x60) >> 5
-        if type == 3:
-            return -(header & 0x1f)
-        elif type == 2:
-            signed_flag = bool(header & 0x10)
-            log2_value_length = header & 0x0F
-            value_length = 1 << log2_value_length
 
-            value = 0
-            for n in range(value_length):
-                byte_value = int(stream.read(1)[0])
-                shift = (value_length - (n + 1)) * 8
+    value = _HEADER_VALUES[header]
+    if value is not None:
+        return value
+
+    if (header & 0x60) == 0x40:
+        value_length = 1 << (header & 0x0F)
 
-                byte_value <<= shift
-                value |= byte_value
+        data = stream.read(value_length)
+        if len(data) != value_length:
+            raise RuntimeError('Unable to decode integer, insufficient data in stream')
 
-            if signed_flag:
-                value = -value
+        value = int.from_bytes(data, 'big')
+        if header & 0x10:
+            value = -value
 
-            return value
+        return value
 
 
 def encode(stream: IO[bytes], value: int):
@@ -58,32 +89,30 @@ def encode(stream: IO[bytes], value: int):
     :param value: The value to be encoded
     :return: The generated byets
     """
-    is_signed = value < 0
-    abs_value = abs(value)
+    stream.write(encode_to_bytes(value))
 
-    if not is_signed and abs_value <= 0x7f:
-        stream.write(bytes([abs_value]))
-    else:
-        if is_signed and abs_value <= 0x1F:
-            stream.write(bytes([0xE0 | abs_value]))
-        else:
 
-            # determine the number of bytes that will be needed to encode this value
-            log2_num_bytes = _calculate_log2_num_bytes(abs_value)
-            num_bytes = 1 << log2_num_bytes
+def encode_many(stream: IO[bytes], values: Iterable[int]):
+    """
+    Encode a sequence of integer values into a bytes stream with a single write
+
+    :param stream: The stream to write to
+    :param values: The values to be encoded
+    """
+    stream.write(b''.join(map(encode_to_bytes, values)))
 
-            # define the header
-            if is_signed:
-                header = 0xD0 | (log2_num_bytes & 0xF)
-            else:
-                header = 0xC0 | (log2_num_bytes & 0xF)
 
-            # encode all the parts fot the values
-            values = [(abs_value >> (n * 8)) & 0xFF for n in reversed(range(num_bytes))]
+def decode_many(stream: IO[bytes], count: int) -> List[int]:
+    """
+    Decode a number of consecutive integers from the provided stream
 
-            stream.write(bytes([header] + values))
+    :param stream: The stream to parse
+    :param count: The number of integers to decode
+    :return: The list of decoded values
+    """
+    return [decode(stream) for _ in range(count)]
 
 
 def encode_fixed(stream: IO[bytes], value: int, num_bytes: int = 8):
     # Pack given integer value in to specified number of bytes (big-endian)
-    stream.write(bytes([value >> n * 8 & 0xFF for n in reversed(range(num_bytes))]))
+    stream.write((value & ((1 << (num_bytes * 8)) - 1)).to_bytes(num_bytes, 'big'))
@@ -0,0 +1,72 @@
+import threading
+from typing import Any, Iterable, List, Sequence
+
+import msgpack
+
+from fetchai.ledger.crypto import Address, Identity
+
+# the msgpack extension type used by the ledger for addresses
+ADDRESS_EXT_TYPE = 77
+
+_local = threading.local()
+
+
+def encode_default(value: Any):
+    """
+    Converts the ledger types which msgpack does not support natively
+
+    :param value: The value to be converted
+    :return: The msgpack compatible representation of the value
+    """
+    if isinstance(value, Address):
+        return msgpack.ExtType(ADDRESS_EXT_TYPE, bytes(value))
+    elif isinstance(value, Identity):
+        return msgpack.ExtType(ADDRESS_EXT_TYPE, bytes(Address(value)))
+    raise RuntimeError('Unknown item to pack: ' + value.__class__.__name__)
+
+
+def _convert_arguments(args: Sequence[Any]) -> list:
+    # converting the top level ledger types up front avoids the comparatively slow default hook for the common case,
+    # nested values are still handled by the hook
+    return [encode_default(value) if isinstance(value, (Address, Identity)) else value for value in args]
+
+
+def _packer(autoreset: bool) -> msgpack.Packer:
+    # packers are not thread safe, so each thread reuses its own
+    name = 'packer' if autoreset else 'buffered_packer'
+    packer = getattr(_local, name, None)
+    if packer is None:
+        packer = msgpack.Packer(default=encode_default, autoreset=autoreset)
+        setattr(_local, name, packer)
+    return packer
+
+
+def encode_arguments(args: Sequence[Any]) -> bytes:
+    """
+    Encodes the arguments of a contract action or query into a msgpack payload
+
+    :param args: The argument values, which can be primitives, addresses, lists and dicts
+    :return: The encoded payload
+    """
+    return _packer(True).pack(_convert_arguments(args))
+
+
+def encode_arguments_many(calls: Iterable[Sequence[Any]]) -> List[bytes]:
+    """
+    Encodes the arguments of a number of calls into a single buffer, which is then split into the payloads
+
+    :param calls: The argument values of each call
+    :return: The list of encoded payloads, in the order of the calls
+    """
+    packer = _packer(False)
+    try:
+        offsets = [0]
+        for args in calls:
+            packer.pack(_convert_arguments(args))
+            with packer.getbuffer() as view:
+                offsets.append(len(view))
+
+        buffer = packer.bytes()
+        return [buffer[start:end] for start, end in zip(offsets, offsets[1:])]
+    finally:
+        packer.reset()
@@ -1,9 +1,22 @@
-import struct
+import functools
 from typing import Iterable
 
 from fetchai.ledger.bitvector import BitVector
 from fetchai.ledger.serialisation.sha256 import sha256_hash
 
+# the maximum number of resource groups to be remembered
+RESOURCE_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=RESOURCE_CACHE_SIZE)
+def _resource_group(resource_address: str) -> int:
+    # Resource ID from address, the group is the first 4 bytes as a little endian integer
+    return int.from_bytes(sha256_hash(resource_address.encode('ascii'))[:4], 'little')
+
+
+def _check_num_lanes(num_lanes: int):
+    assert ((num_lanes & (num_lanes - 1)) == 0) and num_lanes > 0, "Expecting power of two number of lanes"
+
 
 class ShardMask:
 
@@ -27,8 +40,25 @@ class ShardMask:
         :param num_lanes: The number of lanes that are being targeted
         :return: The shard mask bit vector for shard allocation
         """
-        shards = [cls.resource_to_shard(ra, num_lanes) for ra in resource_addresses]
-        return BitVector.from_indices(shards, num_lanes)
+        _check_num_lanes(num_lanes)
+
+        lane_mask = num_lanes - 1
+        value = 0
+        for resource_address in set(resource_addresses):
+            value |= 1 << (_resource_group(resource_address) & lane_mask)
+
+        return BitVector.from_int(value, num_lanes)
+
+    @staticmethod
+    def resource_to_group(resource_address: str) -> int:
+        """
+        Converts a fully qualified resource address into its 32-bit resource group, which is independent of the
+        number of lanes. Results are cached.
+
+        :param resource_address: The resource address to be converted
+        :return: The resource group
+        """
+        return _resource_group(resource_address)
 
     @staticmethod
     def resource_to_shard(resource_address: str, num_lanes: int) -> int:
@@ -39,15 +69,12 @@ class ShardMask:
         :param num_lanes: The number of lanes that are being targetted
         :return: The shard index for this resource
         """
-
-        assert ((num_lanes & (num_lanes - 1)) == 0) and num_lanes > 0, "Expecting power of two number of lanes"
-
-        # Resource ID from address
-        resource_id = sha256_hash(resource_address.encode('ascii'))
-
-        # Take last 4 bytes
-        group = struct.unpack('<I', resource_id[:4])[0]
+        _check_num_lanes(num_lanes)
 
         # modulo number of lanes
-        shard = group & (num_lanes - 1)
-        return shard
+        return _resource_group(resource_address) & (num_lanes - 1)
+
+    @staticmethod
+    def clear_cache():
+        """Clears the cache of resource groups"""
+        _resource_group.cache_clear()
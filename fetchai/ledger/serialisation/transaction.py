@@ -1,6 +1,6 @@
 import io
 import struct
-from typing import Optional
+from typing import Optional, Sequence, Tuple
 
 from fetchai.ledger import bitvector
 from fetchai.ledger import transaction
@@ -39,9 +39,13 @@ def _map_contract_mode(payload: 'Transaction'):
         return NO_CONTRACT
 
 
-def encode_payload(tx: 'Transaction', buffer: Optional[io.BytesIO] = None) -> bytes:
-    buffer = buffer or io.BytesIO()
+def _encode_header(tx: 'Transaction', has_valid_from: bool) -> bytes:
+    """Encodes the header, from address and transfers of a transaction"""
+    return _encode_header_prefix(tx, has_valid_from) + _encode_transfers(tx.transfers.items())
+
 
+def _encode_header_prefix(tx: 'Transaction', has_valid_from: bool) -> bytes:
+    """Encodes the header and from address of a transaction, everything in the header except the transfers"""
     num_transfers = len(tx.transfers)
     num_signatures = len(tx.signers)
 
@@ -50,7 +54,6 @@ def encode_payload(tx: 'Transaction', buffer: Optional[io.BytesIO] = None) -> by
 
     num_extra_signatures = num_signatures - 0x40 if num_signatures > 0x40 else 0
     signalled_signatures = num_signatures - (num_extra_signatures + 1)
-    has_valid_from = tx.valid_from != 0
     header0 = VERSION << 5
     header0 |= (1 if num_transfers > 0 else 0) << 2
     header0 |= (1 if num_transfers > 1 else 0) << 1
@@ -62,75 +65,88 @@ def encode_payload(tx: 'Transaction', buffer: Optional[io.BytesIO] = None) -> by
     header1 = contract_mode << 6
     header1 |= signalled_signatures & 0x3f
 
+    buffer = io.BytesIO()
     buffer.write(bytes([MAGIC, header0, header1]))
 
     reserved = 0
     integer.encode_fixed(buffer, value=reserved, num_bytes=1)
 
     address.encode(buffer, tx.from_address)
+
+    return buffer.getvalue()
+
+
+def _encode_transfers(transfers: Sequence[Tuple['Address', int]]) -> bytes:
+    """Encodes the transfers section at the end of the header"""
+    buffer = io.BytesIO()
+
+    num_transfers = len(transfers)
     if num_transfers > 1:
         integer.encode(buffer, num_transfers - 2)
 
-    for destination, amount in tx.transfers.items():
+    for destination, amount in transfers:
         address.encode(buffer, destination)
         integer.encode(buffer, amount)
 
-    if has_valid_from:
-        integer.encode(buffer, tx.valid_from)
+    return buffer.getvalue()
 
-    integer.encode(buffer, tx.valid_until)
-    integer.encode(buffer, tx.charge_rate)
-    integer.encode(buffer, tx.charge_limit)
 
-    if NO_CONTRACT != contract_mode:
+def _encode_contract(tx: 'Transaction', contract_mode: int) -> bytes:
+    """Encodes the shard mask, contract and action of a transaction, everything in the contract section except data"""
+    buffer = io.BytesIO()
 
-        shard_mask_length = len(tx.shard_mask)
+    shard_mask_length = len(tx.shard_mask)
 
-        if shard_mask_length <= 1:
+    if shard_mask_length <= 1:
 
-            # signal this is a wildcard transaction (expensive!!!)
-            buffer.write(_byte(0x80))
+        # signal this is a wildcard transaction (expensive!!!)
+        buffer.write(_byte(0x80))
 
-        else:
+    else:
 
-            shard_mask_bytes = bytes(tx.shard_mask)
-            log2_mask_length = _log2(shard_mask_length)
+        shard_mask_bytes = bytes(tx.shard_mask)
+        log2_mask_length = _log2(shard_mask_length)
 
-            if shard_mask_length < 8:
-                assert len(shard_mask_bytes) == 1
+        if shard_mask_length < 8:
+            assert len(shard_mask_bytes) == 1
 
-                contract_header = shard_mask_bytes[0] & 0xF
-                if log2_mask_length == 2:
-                    contract_header |= 0x10
+            contract_header = shard_mask_bytes[0] & 0xF
+            if log2_mask_length == 2:
+                contract_header |= 0x10
 
-                # write the mask to the stream
-                buffer.write(_byte(contract_header))
+            # write the mask to the stream
+            buffer.write(_byte(contract_header))
 
-            else:
+        else:
 
-                assert shard_mask_length <= 512
+            assert shard_mask_length <= 512
 
-                contract_header = 0x40 | ((log2_mask_length - 3) & 0x3f)
+            contract_header = 0x40 | ((log2_mask_length - 3) & 0x3f)
 
-                buffer.write(_byte(contract_header))
-                buffer.write(shard_mask_bytes)
+            buffer.write(_byte(contract_header))
+            buffer.write(shard_mask_bytes)
 
-        if SMART_CONTRACT == contract_mode or SYNERGETIC == contract_mode:
-            address.encode(buffer, tx.contract_address)
-        elif CHAIN_CODE == contract_mode:
-            encoded_chain_code = tx.chain_code.encode('ascii')
-            bytearray.encode(buffer, encoded_chain_code)
-        else:
-            assert False
+    if SMART_CONTRACT == contract_mode or SYNERGETIC == contract_mode:
+        address.encode(buffer, tx.contract_address)
+    elif CHAIN_CODE == contract_mode:
+        encoded_chain_code = tx.chain_code.encode('ascii')
+        bytearray.encode(buffer, encoded_chain_code)
+    else:
+        assert False
 
-        # write the action and data fields
-        encoded_action = tx.action.encode('ascii')
-        bytearray.encode(buffer, encoded_action)
-        bytearray.encode(buffer, tx.data)
+    # write the action field
+    encoded_action = tx.action.encode('ascii')
+    bytearray.encode(buffer, encoded_action)
+
+    return buffer.getvalue()
 
-    # Counter value
-    integer.encode_fixed(buffer, value=tx.counter, num_bytes=8)
 
+def _encode_signers(tx: 'Transaction') -> bytes:
+    """Encodes the public keys of the signers of a transaction"""
+    buffer = io.BytesIO()
+
+    num_signatures = len(tx.signers)
+    num_extra_signatures = num_signatures - 0x40 if num_signatures > 0x40 else 0
     if num_extra_signatures > 0:
         integer.encode(buffer, num_extra_signatures)
 
@@ -141,17 +157,154 @@ def encode_payload(tx: 'Transaction', buffer: Optional[io.BytesIO] = None) -> by
     return buffer.getvalue()
 
 
-def encode_transaction(tx: 'Transaction') -> bytes:
+def encode_payload(tx: 'Transaction', buffer: Optional[io.BytesIO] = None) -> bytes:
+    buffer = buffer or io.BytesIO()
+
+    has_valid_from = tx.valid_from != 0
+    buffer.write(_encode_header(tx, has_valid_from))
+
+    if has_valid_from:
+        integer.encode(buffer, tx.valid_from)
+
+    integer.encode(buffer, tx.valid_until)
+    integer.encode(buffer, tx.charge_rate)
+    integer.encode(buffer, tx.charge_limit)
+
+    contract_mode = _map_contract_mode(tx)
+    if NO_CONTRACT != contract_mode:
+        buffer.write(_encode_contract(tx, contract_mode))
+        bytearray.encode(buffer, tx.data)
+
+    # Counter value
+    integer.encode_fixed(buffer, value=tx.counter, num_bytes=8)
+
+    buffer.write(_encode_signers(tx))
+
+    return buffer.getvalue()
+
+
+class TxTemplate:
+    """
+    A transaction compiled from a prototype, with every field which is the same for each use (the header, from
+    address, transfers, contract, action and signers) pre-encoded. Only the validity, charges, data and counter are
+    encoded for each transaction. The transfers may also be replaced, provided there are the same number of them.
+    """
+
+    def __init__(self, prototype: 'Transaction'):
+        """
+        :param prototype: The transaction whose invariant fields are used by every transaction built from the template
+        """
+        contract_mode = _map_contract_mode(prototype)
+
+        self._headers = {
+            has_valid_from: _encode_header_prefix(prototype, has_valid_from)
+            for has_valid_from in (False, True)
+        }
+        self._transfers = _encode_transfers(list(prototype.transfers.items()))
+        self._num_transfers = len(prototype.transfers)
+        self._contract = None if contract_mode == NO_CONTRACT else _encode_contract(prototype, contract_mode)
+        self._signers = _encode_signers(prototype)
+        self._prototype = prototype
+
+    @property
+    def has_contract(self) -> bool:
+        return self._contract is not None
+
+    def encode_payload(self, valid_until: int, charge_limit: int, counter: int, data: bytes = b'',
+                       valid_from: int = 0, charge_rate: int = 1,
+                       transfers: Optional[Sequence[Tuple['Address', int]]] = None) -> bytes:
+        """
+        Encodes the payload of a transaction, equivalent to `encode_payload` of the prototype with these fields set
+
+        :param valid_until: The last block in which the transaction is valid
+        :param charge_limit: The maximum charge of the transaction
+        :param counter: The counter of the transaction
+        :param data: The data of the contract call, must be empty for transactions without a contract
+        :param valid_from: The first block in which the transaction is valid, 0 for no limit
+        :param charge_rate: The charge rate of the transaction
+        :param transfers: The (destination address, amount) pairs replacing the transfers of the prototype
+        :return: The encoded payload
+        """
+        if transfers is None:
+            transfer_section = self._transfers
+        elif len(transfers) != self._num_transfers:
+            raise ValueError('Template requires {} transfers, {} given'.format(self._num_transfers, len(transfers)))
+        else:
+            transfer_section = _encode_transfers(transfers)
+
+        parts = [self._headers[valid_from != 0], transfer_section]
+        if valid_from != 0:
+            parts.append(integer.encode_to_bytes(valid_from))
+        parts.append(integer.encode_to_bytes(valid_until))
+        parts.append(integer.encode_to_bytes(charge_rate))
+        parts.append(integer.encode_to_bytes(charge_limit))
+
+        if self._contract is not None:
+            parts.append(self._contract)
+            parts.append(integer.encode_to_bytes(len(data)))
+            parts.append(data)
+        else:
+            assert not data, 'Data can only be sent to a contract'
+
+        parts.append((counter & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'big'))
+        parts.append(self._signers)
+
+        return b''.join(parts)
+
+    def build(self, valid_until: int, charge_limit: int, counter: int, data: bytes = b'', valid_from: int = 0,
+              charge_rate: int = 1, transfers: Optional[Sequence[Tuple['Address', int]]] = None) -> 'Transaction':
+        """
+        Creates an unsigned copy of the prototype with the variable fields set
+
+        :return: The transaction
+        """
+        if transfers is None:
+            transfers = list(self._prototype.transfers.items())
+        elif len(transfers) != self._num_transfers:
+            raise ValueError('Template requires {} transfers, {} given'.format(self._num_transfers, len(transfers)))
+
+        tx = transaction.Transaction()
+        tx.from_address = self._prototype.from_address
+        for destination, amount in transfers:
+            tx.add_transfer(destination, amount)
+
+        if self._prototype.chain_code is not None:
+            tx.target_chain_code(self._prototype.chain_code, self._prototype.shard_mask)
+        elif self._prototype.is_synergetic:
+            tx.target_synergetic_data(self._prototype.contract_address, self._prototype.shard_mask)
+        elif self._prototype.contract_address is not None:
+            tx.target_contract(self._prototype.contract_address, self._prototype.shard_mask)
+
+        if self._prototype.action:
+            tx.action = self._prototype.action
+        tx.data = data
+        tx.valid_from = valid_from
+        tx.valid_until = valid_until
+        tx.charge_rate = charge_rate
+        tx.charge_limit = charge_limit
+        tx.counter = counter
+
+        for signer in self._prototype.signers:
+            tx.add_signer(signer)
+
+        return tx
+
+
+def encode_transaction(tx: 'Transaction', payload: Optional[bytes] = None) -> bytes:
     """
     Encode the input transaction to a binary stream which is ready to be sent to the ledger
 
     :param tx: The input transaction to be encoded
+    :param payload: The previously encoded payload of the transaction, if available
     :return: The generated bytes for the TX
     """
 
     # encode the contents of the transaction
     buffer = io.BytesIO()
-    encode_payload(tx, buffer)
+    if payload is None:
+        encode_payload(tx, buffer)
+    else:
+        buffer.write(payload)
 
     # append all the signatures of the signers in order
     for ident, signature in tx.signatures:
@@ -0,0 +1,178 @@
+import random
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.api.common import DEFAULT_BLOCK_VALIDITY_PERIOD
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.crypto import Address, Entity, Identity
+from fetchai.ledger.serialisation import integer
+from fetchai.ledger.serialisation.transaction import TxTemplate
+from fetchai.ledger.transaction import Transaction
+
+# the largest value of a transaction counter
+MAX_COUNTER = (1 << 64) - 1
+
+# the charge rate used for all transactions
+CHARGE_RATE = 1
+
+
+class SenderSession:
+    """
+    Builds and signs single transfers from one entity as cheaply as possible.
+
+    A transfer from the entity is compiled into a `TxTemplate` once, so the from address, the signer section and the
+    headers are only encoded when the session is created. Each transaction takes the next value of a counter so that
+    otherwise identical transfers have distinct digests. The encoded transactions are byte for byte identical to those
+    built with `TokenTxFactory.transfer`.
+    """
+
+    def __init__(self, entity: Entity, api: Optional[LedgerApi] = None, counter: Optional[int] = None,
+                 validity_period: int = DEFAULT_BLOCK_VALIDITY_PERIOD):
+        """
+        :param entity: The entity sending and signing every transfer
+        :param api: The API used to determine the current block number and to submit transfers
+        :param counter: The counter of the first transaction, random if not specified
+        :param validity_period: The number of blocks for which each transfer is valid
+        """
+        self._entity = entity
+        self._api = api
+        self._validity_period = int(validity_period)
+        self._lock = threading.Lock()
+        self._counter = random.getrandbits(64) if counter is None else int(counter) & MAX_COUNTER
+
+        self._from_address = Address(entity)
+        self._identity = Identity(entity)
+
+        # the destination and amount of the prototype are replaced in every transfer built from the template
+        self._template = TxTemplate(TokenTxFactory.transfer(entity, self._from_address, 1, 0, [entity]))
+
+    @property
+    def entity(self) -> Entity:
+        return self._entity
+
+    @property
+    def from_address(self) -> Address:
+        return self._from_address
+
+    @property
+    def identity(self) -> Identity:
+        return self._identity
+
+    def next_counters(self, count: int) -> List[int]:
+        """
+        Reserves a number of consecutive counters
+
+        :param count: The number of counters required
+        :return: The reserved counters, unique within this session
+        """
+        with self._lock:
+            start = self._counter
+            self._counter = (start + count) & MAX_COUNTER
+
+        return [(start + n) & MAX_COUNTER for n in range(count)]
+
+    def next_counter(self) -> int:
+        return self.next_counters(1)[0]
+
+    def validity(self) -> Tuple[int, int]:
+        """The (valid from, valid until) block numbers for a transfer built now"""
+        if self._api is None:
+            raise RuntimeError('Session has no API to determine the current block number')
+
+        current_block = self._api.block_tracker.block_number()
+        return current_block, current_block + self._validity_period
+
+    def encode_transfer_payload(self, to: Address, amount: int, fee: int, valid_until: int, valid_from: int = 0,
+                                counter: Optional[int] = None) -> bytes:
+        """
+        Encodes the payload of a transfer, equivalent to `encode_payload` of the transaction built by
+        `TokenTxFactory.transfer`
+
+        :param to: The destination address
+        :param amount: The amount to transfer
+        :param fee: The charge limit of the transaction
+        :param valid_until: The last block in which the transaction is valid
+        :param valid_from: The first block in which the transaction is valid, 0 for no limit
+        :param counter: The counter of the transaction, the next counter of the session if not specified
+        :return: The encoded payload
+        """
+        assert amount > 0
+
+        if counter is None:
+            counter = self.next_counter()
+
+        to = to if isinstance(to, Address) else Address(to)
+        return self._template.encode_payload(valid_until, fee, counter, valid_from=valid_from, charge_rate=CHARGE_RATE,
+                                             transfers=((to, amount),))
+
+    def encode_transfer(self, to: Address, amount: int, fee: int, valid_until: Optional[int] = None,
+                        valid_from: Optional[int] = None, counter: Optional[int] = None) -> bytes:
+        """
+        Builds, signs and encodes a transfer ready for submission
+
+        :param to: The destination address
+        :param amount: The amount to transfer
+        :param fee: The charge limit of the transaction
+        :param valid_until: The last block in which the transaction is valid, determined from the API if not specified
+        :param valid_from: The first block in which the transaction is valid, determined from the API if not specified
+        :param counter: The counter of the transaction, the next counter of the session if not specified
+        :return: The encoded and signed transaction
+        """
+        if valid_until is None:
+            current_from, valid_until = self.validity()
+            if valid_from is None:
+                valid_from = current_from
+
+        payload = self.encode_transfer_payload(to, amount, fee, valid_until, valid_from or 0, counter)
+        signature = self._entity.sign(payload)
+        return payload + integer.encode_to_bytes(len(signature)) + signature
+
+    def encode_transfers(self, transfers: Iterable[Tuple[Address, int]], fee: int) -> List[bytes]:
+        """
+        Builds, signs and encodes a number of transfers which share the same validity period
+
+        :param transfers: The (destination address, amount) pairs
+        :param fee: The charge limit of each transaction
+        :return: The encoded and signed transactions
+        """
+        transfers = list(transfers)
+        valid_from, valid_until = self.validity()
+        counters = self.next_counters(len(transfers))
+        return [
+            self.encode_transfer(to, amount, fee, valid_until, valid_from, counter)
+            for (to, amount), counter in zip(transfers, counters)
+        ]
+
+    def build_transfer(self, to: Address, amount: int, fee: int, valid_until: Optional[int] = None,
+                       valid_from: Optional[int] = None, counter: Optional[int] = None) -> Transaction:
+        """Builds and signs a transfer, as `encode_transfer` but returning the decoded transaction"""
+        encoded = self.encode_transfer(to, amount, fee, valid_until, valid_from, counter)
+        return Transaction.decode(encoded)
+
+    def transfer(self, to: Address, amount: int, fee: int) -> str:
+        """
+        Builds, signs and submits a transfer
+
+        :param to: The destination address
+        :param amount: The amount to transfer
+        :param fee: The charge limit of the transaction
+        :return: The digest of the submitted transaction
+        """
+        if self._api is None:
+            raise RuntimeError('Session has no API to submit transactions to')
+
+        return self._api.tokens.submit_signed_txs([self.encode_transfer(to, amount, fee)])[0]
+
+    def transfers(self, transfers: Iterable[Tuple[Address, int]], fee: int) -> List[str]:
+        """
+        Builds, signs and submits a number of transfers in as few requests as possible
+
+        :param transfers: The (destination address, amount) pairs
+        :param fee: The charge limit of each transaction
+        :return: The digests of the submitted transactions, in order
+        """
+        if self._api is None:
+            raise RuntimeError('Session has no API to submit transactions to')
+
+        return self._api.tokens.submit_signed_txs(self.encode_transfers(transfers, fee))
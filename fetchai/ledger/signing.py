@@ -0,0 +1,496 @@
+import io
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from fetchai.ledger.crypto import Address, Entity, Identity
+from fetchai.ledger.crypto.deed import AddressLike, Deed, InvalidDeedError, Operation, SigningPlanner
+from fetchai.ledger.serialisation import bytearray, integer, sha256_hash
+from fetchai.ledger.serialisation import transaction as tx_serialisation
+from fetchai.ledger.transaction import Transaction
+
+# the number of seconds a signer has to return its signature
+DEFAULT_SIGNER_TIMEOUT = 5.0
+
+# the length prefix of each message exchanged over a unix socket
+_FRAME_LENGTH = struct.Struct('>I')
+
+# the largest message accepted from a unix socket
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# the number of bytes read at a time from an HTTP signer
+_READ_SIZE = 4096
+
+# the first byte of a compact signature response, distinct from the magic of an encoded transaction
+SIGNATURE_RESPONSE_MAGIC = 0xA2
+
+# the length of the payload digest in a compact signature response
+_DIGEST_LENGTH = 32
+
+
+class SigningError(Exception):
+    def __init__(self, message: str, failed: Iterable[Address] = ()):
+        super().__init__(message)
+        self.failed = set(failed)
+
+
+class SignerTransport:
+    """Sends a partial transaction to a remote signer and returns its reply"""
+
+    def request(self, data: bytes, timeout: float) -> bytes:
+        """
+        :param data: The partial transaction
+        :param timeout: The total number of seconds the request may take, after which it must give up
+        :return: The reply of the signer
+        :raises: SigningError if the signer can not be reached or does not reply in time
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class HttpSignerTransport(SignerTransport):
+    """Posts partial transactions to a signer's HTTP endpoint"""
+
+    def __init__(self, url: str):
+        self._url = str(url)
+        self._local = threading.local()
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def request(self, data: bytes, timeout: float) -> bytes:
+        # sessions are not thread safe, so each thread keeps its own connection to the signer
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.session()
+
+        # the timeout of requests only applies to each read, so the body is streamed to enforce the overall limit
+        deadline = time.monotonic() + timeout
+        try:
+            with session.post(self._url, data=data, timeout=timeout, stream=True,
+                              headers={'Content-Type': 'application/octet-stream'}) as response:
+                if response.status_code != 200:
+                    raise SigningError('Signer at {} responded with status {}'.format(
+                        self._url, response.status_code))
+
+                content = b''
+                for chunk in response.iter_content(_READ_SIZE):
+                    if time.monotonic() > deadline:
+                        raise SigningError('Signer at {} timed out'.format(self._url))
+                    content += chunk
+        except requests.RequestException as ex:
+            raise SigningError('Unable to reach signer at {}: {}'.format(self._url, ex))
+
+        return content
+
+
+class UnixSocketSignerTransport(SignerTransport):
+    """Exchanges length prefixed partial transactions with a signer listening on a unix socket"""
+
+    def __init__(self, path: str):
+        self._path = str(path)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def request(self, data: bytes, timeout: float) -> bytes:
+        deadline = time.monotonic() + timeout
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(self._path)
+                write_frame(sock, data)
+                return read_frame(sock, deadline)
+        except (OSError, EOFError) as ex:
+            raise SigningError('Unable to reach signer at {}: {}'.format(self._path, ex))
+
+
+def write_frame(sock: socket.socket, data: bytes):
+    sock.sendall(_FRAME_LENGTH.pack(len(data)) + data)
+
+
+def read_frame(sock: socket.socket, deadline: Optional[float] = None) -> bytes:
+    """
+    :param sock: The connected socket
+    :param deadline: The monotonic time by which the whole frame must have been received
+    :return: The contents of the frame
+    """
+    length, = _FRAME_LENGTH.unpack(_read_exactly(sock, _FRAME_LENGTH.size, deadline))
+    if length > MAX_FRAME_SIZE:
+        raise EOFError('Message of {} bytes is too large'.format(length))
+    return _read_exactly(sock, length, deadline)
+
+
+def _read_exactly(sock: socket.socket, size: int, deadline: Optional[float] = None) -> bytes:
+    buffer = b''
+    while len(buffer) < size:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout('timed out')
+            sock.settimeout(remaining)
+
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise EOFError('Connection closed after {} of {} bytes'.format(len(buffer), size))
+        buffer += chunk
+    return buffer
+
+
+def encode_signature_response(digest: bytes, index: int, signature: bytes) -> bytes:
+    """
+    Encodes a compact signature response
+
+    :param digest: The SHA256 digest of the signed payload
+    :param index: The position of the signer in the signers of the transaction
+    :param signature: The signature of the payload
+    :return: The encoded response
+    """
+    if len(digest) != _DIGEST_LENGTH:
+        raise ValueError('Invalid payload digest')
+    if index < 0:
+        raise ValueError('Invalid signer index')
+
+    buffer = io.BytesIO()
+    buffer.write(bytes([SIGNATURE_RESPONSE_MAGIC]))
+    buffer.write(digest)
+    integer.encode(buffer, index)
+    bytearray.encode(buffer, signature)
+    return buffer.getvalue()
+
+
+def decode_signature_response(data: bytes) -> Tuple[bytes, int, bytes]:
+    """
+    Decodes a compact signature response
+
+    :param data: The encoded response
+    :return: The payload digest, the index of the signer and the signature
+    :raises: SigningError if the response is not correctly encoded
+    """
+    stream = io.BytesIO(data)
+    try:
+        if stream.read(1) != bytes([SIGNATURE_RESPONSE_MAGIC]):
+            raise SigningError('Invalid signature response')
+
+        digest = stream.read(_DIGEST_LENGTH)
+        index = integer.decode(stream)
+        length = integer.decode(stream)
+        signature = stream.read(length)
+    except (IndexError, ValueError, RuntimeError) as ex:
+        raise SigningError('Unable to decode signature response: {}'.format(ex))
+
+    if len(digest) != _DIGEST_LENGTH or index < 0 or length <= 0 or len(signature) != length \
+            or stream.tell() != len(data):
+        raise SigningError('Unable to decode signature response')
+
+    return digest, index, signature
+
+
+def _sign_request(entity: Entity, data: bytes, accept: Optional[Callable[[Transaction], bool]]):
+    tx = tx_serialisation.decode_payload(io.BytesIO(data))
+    identity = Identity(entity)
+    if identity not in tx.all_signers:
+        raise SigningError('Signer is not a signatory of the transaction')
+    if accept is not None and not accept(tx):
+        raise SigningError('Signer refused to sign the transaction')
+
+    payload = tx.encode_payload()
+    return tx, identity, payload, entity.sign(payload)
+
+
+def sign_partial(entity: Entity, data: bytes, accept: Optional[Callable[[Transaction], bool]] = None) -> bytes:
+    """
+    Signs a partial transaction on behalf of a signer, the other side of a `SignerTransport`
+
+    :param entity: The signer
+    :param data: The partial transaction, see `Transaction.encode_partial`
+    :param accept: Called with the decoded transaction to decide if it should be signed
+    :return: The partial transaction with the signer's signature
+    :raises: SigningError if the signer is not a signatory or refuses to sign the transaction
+    """
+    tx, identity, payload, signature = _sign_request(entity, data, accept)
+
+    # the other signatures are not needed by the coordinator, so only the new signature is returned
+    tx.add_signature(identity, signature)
+    return tx_serialisation.encode_transaction(tx, payload)
+
+
+def sign_compact(entity: Entity, data: bytes, accept: Optional[Callable[[Transaction], bool]] = None) -> bytes:
+    """
+    Signs a partial transaction on behalf of a signer and replies with just the signature, which is much smaller
+    than the partial transaction returned by `sign_partial` and can be applied without decoding the payload again
+
+    :param entity: The signer
+    :param data: The partial transaction, see `Transaction.encode_partial`
+    :param accept: Called with the decoded transaction to decide if it should be signed
+    :return: The compact signature response, see `encode_signature_response`
+    :raises: SigningError if the signer is not a signatory or refuses to sign the transaction
+    """
+    tx, identity, payload, signature = _sign_request(entity, data, accept)
+    return encode_signature_response(sha256_hash(payload), tx.signers.index(identity), signature)
+
+
+class SignatureCoordinator:
+    """
+    Gathers the signatures for multi-signature transactions from remote signers.
+
+    The partial transaction is sent to every outstanding signer at once and the replies are verified and merged as
+    they arrive, so gathering takes as long as the slowest signer rather than the sum of them all. Each signer has its
+    own timeout. Signers may reply with a compact signature response or with the signed partial transaction. When a
+    deed is given, the coordinator can also choose the signatories itself, see `sign`.
+    """
+
+    def __init__(self, signers: Optional[Dict[Identity, SignerTransport]] = None, deed: Optional[Deed] = None,
+                 timeout: float = DEFAULT_SIGNER_TIMEOUT, workers: Optional[int] = None):
+        """
+        :param signers: The transport used to reach each signer, keyed by the signer's identity
+        :param deed: The deed controlling the account, required by `sign`
+        :param timeout: The default number of seconds each signer has to reply
+        :param workers: The maximum number of concurrent requests, one per signer if not specified
+        """
+        self._identities = {}  # type: Dict[Address, Identity]
+        self._transports = {}  # type: Dict[Address, SignerTransport]
+        self._timeouts = {}  # type: Dict[Address, float]
+        self._timeout = float(timeout)
+        self._workers = workers
+        self._executor = None  # type: Optional[ThreadPoolExecutor]
+        self._executor_size = 0
+        self._lock = threading.Lock()
+
+        self._deed = deed
+        self._planner = SigningPlanner(deed) if deed is not None else None
+
+        for signer, transport in (signers or {}).items():
+            self.add_signer(signer, transport)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def planner(self) -> Optional[SigningPlanner]:
+        return self._planner
+
+    @property
+    def signers(self) -> List[Identity]:
+        return list(self._identities.values())
+
+    def add_signer(self, signer: Identity, transport: SignerTransport, timeout: Optional[float] = None):
+        """
+        Registers a remote signer
+
+        :param signer: The identity of the signer, or its entity
+        :param transport: The transport used to reach the signer
+        :param timeout: The number of seconds the signer has to reply, the coordinator default if not specified
+        """
+        identity = Identity(signer)
+        signer = Address(identity)
+        self._identities[signer] = identity
+        self._transports[signer] = transport
+        if timeout is None:
+            self._timeouts.pop(signer, None)
+        else:
+            self._timeouts[signer] = float(timeout)
+
+    def timeout(self, signer: AddressLike) -> float:
+        return self._timeouts.get(Address(signer), self._timeout)
+
+    def _submit(self, signers: Iterable[Address], data: bytes, deadline: float) -> Dict[Future, Address]:
+        with self._lock:
+            # the pool grows as signers are added, requests already running on a replaced pool finish on its threads
+            workers = self._workers or max(len(self._transports), 1)
+            if self._executor is None or self._executor_size < workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=workers)
+                self._executor_size = workers
+
+            return {self._executor.submit(self._request, signer, data, deadline): signer for signer in signers}
+
+    def _request(self, signer: Address, data: bytes, deadline: float) -> Tuple[bytes, float]:
+        started = time.monotonic()
+
+        # a request never outlives the gather which made it, so that its thread is free for the next one
+        timeout = min(self.timeout(signer), deadline - started)
+        if timeout <= 0:
+            raise SigningError('timed out')
+
+        reply = self._transports[signer].request(data, timeout)
+        return reply, time.monotonic() - started
+
+    def _apply(self, tx: Transaction, payload: bytes, digest: bytes, signers: List[Identity], identity: Identity,
+               reply: bytes) -> bool:
+        """Verifies the signature of a signer in its reply and adds it to the transaction"""
+        if reply[:1] == bytes([SIGNATURE_RESPONSE_MAGIC]):
+            try:
+                reply_digest, index, signature = decode_signature_response(reply)
+            except SigningError:
+                return False
+
+            # the response is checked against the cached payload rather than decoding a copy of the transaction
+            if reply_digest != digest or index >= len(signers) or signers[index] != identity:
+                return False
+
+            if not identity.verify(payload, signature):
+                return False
+
+            tx.add_signature(identity, signature)
+            return True
+
+        # signers which do not support the compact response return the whole partial transaction
+        stream = io.BytesIO(reply)
+        try:
+            other_tx = tx_serialisation.decode_payload(stream)
+            if stream.getvalue()[:stream.tell()] != payload:
+                return False
+
+            signature = b''
+            for other in other_tx.signers:
+                signature = bytearray.decode(stream)
+                if other == identity:
+                    break
+        except Exception:
+            return False
+
+        if len(signature) == 0 or not identity.verify(payload, signature):
+            return False
+
+        tx.add_signature(identity, signature)
+        return True
+
+    def gather(self, tx: Transaction, operation: Optional[Operation] = None,
+               timeout: Optional[float] = None) -> Transaction:
+        """
+        Collects the signatures of every outstanding signatory of a transaction
+
+        :param tx: The transaction, which is updated in place as the signatures arrive
+        :param operation: When the coordinator has a deed, the operation the signatories must be able to authorise
+        :param timeout: The overall number of seconds to wait, the longest signer timeout if not specified
+        :return: The completed transaction
+        :raises: SigningError if any signatory does not return a valid signature in time
+        """
+        if operation is not None and self._deed is not None:
+            if not self._deed.is_satisfied(operation, tx.all_signers):
+                raise SigningError("The signatories do not meet the '{}' threshold of the deed".format(operation))
+
+        pending = {Address(identity): identity for identity in tx.pending_signers}
+        unknown = [str(signer) for signer in pending if signer not in self._transports]
+        if unknown:
+            raise SigningError('No transport for signers: {}'.format(', '.join(unknown)))
+        if not pending:
+            return tx
+
+        # the payload is encoded once and every reply is checked against it
+        payload = tx.encode_payload()
+        digest = sha256_hash(payload)
+        signers = tx.signers
+        data = tx_serialisation.encode_transaction(tx, payload)
+
+        if timeout is None:
+            timeout = max(self.timeout(signer) for signer in pending)
+        deadline = time.monotonic() + timeout
+
+        futures = self._submit(pending, data, deadline)
+
+        failed = {}  # type: Dict[Address, str]
+        try:
+            while futures and not failed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    signer = futures.pop(future)
+                    try:
+                        reply, elapsed = future.result()
+                    except Exception as ex:
+                        failed[signer] = str(ex)
+                        continue
+
+                    if not self._apply(tx, payload, digest, signers, pending[signer], reply):
+                        failed[signer] = 'invalid signature'
+                        continue
+
+                    if self._planner is not None:
+                        self._planner.record_latency(signer, elapsed)
+        finally:
+            for future in futures:
+                future.cancel()
+
+        # every signatory must sign, so once one has failed the signers which have not replied are no longer waited for
+        if not failed:
+            for signer in futures.values():
+                failed[signer] = 'timed out'
+                if self._planner is not None:
+                    self._planner.record_latency(signer, self.timeout(signer))
+
+        if failed:
+            raise SigningError('Unable to gather signatures: {}'.format(
+                ', '.join('{} ({})'.format(signer, reason) for signer, reason in failed.items())), failed)
+
+        return tx
+
+    def sign(self, operation: Operation, build: Callable[[List[Identity]], Transaction], attempts: int = 2,
+             available: Optional[Iterable[AddressLike]] = None) -> Transaction:
+        """
+        Chooses the signatories for an operation, builds the transaction and gathers its signatures.
+
+        Every listed signatory must sign a transaction, so the coordinator asks the fastest group of signers which
+        meets the threshold of the deed. If any of them fail the transaction is built again without them.
+
+        :param operation: The operation being authorised
+        :param build: Called with the chosen signatories to build the unsigned transaction
+        :param attempts: The number of groups of signatories to try
+        :param available: The signers which may be asked, every registered signer if not specified
+        :return: The completed transaction
+        :raises: SigningError if the signatures could not be gathered
+        """
+        if self._planner is None:
+            raise SigningError('A deed is required to choose the signatories')
+
+        if available is None:
+            available = self._transports.keys()
+        else:
+            available = [Address(signer) for signer in available if Address(signer) in self._transports]
+
+        exclude = set()
+        for _ in range(max(int(attempts), 1)):
+            try:
+                signatories = self._planner.plan(operation, available=available, exclude=exclude)
+            except InvalidDeedError as ex:
+                raise SigningError(str(ex), exclude)
+
+            tx = build([self._identities[signer] for signer in signatories])
+            try:
+                self.gather(tx)
+            except SigningError as ex:
+                if not ex.failed:
+                    raise
+                exclude |= ex.failed
+                continue
+
+            return tx
+
+        raise SigningError('Unable to gather signatures, failed signers: {}'.format(
+            ', '.join(str(signer) for signer in exclude)), exclude)
+
+    def close(self):
+        """Stops the request threads and closes the transports"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for transport in self._transports.values():
+            transport.close()
@@ -0,0 +1,511 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import argparse
+import base64
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse, parse_qs
+
+from fetchai.ledger import __version__
+from fetchai.ledger.crypto import Address
+from fetchai.ledger.serialisation import sha256_hash
+from fetchai.ledger.transaction import Transaction
+
+Latency = Union[float, Callable[[], float]]
+QueryHandler = Callable[[Address, str, dict], dict]
+
+TX_STATUS_PATH = re.compile(r'^/api/status/tx/(?:0x)?([0-9a-fA-F]+)$')
+TX_CONTENTS_PATH = re.compile(r'^/api/tx/(?:0x)?([0-9a-fA-F]+)$')
+CONTRACT_PATH = re.compile(r'^/api/contract/(.+)/([^/]+)$')
+
+TOKEN_PREFIX = 'fetch/token'
+CONTRACT_PREFIX = 'fetch/contract'
+GOVERNANCE_PREFIX = 'fetch/governance'
+
+TOKEN_QUERIES = {
+    'balance': 'balance',
+    'stake': 'stake',
+    'cooldownStake': 'cooldownStake',
+}
+
+
+class MockTransaction:
+    def __init__(self, tx: Transaction, digest: bytes, submitted_at: float, block_number: int):
+        self.tx = tx
+        self.digest = digest
+        self.submitted_at = submitted_at
+        self.block_number = block_number
+        self.status = 'Pending'
+        self.exit_code = 0
+
+
+class MockLedgerNode:
+    """
+    A lightweight ledger node implementing the REST interface used by the API, for testing and benchmarking.
+
+    Submitted transactions are decoded and verified with the library's own decoder and are executed after a
+    configurable delay. Latency and failures can be injected into every request.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, lanes: int = 1, block_interval: Optional[float] = 1.0,
+                 execution_delay: float = 0.0, latency: Latency = 0.0, failure_rate: float = 0.0,
+                 enforce_balances: bool = False, seed: Optional[int] = None):
+        """
+        :param host: The host to listen on
+        :param port: The port to listen on, 0 selects a free port
+        :param lanes: The number of lanes reported by the node
+        :param block_interval: Seconds between blocks, None to only advance blocks manually
+        :param execution_delay: Seconds between a transaction being submitted and it being executed
+        :param latency: Seconds added to every request, or a callable returning the latency for a request
+        :param failure_rate: The probability that any request fails with a server error
+        :param enforce_balances: Fail transfers which exceed the balance of the sender
+        :param seed: Seed for the failure injection random number generator
+        """
+        self.lanes = int(lanes)
+        self.version = 'v' + __version__
+        self.block_interval = block_interval
+        self.execution_delay = float(execution_delay)
+        self.latency = latency
+        self.failure_rate = float(failure_rate)
+        self.enforce_balances = bool(enforce_balances)
+
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+        self._start_time = time.monotonic()
+        self._block_offset = 0
+        self._fail_next = 0
+
+        self._balances = {}  # type: Dict[Address, int]
+        self._stakes = {}  # type: Dict[Address, int]
+        self._cooldown = {}  # type: Dict[Address, int]
+        self._deeds = {}  # type: Dict[Address, dict]
+        self._contracts = {}  # type: Dict[Address, dict]
+        self._transactions = {}  # type: Dict[bytes, MockTransaction]
+        self._proposals = []  # type: List[dict]
+        self._query_handler = None  # type: Optional[QueryHandler]
+
+        self.request_count = 0
+
+        self._server = _Server((host, port), _Handler)
+        self._server.node = self
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    @property
+    def block_number(self) -> int:
+        with self._lock:
+            elapsed_blocks = 0
+            if self.block_interval:
+                elapsed_blocks = int((time.monotonic() - self._start_time) / self.block_interval)
+            return self._block_offset + elapsed_blocks
+
+    def advance_blocks(self, count: int = 1):
+        with self._lock:
+            self._block_offset += int(count)
+
+    def fail_next(self, count: int = 1):
+        """Forces the next `count` requests to fail with a server error"""
+        with self._lock:
+            self._fail_next += int(count)
+
+    def set_balance(self, address, amount: int):
+        with self._lock:
+            self._balances[Address(address)] = int(amount)
+
+    def balance(self, address) -> int:
+        with self._lock:
+            return self._balances.get(Address(address), 0)
+
+    def set_query_handler(self, handler: Optional[QueryHandler]):
+        """
+        Sets the callable used to answer smart contract queries. It is called with the contract address, the query
+        name and the request parameters and must return the JSON response object.
+        """
+        self._query_handler = handler
+
+    @property
+    def transactions(self) -> List[Transaction]:
+        with self._lock:
+            return [item.tx for item in self._transactions.values()]
+
+    def transaction(self, digest: Union[bytes, str]) -> Optional[Transaction]:
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest[2:] if digest.startswith('0x') else digest)
+        with self._lock:
+            item = self._transactions.get(digest)
+            return None if item is None else item.tx
+
+    # Request handling
+
+    def _inject(self) -> bool:
+        """Applies the configured latency and returns True if the current request should fail"""
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+        with self._lock:
+            self.request_count += 1
+
+            if self._fail_next > 0:
+                self._fail_next -= 1
+                return True
+
+            return self.failure_rate > 0 and self._random.random() < self.failure_rate
+
+    def _handle_get(self, path: str, query: dict) -> Tuple[int, object]:
+        if path == '/api/status':
+            return 200, {
+                'version': self.version,
+                'lanes': self.lanes,
+                'slices': 1,
+                'chain_id': 0,
+            }
+
+        if path == '/api/status/chain':
+            size = int(query.get('size', ['1'])[0])
+            block_number = self.block_number
+            return 200, {
+                'chain': [{'blockNumber': n} for n in range(block_number, max(block_number - size, -1), -1)],
+            }
+
+        match = TX_STATUS_PATH.match(path)
+        if match is not None:
+            return 200, self._tx_status(bytes.fromhex(match.group(1)))
+
+        match = TX_CONTENTS_PATH.match(path)
+        if match is not None:
+            return 200, self._tx_contents(bytes.fromhex(match.group(1)))
+
+        return 404, {'msg': 'Unknown endpoint'}
+
+    def _handle_post(self, path: str, content_type: str, body: object) -> Tuple[int, object]:
+        if path == '/api/contract/submit':
+            return self._submit(body)
+
+        match = CONTRACT_PATH.match(path)
+        if match is None:
+            return 404, {'msg': 'Unknown endpoint'}
+
+        prefix, endpoint = match.groups()
+        if content_type.startswith('application/vnd+fetch.transaction'):
+            return self._submit(body)
+
+        if prefix == TOKEN_PREFIX and endpoint in TOKEN_QUERIES:
+            return 200, self._token_query(endpoint, body)
+
+        if prefix == GOVERNANCE_PREFIX and endpoint == 'get_proposals':
+            return 200, self._get_proposals()
+
+        try:
+            contract_address = Address(prefix)
+        except ValueError:
+            return 404, {'msg': 'Unknown endpoint'}
+
+        return self._contract_query(contract_address, endpoint, body)
+
+    def _submit(self, body) -> Tuple[int, object]:
+        items = body if isinstance(body, list) else [body]
+
+        digests = []
+        for item in items:
+            try:
+                encoded = base64.b64decode(item['data'])
+                tx = Transaction.decode(encoded)
+            except Exception as ex:
+                logging.debug('Failed to decode transaction: {}'.format(ex))
+                tx = None
+
+            if tx is None:
+                return 400, {'msg': 'Unable to decode transaction', 'txs': digests}
+
+            digest = sha256_hash(encoded)
+            with self._lock:
+                # resubmission of an identical transaction is idempotent
+                if digest not in self._transactions:
+                    self._transactions[digest] = MockTransaction(tx, digest, time.monotonic(), self.block_number)
+
+            digests.append(digest.hex())
+
+        return 200, {
+            'txs': digests,
+            'counts': {'received': len(items), 'submitted': len(digests)},
+        }
+
+    def _update(self, item: MockTransaction):
+        """Executes the transaction if it has been pending for long enough"""
+        if item.status != 'Pending':
+            return
+        if time.monotonic() - item.submitted_at < self.execution_delay:
+            return
+
+        tx = item.tx
+        if tx.valid_until and self.block_number > tx.valid_until:
+            item.status = 'Invalid'
+            item.exit_code = 1
+            return
+
+        total = sum(tx.transfers.values())
+        if self.enforce_balances and total > self._balances.get(tx.from_address, 0):
+            item.status = 'Insufficient available funds'
+            item.exit_code = 1
+            return
+
+        for destination, amount in tx.transfers.items():
+            self._balances[tx.from_address] = self._balances.get(tx.from_address, 0) - amount
+            self._balances[destination] = self._balances.get(destination, 0) + amount
+
+        if tx.chain_code == 'fetch.token':
+            self._execute_token_action(tx)
+        elif tx.chain_code == 'fetch.contract' and tx.action == 'create':
+            self._execute_contract_create(tx)
+        elif tx.chain_code == 'fetch.governance' and tx.action == 'propose':
+            self._proposals.append(json.loads(base64.b64decode(tx.data).decode()))
+
+        item.status = 'Executed'
+
+    def _execute_token_action(self, tx: Transaction):
+        sender = tx.from_address
+        if tx.action == 'deed':
+            self._deeds[sender] = json.loads(tx.data.decode())
+        elif tx.action in ('addStake', 'deStake'):
+            amount = int(json.loads(tx.data.decode())['amount'])
+            if tx.action == 'addStake':
+                self._balances[sender] = self._balances.get(sender, 0) - amount
+                self._stakes[sender] = self._stakes.get(sender, 0) + amount
+            else:
+                self._stakes[sender] = self._stakes.get(sender, 0) - amount
+                self._cooldown[sender] = self._cooldown.get(sender, 0) + amount
+        elif tx.action == 'collectStake':
+            self._balances[sender] = self._balances.get(sender, 0) + self._cooldown.pop(sender, 0)
+
+    def _execute_contract_create(self, tx: Transaction):
+        payload = json.loads(tx.data.decode())
+        nonce = base64.b64decode(payload['nonce'])
+        contract_address = Address(sha256_hash(bytes(tx.from_address) + nonce))
+        self._contracts[contract_address] = {
+            'digest': payload['digest'],
+            'source': base64.b64decode(payload['text']).decode(),
+            'owner': tx.from_address,
+        }
+
+    def _tx_status(self, digest: bytes) -> dict:
+        with self._lock:
+            item = self._transactions.get(digest)
+            if item is None:
+                status, exit_code, tx = 'Unknown', 0, None
+            else:
+                self._update(item)
+                status, exit_code, tx = item.status, item.exit_code, item.tx
+
+        return {
+            'tx': '0x' + digest.hex(),
+            'status': status,
+            'exit_code': exit_code,
+            'charge': 0 if tx is None else tx.charge_limit,
+            'charge_rate': 0 if tx is None else tx.charge_rate,
+            'fee': 0,
+        }
+
+    def _tx_contents(self, digest: bytes) -> dict:
+        with self._lock:
+            item = self._transactions.get(digest)
+            if item is None:
+                return {}
+            tx = item.tx
+
+        return {
+            'digest': '0x' + digest.hex(),
+            'action': tx.action or '',
+            'chainCode': tx.chain_code or '',
+            'from': str(tx.from_address),
+            'contractDigest': '',
+            'contractAddress': '' if tx.contract_address is None else str(tx.contract_address),
+            'validFrom': tx.valid_from,
+            'validUntil': tx.valid_until,
+            'charge': tx.charge_rate,
+            'chargeLimit': tx.charge_limit,
+            'transfers': [{'to': str(to), 'amount': amount} for to, amount in tx.transfers.items()],
+            'signatories': [signer.public_key for signer in tx.signers],
+            'data': base64.b64encode(tx.data).decode(),
+        }
+
+    def _token_query(self, endpoint: str, body: dict) -> dict:
+        address = Address(body['address'])
+        with self._lock:
+            # bring the state up to date with any executable transactions
+            for item in self._transactions.values():
+                self._update(item)
+
+            if endpoint == 'balance':
+                value = self._balances.get(address, 0)
+            elif endpoint == 'stake':
+                value = self._stakes.get(address, 0)
+            else:
+                value = {}
+                if address in self._cooldown:
+                    value = {str(self.block_number): self._cooldown[address]}
+
+        return {'address': str(address), TOKEN_QUERIES[endpoint]: value}
+
+    def _get_proposals(self) -> dict:
+        with self._lock:
+            proposals = list(self._proposals)
+
+        default = {'version': 0, 'accept_by': 0, 'data': {'charge_multiplier': 0}}
+        return {
+            'active_proposal': proposals[0] if proposals else default,
+            'voting_queue': proposals[1:],
+            'max_number_of_proposals': 4,
+        }
+
+    def _contract_query(self, contract_address: Address, query: str, body: dict) -> Tuple[int, object]:
+        handler = self._query_handler
+        if handler is None:
+            return 200, {'status': 'success', 'result': None}
+
+        try:
+            return 200, handler(contract_address, query, body)
+        except Exception as ex:
+            return 400, {'status': 'failed', 'msg': str(ex)}
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    node = None  # type: MockLedgerNode
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+    def _send_json(self, status: int, obj):
+        body = json.dumps(obj).encode('ascii')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        data = self.rfile.read(length) if length else b''
+        return json.loads(data.decode()) if data else {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        node = self.server.node
+
+        if node._inject():
+            self._send_json(500, {'msg': 'Injected failure'})
+            return
+
+        status, response = node._handle_get(url.path, parse_qs(url.query))
+        self._send_json(status, response)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        node = self.server.node
+
+        try:
+            body = self._read_body()
+        except ValueError:
+            self._send_json(400, {'msg': 'Malformed request body'})
+            return
+
+        if node._inject():
+            self._send_json(500, {'msg': 'Injected failure'})
+            return
+
+        status, response = node._handle_post(url.path, self.headers.get('Content-Type', ''), body)
+        self._send_json(status, response)
+
+
+def parse_commandline():
+    parser = argparse.ArgumentParser(description='Runs a mock ledger node for testing and benchmarking')
+    parser.add_argument('-H', '--host', default='127.0.0.1', help='The host to listen on')
+    parser.add_argument('-p', '--port', type=int, default=8000, help='The port to listen on')
+    parser.add_argument('-l', '--lanes', type=int, default=1, help='The number of lanes reported')
+    parser.add_argument('--block-interval', type=float, default=1.0, help='Seconds between blocks')
+    parser.add_argument('--execution-delay', type=float, default=0.0,
+                        help='Seconds before a submitted transaction is executed')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency added to every request')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Probability of a request failing')
+    parser.add_argument('--enforce-balances', action='store_true', help='Reject transfers exceeding the balance')
+    parser.add_argument('--seed', type=int, help='Seed for failure injection')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_commandline()
+
+    node = MockLedgerNode(args.host, args.port, lanes=args.lanes, block_interval=args.block_interval,
+                          execution_delay=args.execution_delay, latency=args.latency, failure_rate=args.failure_rate,
+                          enforce_balances=args.enforce_balances, seed=args.seed)
+
+    print('Mock ledger node listening on {}:{}'.format(node.host, node.port), flush=True)
+    try:
+        node.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2020 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import StreamRequestHandler, ThreadingMixIn, ThreadingUnixStreamServer
+from typing import Callable, Optional
+
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.signing import SignerTransport, HttpSignerTransport, UnixSocketSignerTransport, \
+    SigningError, sign_compact, sign_partial, read_frame, write_frame
+from fetchai.ledger.transaction import Transaction
+
+
+class MockSigner:
+    """
+    A remote signer for testing, which signs the partial transactions it receives over HTTP or a unix socket.
+
+    Latency can be added to every request and the signer can be made to refuse or ignore requests.
+    """
+
+    def __init__(self, entity: Entity, unix_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 0,
+                 delay: float = 0.0, accept: Optional[Callable[[Transaction], bool]] = None, compact: bool = True):
+        """
+        :param entity: The signer
+        :param unix_path: Listen on a unix socket at this path rather than over HTTP
+        :param host: The host to listen on over HTTP
+        :param port: The port to listen on over HTTP, 0 selects a free port
+        :param delay: Seconds to wait before replying to each request
+        :param accept: Called with each transaction to decide if it should be signed
+        :param compact: Reply with compact signature responses rather than partial transactions
+        """
+        self.entity = entity
+        self.delay = float(delay)
+        self.accept = accept
+        self.compact = bool(compact)
+        self.request_count = 0
+
+        self._lock = threading.Lock()
+        self._unix_path = unix_path
+        if unix_path is None:
+            self._server = _HttpServer((host, port), _HttpHandler)
+        else:
+            self._server = ThreadingUnixStreamServer(unix_path, _UnixHandler)
+            self._server.daemon_threads = True
+        self._server.signer = self
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def address(self) -> Address:
+        return Address(self.entity)
+
+    @property
+    def url(self) -> Optional[str]:
+        if self._unix_path is not None:
+            return None
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/sign'.format(host, port)
+
+    def transport(self) -> SignerTransport:
+        """The transport used to reach this signer"""
+        if self._unix_path is not None:
+            return UnixSocketSignerTransport(self._unix_path)
+        return HttpSignerTransport(self.url)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self._unix_path is not None and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)
+
+    def handle(self, data: bytes) -> bytes:
+        with self._lock:
+            self.request_count += 1
+        if self.delay:
+            time.sleep(self.delay)
+        sign = sign_compact if self.compact else sign_partial
+        return sign(self.entity, data, self.accept)
+
+
+class _HttpServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    signer = None  # type: MockSigner
+
+
+class _HttpHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        data = self.rfile.read(length)
+
+        try:
+            status, body = 200, self.server.signer.handle(data)
+        except SigningError as ex:
+            status, body = 403, str(ex).encode('utf-8')
+        except Exception as ex:
+            status, body = 400, str(ex).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _UnixHandler(StreamRequestHandler):
+    def handle(self):
+        try:
+            reply = self.server.signer.handle(read_frame(self.connection))
+        except Exception as ex:
+            # the connection is closed without a reply, which the transport reports as an error
+            logging.debug('Unable to sign request: %s', ex)
+            return
+        write_frame(self.connection, reply)
@@ -0,0 +1,225 @@
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from fetchai.ledger.api.cache import BlockTracker, QueryCache
+from fetchai.ledger.api.contracts import ContractsApi
+from fetchai.ledger.crypto import Entity, Address
+
+
+class BlockTrackerTests(TestCase):
+    def test_block_number_is_polled_at_most_once_per_interval(self):
+        endpoint = MagicMock()
+        endpoint.current_block_number.side_effect = [10, 11]
+        tracker = BlockTracker(endpoint, poll_interval=5.0)
+
+        with patch('fetchai.ledger.api.cache.time.monotonic', return_value=100.0):
+            self.assertEqual(tracker.block_number(), 10)
+            self.assertEqual(tracker.block_number(), 10)
+
+        with patch('fetchai.ledger.api.cache.time.monotonic', return_value=106.0):
+            self.assertEqual(tracker.block_number(), 11)
+
+        self.assertEqual(endpoint.current_block_number.call_count, 2)
+
+    def test_update_and_invalidate(self):
+        endpoint = MagicMock()
+        endpoint.current_block_number.return_value = 20
+        tracker = BlockTracker(endpoint, poll_interval=60.0)
+
+        tracker.update(15)
+        self.assertEqual(tracker.block_number(), 15)
+        endpoint.current_block_number.assert_not_called()
+
+        # older block numbers are ignored
+        tracker.update(12)
+        self.assertEqual(tracker.block_number(), 15)
+
+        tracker.invalidate()
+        self.assertEqual(tracker.block_number(), 20)
+
+
+class QueryCacheTests(TestCase):
+    def setUp(self):
+        self.block_number = 1
+        self.tracker = MagicMock()
+        self.tracker.block_number.side_effect = lambda: self.block_number
+
+    def test_requires_block_tracker_or_ttl(self):
+        with self.assertRaises(ValueError):
+            QueryCache()
+
+    def test_result_reused_until_block_changes(self):
+        cache = QueryCache(self.tracker)
+        query = MagicMock(side_effect=['a', 'b'])
+
+        self.assertEqual(cache.get('key', query), 'a')
+        self.assertEqual(cache.get('key', query), 'a')
+        self.assertEqual(query.call_count, 1)
+
+        self.block_number = 2
+        self.assertEqual(cache.get('key', query), 'b')
+        self.assertEqual(query.call_count, 2)
+
+    def test_result_expires_after_ttl(self):
+        cache = QueryCache(ttl=10.0)
+        query = MagicMock(side_effect=['a', 'b'])
+
+        with patch('fetchai.ledger.api.cache.time.monotonic', return_value=0.0):
+            self.assertEqual(cache.get('key', query), 'a')
+        with patch('fetchai.ledger.api.cache.time.monotonic', return_value=9.0):
+            self.assertEqual(cache.get('key', query), 'a')
+        with patch('fetchai.ledger.api.cache.time.monotonic', return_value=10.0):
+            self.assertEqual(cache.get('key', query), 'b')
+
+    def test_uncacheable_results_are_not_kept(self):
+        cache = QueryCache(self.tracker)
+        query = MagicMock(side_effect=[(False, 'error'), (True, 'ok'), (True, 'other')])
+
+        self.assertEqual(cache.get('key', query, cacheable=lambda r: r[0]), (False, 'error'))
+        self.assertEqual(cache.get('key', query, cacheable=lambda r: r[0]), (True, 'ok'))
+        self.assertEqual(cache.get('key', query, cacheable=lambda r: r[0]), (True, 'ok'))
+        self.assertEqual(len(cache), 1)
+
+    def test_failed_query_is_not_cached(self):
+        cache = QueryCache(self.tracker)
+        query = MagicMock(side_effect=[RuntimeError('failed'), 'a'])
+
+        with self.assertRaises(RuntimeError):
+            cache.get('key', query)
+        self.assertEqual(cache.get('key', query), 'a')
+
+    def test_least_recently_used_result_is_evicted(self):
+        cache = QueryCache(self.tracker, maxsize=2)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 3)
+        cache.get('c', lambda: 4)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a', lambda: 5), 1)
+        self.assertEqual(cache.get('b', lambda: 6), 6)
+
+    def test_concurrent_duplicate_queries_are_collapsed(self):
+        cache = QueryCache(self.tracker)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def query():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        results = []
+        owner = threading.Thread(target=lambda: results.append(cache.get('key', query)))
+        owner.start()
+        self.assertTrue(started.wait(5))
+
+        waiters = [threading.Thread(target=lambda: results.append(cache.get('key', query))) for _ in range(4)]
+        for waiter in waiters:
+            waiter.start()
+
+        release.set()
+        for thread in [owner] + waiters:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['result'] * 5)
+
+    def test_queries_at_a_new_block_do_not_join_earlier_ones(self):
+        cache = QueryCache(self.tracker)
+        started = threading.Event()
+        release = threading.Event()
+
+        def stale_query():
+            started.set()
+            release.wait(5)
+            return 'stale'
+
+        results = []
+        owner = threading.Thread(target=lambda: results.append(cache.get('key', stale_query)))
+        owner.start()
+        self.assertTrue(started.wait(5))
+
+        # a caller which has seen a new block makes its own query rather than waiting for the earlier one
+        self.block_number = 2
+        self.assertEqual(cache.get('key', lambda: 'current'), 'current')
+
+        release.set()
+        owner.join(5)
+        self.assertEqual(results, ['stale'])
+
+        # the earlier result does not replace the current one
+        self.assertEqual(cache.get('key', lambda: 'queried again'), 'current')
+
+    def test_concurrent_duplicate_queries_share_failure(self):
+        cache = QueryCache(self.tracker)
+        started = threading.Event()
+        release = threading.Event()
+
+        def query():
+            started.set()
+            release.wait(5)
+            raise RuntimeError('failed')
+
+        errors = []
+
+        def run():
+            try:
+                cache.get('key', query)
+            except RuntimeError as ex:
+                errors.append(ex)
+
+        owner = threading.Thread(target=run)
+        owner.start()
+        self.assertTrue(started.wait(5))
+        waiter = threading.Thread(target=run)
+        waiter.start()
+
+        release.set()
+        owner.join(5)
+        waiter.join(5)
+
+        self.assertEqual(len(errors), 2)
+
+
+class ContractsApiQueryCacheTests(TestCase):
+    def setUp(self):
+        self.tracker = MagicMock()
+        self.tracker.block_number.return_value = 1
+        self.api = ContractsApi('127.0.0.1', 8000, query_cache=QueryCache(self.tracker))
+        self.api._post_json = MagicMock(return_value=(True, {'status': 'success', 'result': 5}))
+        self.owner = Address(Entity())
+
+    def test_repeated_query_is_cached(self):
+        address = Address(Entity())
+        self.api.query(self.owner, 'balance', address=address)
+        result = self.api.query(self.owner, 'balance', address=address)
+
+        self.assertEqual(result, (True, {'status': 'success', 'result': 5}))
+        self.api._post_json.assert_called_once()
+
+    def test_arguments_and_contracts_are_distinguished(self):
+        self.api.query(self.owner, 'balance', address=Address(Entity()))
+        self.api.query(self.owner, 'balance', address=Address(Entity()))
+        self.api.query(Address(Entity()), 'balance')
+        self.api.query(self.owner, 'supply')
+
+        self.assertEqual(self.api._post_json.call_count, 4)
+
+    def test_failed_query_is_not_cached(self):
+        self.api._post_json.side_effect = [(False, {}), (True, {'result': 1})]
+
+        self.assertEqual(self.api.query(self.owner, 'supply'), (False, {}))
+        self.assertEqual(self.api.query(self.owner, 'supply'), (True, {'result': 1}))
+        self.assertEqual(self.api._post_json.call_count, 2)
+
+    def test_queries_are_not_cached_by_default(self):
+        api = ContractsApi('127.0.0.1', 8000)
+        api._post_json = MagicMock(return_value=(True, {}))
+        api.query(self.owner, 'supply')
+        api.query(self.owner, 'supply')
+
+        self.assertEqual(api._post_json.call_count, 2)
@@ -1,5 +1,5 @@
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from fetchai.ledger.api.server import ServerApi, ApiError
 
@@ -60,3 +60,75 @@ class TokenAPITests(TestCase):
         self.api.status.side_effect = [dict(version='the wise mans fear')]
 
         self.assertEqual(self.api.version(), 'the wise mans fear')
+
+    def test_topology_is_cached(self):
+        self.api._session = MagicMock()
+        self.api._session.get.side_effect = [MockRequestResponse(dict(lanes=16, version='1.0.0'))]
+
+        self.assertEqual(self.api.version(), '1.0.0')
+        self.assertEqual(self.api.num_lanes(), 16)
+        self.assertEqual(self.api.num_lanes(), 16)
+
+        self.api._session.get.assert_called_once_with('http://127.0.0.1:9090/api/status')
+
+    def test_topology_refreshed_by_status(self):
+        self.api._session = MagicMock()
+        self.api._session.get.side_effect = [
+            MockRequestResponse(dict(lanes=16, version='1.0.0')),
+            MockRequestResponse(dict(lanes=32, version='1.0.0')),
+        ]
+
+        self.assertEqual(self.api.num_lanes(), 16)
+        self.api.status()
+        self.assertEqual(self.api.num_lanes(), 32)
+        self.assertEqual(self.api._session.get.call_count, 2)
+
+    def test_topology_updated_once_per_request(self):
+        self.api._session = MagicMock()
+        self.api._session.get.side_effect = [MockRequestResponse(dict(lanes=16, version='1.0.0'))]
+
+        with patch.object(self.api, '_update_topology', wraps=self.api._update_topology) as mock_update:
+            self.assertEqual(self.api.num_lanes(), 16)
+            self.assertEqual(self.api.num_lanes(), 16)
+
+        mock_update.assert_called_once_with(dict(lanes=16, version='1.0.0'))
+
+    def test_topology_invalidate(self):
+        self.api._session = MagicMock()
+        self.api._session.get.side_effect = [
+            MockRequestResponse(dict(lanes=16)),
+            MockRequestResponse(dict(lanes=32)),
+        ]
+
+        self.assertEqual(self.api.num_lanes(), 16)
+        self.api.invalidate()
+        self.assertEqual(self.api.num_lanes(), 32)
+
+    def test_topology_expires(self):
+        self.api = ServerApi('127.0.0.1', 9090, topology_ttl=10)
+        self.api._session = MagicMock()
+        self.api._session.get.side_effect = [
+            MockRequestResponse(dict(lanes=16)),
+            MockRequestResponse(dict(lanes=32)),
+        ]
+
+        with patch('fetchai.ledger.api.server.time.monotonic') as mock_time:
+            mock_time.return_value = 100
+            self.assertEqual(self.api.num_lanes(), 16)
+
+            mock_time.return_value = 109
+            self.assertEqual(self.api.num_lanes(), 16)
+
+            mock_time.return_value = 110
+            self.assertEqual(self.api.num_lanes(), 32)
+
+    def test_topology_cache_disabled(self):
+        self.api = ServerApi('127.0.0.1', 9090, topology_ttl=0)
+        self.api._session = MagicMock()
+        self.api._session.get.side_effect = [
+            MockRequestResponse(dict(lanes=16)),
+            MockRequestResponse(dict(lanes=32)),
+        ]
+
+        self.assertEqual(self.api.num_lanes(), 16)
+        self.assertEqual(self.api.num_lanes(), 32)
@@ -2,7 +2,7 @@ from typing import Callable
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 
-from fetchai.ledger.api import TokenApi
+from fetchai.ledger.api import ApiError, TokenApi
 from fetchai.ledger.api.token import TokenTxFactory
 from fetchai.ledger.crypto import Address, Entity
 from fetchai.ledger.crypto.deed import Deed
@@ -35,6 +35,43 @@ class TokenAPITests(TestCase):
     def test_stake(self):
         self.query_test(self.api.stake, 'stake')
 
+    def test_balances(self):
+        other = Address(Entity())
+        balances = {str(self.address): 200, str(other): 300}
+
+        def post(action, request):
+            if request['address'] == str(other):
+                return False, None
+            return True, {action: balances[request['address']]}
+
+        with patch('fetchai.ledger.api.TokenApi._post_json') as mock_post:
+            mock_post.side_effect = post
+
+            results = self.api.balances([self.address, other, str(self.address)], workers=2)
+
+        # duplicate addresses are only requested once
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(results[0], 200)
+        self.assertIsInstance(results[1], ApiError)
+        self.assertEqual(results[2], 200)
+
+    def test_stakes(self):
+        with patch('fetchai.ledger.api.TokenApi._post_json') as mock_post, \
+                patch('warnings.warn'):
+            mock_post.side_effect = lambda action, request: (True, {action: 100})
+
+            self.assertEqual(self.api.stakes([self.address, self.to_address]), [100, 100])
+
+    def test_invalid_address_fails_only_its_query(self):
+        with patch('fetchai.ledger.api.TokenApi._post_json') as mock_post, \
+                patch('warnings.warn'):
+            mock_post.side_effect = lambda action, request: (True, {action: 100})
+
+            for query in (self.api.balances, self.api.stakes, self.api.stake_cooldowns):
+                results = query([self.address, 'not an address'], workers=1)
+                self.assertNotIsInstance(results[0], Exception)
+                self.assertIsInstance(results[1], ValueError)
+
     def post_test(self, function: Callable, action: str, factory_function: Callable, entity: Entity, *args):
         with patch('fetchai.ledger.api.TokenApi._post_tx_json') as mock_post, \
                 patch('fetchai.ledger.api.token.TokenTxFactory.' + factory_function.__name__,
@@ -79,3 +116,14 @@ class TokenAPITests(TestCase):
     def test_collect_stake(self):
         self.post_test(self.api.collect_stake, 'collectStake', TokenTxFactory.collect_stake,
                        self.entity, 500)
+
+    def test_compiled_chain_code_action(self):
+        with patch('warnings.warn'):
+            tx = TokenTxFactory.add_stake(self.entity, 1000, 500, [self.entity])
+        tx.valid_from = 10
+        tx.valid_until = 110
+
+        template = TokenTxFactory.compile_chain_code_action(self.entity, 'addStake', [self.entity])
+        payload = template.encode_payload(110, 500, tx.counter, data=tx.data, valid_from=10)
+
+        self.assertEqual(payload, tx.encode_payload())
@@ -3,7 +3,7 @@ from unittest.mock import Mock, patch
 
 import requests
 
-from fetchai.ledger.api import TransactionApi
+from fetchai.ledger.api import ApiError, TransactionApi
 from fetchai.ledger.api.tx import TxContents
 from fetchai.ledger.crypto import Address, Entity
 
@@ -24,6 +24,7 @@ class TXContentsTest(TestCase):
 
         # Mock response returned by session
         mock_response = Mock(spec=requests.Response)
+        mock_response.status_code = 200
         mock_response.json.side_effect = ['json']
         mock_session.get.side_effect = [mock_response]
 
@@ -42,6 +43,22 @@ class TXContentsTest(TestCase):
         # Check that correct result returned
         self.assertEqual(result, 'txcontents')
 
+    def test_contents_error(self):
+        """Check that a failed query is reported rather than decoded"""
+        api = TransactionApi('abc', 1234)
+        api._session = Mock(spec=requests.Session)
+
+        mock_response = Mock(spec=requests.Response)
+        mock_response.status_code = 404
+        api._session.get.return_value = mock_response
+
+        with self.assertRaises(ApiError):
+            api.contents('fegh')
+
+        results = api.contents_many(['fegh', 'ijkl'], workers=1)
+        self.assertEqual([type(result) for result in results], [ApiError, ApiError])
+        mock_response.json.assert_not_called()
+
     def test_static_constructor(self):
         data = {
             'digest': '0x123456',
@@ -72,6 +89,27 @@ class TXContentsTest(TestCase):
         self.assertEqual(a.transfers, {})
         self.assertEqual(a.data, 'def')
 
+    def test_digest_with_leading_zero_bytes(self):
+        digest = bytes([0, 0, 0x0a]) + bytes(range(29))
+        data = {
+            'digest': '0x' + digest.hex(),
+            'action': 'transfer',
+            'chainCode': 'action.transfer',
+            'from': 'U5dUjGzmAnajivcn4i9K4HpKvoTvBrDkna1zePXcwjdwbz1yB',
+            'validFrom': 0,
+            'validUntil': 100,
+            'charge': 2,
+            'chargeLimit': 5,
+            'transfers': [],
+            'signatories': ['abc'],
+            'data': 'def'
+        }
+
+        # the leading zeros are part of the digest, not of the hex prefix
+        a = TxContents.from_json(data)
+        self.assertEqual(a._digest_bytes, digest)
+        self.assertEqual(a._digest_hex, digest.hex())
+
     def test_transfers(self):
         to1 = Entity()
         to2 = Entity()
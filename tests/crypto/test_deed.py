@@ -3,7 +3,9 @@ from unittest import TestCase
 from unittest.mock import patch
 
 from fetchai.ledger.crypto import Entity, Address
-from fetchai.ledger.crypto.deed import Deed, Operation, InvalidDeedError
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.crypto.deed import Deed, Operation, InvalidDeedError, SigningTally, SigningPlanner
+from fetchai.ledger.transaction import Transaction
 
 
 class DeedTests(TestCase):
@@ -196,3 +198,123 @@ class DeedTests(TestCase):
         deed = Deed()
         with self.assertRaises(ValueError):
             deed.set_operation(Operation.transfer, -2)
+
+    def test_total_votes_are_maintained(self):
+        deed = Deed()
+        deed.set_signee(self.board[0], 2)
+        deed.set_signee(self.board[1], 3)
+        self.assertEqual(deed.total_votes, 5)
+
+        deed.set_signee(self.board[0], 1)
+        self.assertEqual(deed.total_votes, 4)
+
+        deed.remove_signee(self.board[1])
+        deed.remove_signee(self.board[2])
+        self.assertEqual(deed.total_votes, 1)
+
+        restored = Deed.from_json(self.create_default_deed().to_json())
+        self.assertEqual(restored.total_votes, 4)
+
+    def test_changes_are_validated_again(self):
+        deed = self.create_default_deed()
+        deed.validate()
+
+        deed.remove_signee(self.board[0])
+        with self.assertRaises(InvalidDeedError):
+            deed.validate()
+
+        deed.set_operation(Operation.amend, 3)
+        deed.validate()
+
+    def test_votes_for(self):
+        deed = self.create_default_deed()
+        deed.set_signee(self.board[3], 2)
+
+        self.assertEqual(deed.votes_for([self.board[0], self.board[3], self.board[3], self.entity]), 3)
+        self.assertTrue(deed.is_satisfied(Operation.transfer, self.board[2:]))
+        self.assertFalse(deed.is_satisfied(Operation.amend, self.board[2:]))
+        self.assertFalse(deed.is_satisfied(Operation.stake, self.board))
+
+
+class SigningTallyTests(TestCase):
+    def setUp(self) -> None:
+        self.board = [Entity() for _ in range(4)]
+        self.deed = Deed()
+        for signee, weight in zip(self.board, (1, 1, 1, 2)):
+            self.deed.set_signee(signee, weight)
+        self.deed.set_operation(Operation.amend, 5)
+        self.deed.set_operation(Operation.transfer, 3)
+
+    def test_running_total(self):
+        tally = SigningTally(self.deed, Operation.transfer)
+        self.assertEqual(tally.remaining, 3)
+
+        self.assertFalse(tally.add(self.board[0]))
+        self.assertFalse(tally.add(self.board[0]))
+        self.assertEqual(tally.votes, 1)
+
+        self.assertTrue(tally.add(self.board[3]))
+        self.assertEqual(tally.votes, 3)
+        self.assertEqual(tally.remaining, 0)
+        self.assertEqual(tally.signed, {Address(self.board[0]), Address(self.board[3])})
+
+    def test_unknown_operation(self):
+        with self.assertRaises(InvalidDeedError):
+            SigningTally(self.deed, Operation.stake)
+
+    def test_merge_signatures(self):
+        tx = TokenTxFactory.transfer(Entity(), Entity(), 10, 20, self.board[1:])
+        tally = SigningTally(self.deed, Operation.transfer)
+        payload = tx.encode_payload()
+
+        for signer, expected in ((self.board[1], False), (self.board[3], True)):
+            signed = Transaction.decode_payload(payload)
+            signed.sign(signer)
+            self.assertEqual(tally.merge(tx, signed), expected)
+
+        self.assertEqual(tally.votes, 3)
+
+
+class SigningPlannerTests(TestCase):
+    def setUp(self) -> None:
+        self.board = [Entity() for _ in range(5)]
+        self.deed = Deed()
+        for signee, weight in zip(self.board, (1, 1, 1, 2, 3)):
+            self.deed.set_signee(signee, weight)
+        self.deed.set_operation(Operation.amend, 8)
+        self.deed.set_operation(Operation.transfer, 3)
+
+    def test_fastest_signees_are_chosen(self):
+        planner = SigningPlanner(self.deed)
+        for signee, latency in zip(self.board, (0.1, 0.2, 0.3, 0.4, 5.0)):
+            planner.record_latency(signee, latency)
+
+        self.assertEqual(planner.plan(Operation.transfer), [Address(s) for s in self.board[:3]])
+
+    def test_unnecessary_signees_are_dropped(self):
+        planner = SigningPlanner(self.deed)
+        for signee, latency in zip(self.board, (0.1, 0.2, 0.35, 0.3, 0.5)):
+            planner.record_latency(signee, latency)
+        planner.record_latency(self.board[3], 0.05)
+        self.assertAlmostEqual(planner.latency(self.board[3]), 0.25)
+
+        # the first two signees and the signee with 2 votes reach the threshold, but one of the first two is enough
+        plan = planner.plan(Operation.transfer)
+        self.assertEqual(plan, [Address(self.board[1]), Address(self.board[3])])
+        self.assertTrue(self.deed.is_satisfied(Operation.transfer, plan))
+
+    def test_unknown_latency_prefers_heaviest_votes(self):
+        planner = SigningPlanner(self.deed)
+        self.assertEqual(planner.plan(Operation.transfer), [Address(self.board[4])])
+
+    def test_excluded_signees(self):
+        planner = SigningPlanner(self.deed)
+        plan = planner.plan(Operation.transfer, exclude=[self.board[4]])
+        self.assertNotIn(Address(self.board[4]), plan)
+        self.assertTrue(self.deed.is_satisfied(Operation.transfer, plan))
+
+        with self.assertRaises(InvalidDeedError):
+            planner.plan(Operation.amend, exclude=[self.board[0]])
+
+        with self.assertRaises(InvalidDeedError):
+            planner.plan(Operation.transfer, available=self.board[:2])
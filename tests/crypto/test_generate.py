@@ -0,0 +1,89 @@
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from fetchai.ledger.crypto import Address, Entity, Keystore, generate_entities
+from fetchai.ledger.crypto.generate import GeneratedKey
+from fetchai.ledger.crypto.keystore import KeystoreError
+
+PASSWORD = 'abcdABCD1234##'
+
+
+class GenerateEntitiesTests(TestCase):
+    def assertValidKey(self, key: GeneratedKey):
+        entity = key.to_entity()
+        self.assertEqual(entity.public_key_bytes, key.public_key_bytes)
+        self.assertEqual(Address(entity), key.address)
+
+    def test_serial_generation(self):
+        keys = generate_entities(10, workers=1)
+
+        self.assertEqual(len(keys), 10)
+        self.assertEqual(len({key.private_key_bytes for key in keys}), 10)
+        for key in keys:
+            self.assertValidKey(key)
+
+    def test_parallel_generation(self):
+        keys = generate_entities(200, workers=2)
+
+        self.assertEqual(len(keys), 200)
+        self.assertEqual(len({key.address_bytes for key in keys}), 200)
+        for key in keys[::20]:
+            self.assertValidKey(key)
+
+    def test_empty(self):
+        self.assertEqual(generate_entities(0), [])
+
+    def test_write_to_keystore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            keystore = Keystore(directory, PASSWORD)
+            keys = generate_entities(2, workers=2, keystore=keystore)
+
+            self.assertEqual(set(keystore.addresses), {key.address for key in keys})
+
+            # keys are written without being held in memory
+            self.assertEqual(keystore.unlocked, [])
+
+            entity = keystore.get(keys[0].address)
+            self.assertEqual(entity.private_key_bytes, keys[0].private_key_bytes)
+
+    def test_write_to_keystore_with_password_per_address(self):
+        passwords = {}
+
+        def password_for(address):
+            return passwords.setdefault(address, PASSWORD + str(len(passwords)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            keystore = Keystore(directory, password_for)
+            keys = generate_entities(3, workers=1, keystore=keystore)
+
+            self.assertEqual(len(set(passwords.values())), 3)
+            for key in keys:
+                self.assertEqual(keystore.get(key.address).private_key_bytes, key.private_key_bytes)
+
+    def test_password_must_match_keystore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            keystore = Keystore(directory, PASSWORD)
+            generate_entities(1, keystore=keystore, password=PASSWORD)
+
+            with self.assertRaises(KeystoreError):
+                generate_entities(1, keystore=keystore, password=PASSWORD + '!')
+
+            per_address = Keystore(directory, lambda address: PASSWORD + str(address))
+            with self.assertRaises(KeystoreError):
+                generate_entities(1, keystore=per_address, password=PASSWORD)
+
+            # nothing is written when the password does not match
+            self.assertEqual(len(Keystore(directory, PASSWORD)), 1)
+
+            with self.assertRaises(KeystoreError):
+                generate_entities(1, password=PASSWORD)
+
+    def test_keystore_requires_strong_password(self):
+        with tempfile.TemporaryDirectory() as directory:
+            keystore = Keystore(directory, 'weak')
+
+            with patch('logging.warning'), self.assertRaises(KeystoreError):
+                generate_entities(1, keystore=keystore)
+
+            self.assertEqual(len(keystore), 0)
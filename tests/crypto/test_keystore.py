@@ -0,0 +1,109 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from fetchai.ledger.crypto import Address, Entity, Keystore
+from fetchai.ledger.crypto import entity as entity_module
+from fetchai.ledger.crypto.keystore import KeystoreError
+
+PASSWORD = 'abcdABCD1234##'
+
+
+class KeystoreTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_add_and_index(self):
+        entity = Entity()
+
+        with Keystore(self.directory, PASSWORD) as keystore:
+            address = keystore.add(entity)
+
+            self.assertEqual(address, Address(entity))
+            self.assertIn(entity, keystore)
+            self.assertIn(str(address), keystore)
+            self.assertNotIn('not an address', keystore)
+            self.assertNotIn(b'\x00' * 2, keystore)
+            self.assertTrue(os.path.isfile(os.path.join(self.directory, str(address) + '.key')))
+
+        # a fresh keystore indexes the key file by its address without decrypting it
+        with patch.object(entity_module, '_decrypt') as mock_decrypt:
+            keystore = Keystore(self.directory, PASSWORD)
+
+            self.assertEqual(keystore.addresses, [Address(entity)])
+            self.assertEqual(keystore.unlocked, [])
+            mock_decrypt.assert_not_called()
+
+    def test_key_decrypted_once(self):
+        entity = Entity()
+        with open(os.path.join(self.directory, str(Address(entity)) + '.key'), 'w') as key_file:
+            entity.dump(key_file, PASSWORD)
+
+        with patch.object(entity_module, '_decrypt', side_effect=entity_module._decrypt) as mock_decrypt:
+            with Keystore(self.directory, PASSWORD, workers=2) as keystore:
+                unlocked = keystore.unlock()
+                self.assertEqual(unlocked[0].private_key_bytes, entity.private_key_bytes)
+
+                # subsequent look ups are served from memory
+                self.assertIs(keystore.get(Address(entity)), unlocked[0])
+                self.assertIs(keystore[str(Address(entity))], unlocked[0])
+
+            mock_decrypt.assert_called_once()
+
+    def test_ttl_expiry(self):
+        entity = Entity()
+
+        with patch('time.monotonic') as mock_time:
+            mock_time.return_value = 100.0
+            keystore = Keystore(self.directory, PASSWORD, ttl=10)
+            keystore.add(entity)
+            self.assertEqual(keystore.unlocked, [Address(entity)])
+
+            mock_time.return_value = 111.0
+            self.assertEqual(keystore.unlocked, [])
+
+    def test_lock(self):
+        keystore = Keystore(self.directory, PASSWORD)
+        keystore.add(Entity())
+        keystore.lock()
+
+        self.assertEqual(len(keystore), 1)
+        self.assertEqual(keystore.unlocked, [])
+
+    def test_unknown_address(self):
+        keystore = Keystore(self.directory, PASSWORD)
+
+        with self.assertRaises(KeyError):
+            keystore.get(Entity())
+
+    def test_invalid_password(self):
+        entity = Entity()
+        with open(os.path.join(self.directory, str(Address(entity)) + '.key'), 'w') as key_file:
+            entity.dump(key_file, PASSWORD)
+
+        with Keystore(self.directory, 'invalid_password') as keystore:
+            with self.assertRaises(KeystoreError):
+                keystore.get(entity)
+
+    def test_weak_password(self):
+        keystore = Keystore(self.directory, 'weak')
+
+        with patch('logging.warning'), self.assertRaises(KeystoreError):
+            keystore.add(Entity())
+
+    def test_ignores_unrelated_files(self):
+        with open(os.path.join(self.directory, 'notes.txt'), 'w') as other_file:
+            other_file.write('hello')
+        with open(os.path.join(self.directory, 'not-an-address.key'), 'w') as other_file:
+            other_file.write('{}')
+
+        with patch('logging.warning') as mock_warning:
+            keystore = Keystore(self.directory, PASSWORD)
+
+        self.assertEqual(len(keystore), 0)
+        mock_warning.assert_called_once()
@@ -1,5 +1,7 @@
 import unittest
+from unittest.mock import patch
 
+from fetchai.ledger.serialisation.sha256 import sha256_hash
 from fetchai.ledger.serialisation.shardmask import ShardMask
 
 
@@ -33,3 +35,27 @@ class TestShardMask(unittest.TestCase):
         bv = ShardMask.resources_to_shard_mask(['abc', 'def', 'XYZ'], num_lanes)
         self.assertEqual(bv._size, num_lanes)
         self.assertEqual(bv.as_binary(), '00001110')
+
+    def test_resource_to_shard_mask_invalid_lane(self):
+        with self.assertRaises(AssertionError):
+            ShardMask.resources_to_shard_mask(['abc'], 6)
+
+    def test_resource_to_shard_mask_duplicates(self):
+        bv = ShardMask.resources_to_shard_mask(['abc', 'abc', 'def', 'def'], 4)
+        self.assertEqual(bv, ShardMask.resources_to_shard_mask(['abc', 'def'], 4))
+
+    def test_resource_to_group(self):
+        group = ShardMask.resource_to_group('abc')
+        self.assertTrue(0 <= group < 2 ** 32)
+
+        for num_lanes in (1, 4, 16, 256):
+            self.assertEqual(ShardMask.resource_to_shard('abc', num_lanes), group & (num_lanes - 1))
+
+    def test_cached_resource_group(self):
+        ShardMask.clear_cache()
+        with patch('fetchai.ledger.serialisation.shardmask.sha256_hash', wraps=sha256_hash) as mock_hash:
+            ShardMask.resources_to_shard_mask(['abc', 'def'], 4)
+            ShardMask.resources_to_shard_mask(['abc', 'def'], 16)
+            ShardMask.resource_to_shard('abc', 256)
+
+        self.assertEqual(mock_hash.call_count, 2)
@@ -0,0 +1,203 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.contract import Contract
+from fetchai.ledger.crypto import Entity
+from fetchai.ledger.parser.analysis import AnalysisCache, ContractAnalysis
+from fetchai.ledger.parser.etch_parser import EtchParser, source_digest
+from fetchai.ledger.serialisation.shardmask import ShardMask
+from tests.parser.test_parser import CONTRACT_TEXT, NESTED_FUNCTION
+from tests.parser.test_shard_mask_parsing import NESTED_CALLS, NON_ENTRY_GLOBAL, STATE_USAGE, USE_ANY_NON_SHARDED, \
+    USE_ANY_SHARDED
+
+CONCAT_CONTRACT = """
+persistent sharded balance_state : UInt64;
+
+@action
+function transfer(from: Address, to: String)
+  use balance_state[from, "prefix." + to];
+endfunction
+"""
+
+INVALID_USE = """
+persistent sharded value_ : Int64;
+
+@action
+function action1(arg1: String, arg2: String)
+    use value[arg1, arg2];
+endfunction
+"""
+
+
+def _outcome(func, *args):
+    try:
+        with patch('logging.warning'):
+            return func(*args)
+    except Exception as ex:
+        return type(ex)
+
+
+class ContractAnalysisTests(unittest.TestCase):
+    def _assert_equivalent(self, source, calls):
+        parser = EtchParser(source)
+        analysis = ContractAnalysis.from_parser(parser, source_digest(source))
+
+        # ensure the serialised form behaves identically
+        restored = ContractAnalysis.from_json(json.loads(json.dumps(analysis.to_json())))
+
+        self.assertEqual(restored.entry_points(), parser.entry_points())
+        for entry_point, parameters in calls:
+            self.assertTrue(restored.has_used_globals(entry_point))
+            self.assertEqual(
+                _outcome(restored.used_globals_to_addresses, entry_point, parameters),
+                _outcome(parser.used_globals_to_addresses, entry_point, parameters))
+
+    def test_sharded_globals(self):
+        self._assert_equivalent(CONTRACT_TEXT, [
+            ('setup', ['abc']),
+            ('setup', []),
+            ('transfer', ['abc', 'def', 100]),
+            ('transfer', ['abc']),
+            ('balance', ['xyz']),
+        ])
+
+    def test_concat(self):
+        self._assert_equivalent(CONCAT_CONTRACT, [('transfer', ['abc', 'def'])])
+
+    def test_use_any(self):
+        self._assert_equivalent(USE_ANY_NON_SHARDED, [('swap', [])])
+        self._assert_equivalent(USE_ANY_SHARDED, [('swap', [])])
+
+    def test_global_using_subfunctions(self):
+        self._assert_equivalent(NON_ENTRY_GLOBAL, [('setup', ['abc']), ('transfer', ['abc', 'def', 100])])
+
+    def test_call_graph(self):
+        self._assert_equivalent(NESTED_CALLS, [('transfer', ['abc', 'def', 100])])
+
+    def test_state(self):
+        self._assert_equivalent(STATE_USAGE, [('set_value', ['xyz', 5]), ('set_dynamic', [5]), ('set_sharded', [5])])
+
+    def test_errors(self):
+        self._assert_equivalent(NESTED_FUNCTION, [('set_block_number_state', [])])
+        self._assert_equivalent(INVALID_USE, [('action1', ['a', 'b'])])
+
+    def test_declarations(self):
+        analysis = ContractAnalysis.from_parser(EtchParser(NON_ENTRY_GLOBAL), source_digest(NON_ENTRY_GLOBAL))
+
+        self.assertEqual(list(analysis.global_using_subfunctions()), ['set_balance'])
+
+        declared = analysis.globals_declared()
+        self.assertEqual(list(declared), ['balance_state'])
+        self.assertTrue(declared['balance_state'].is_sharded)
+        self.assertEqual(declared['balance_state'].gtype, 'UInt64')
+
+
+class AnalysisCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = AnalysisCache(self.tmp_dir.name)
+        self.digest = source_digest(CONTRACT_TEXT)
+
+    def tearDown(self) -> None:
+        Contract.analysis_cache = None
+        self.tmp_dir.cleanup()
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(self.digest))
+
+    def test_get_or_analyse(self):
+        analysis = self.cache.get_or_analyse(CONTRACT_TEXT, self.digest)
+
+        with patch('fetchai.ledger.parser.analysis.EtchParser') as mock_parser:
+            cached = AnalysisCache(self.tmp_dir.name).get_or_analyse(CONTRACT_TEXT, self.digest)
+
+        mock_parser.assert_not_called()
+        self.assertEqual(cached.to_json(), analysis.to_json())
+
+    def test_version_mismatch(self):
+        self.cache.get_or_analyse(CONTRACT_TEXT, self.digest)
+
+        with patch('fetchai.ledger.parser.analysis.parser_version', return_value='0-0'):
+            self.assertIsNone(AnalysisCache(self.tmp_dir.name).get(self.digest))
+
+    def test_corrupt_entry(self):
+        self.cache.get_or_analyse(CONTRACT_TEXT, self.digest)
+        for name in os.listdir(self.tmp_dir.name):
+            with open(os.path.join(self.tmp_dir.name, name), 'w') as fp:
+                fp.write('{not json')
+
+        with patch('logging.warning') as mock_warn:
+            self.assertIsNone(self.cache.get(self.digest))
+            mock_warn.assert_called_once()
+
+    def test_contract_uses_cache(self):
+        owner = Entity()
+        Contract.analysis_cache = self.cache
+
+        # the first load analyses the contract, the second is served from the cache without parsing
+        expected = Contract(CONTRACT_TEXT, owner, b'nonce')
+        with patch('fetchai.ledger.contract.EtchParser') as mock_parser, \
+                patch('fetchai.ledger.parser.analysis.EtchParser') as mock_analysis_parser:
+            contract = Contract(CONTRACT_TEXT, owner, b'nonce')
+            mask = contract._build_shard_mask(16, 'transfer', ['abc', 'def', 100])
+
+        mock_parser.assert_not_called()
+        mock_analysis_parser.assert_not_called()
+        self.assertEqual(contract._actions, expected._actions)
+        self.assertEqual(contract._init, 'setup')
+
+        Contract.analysis_cache = None
+        with patch('logging.warning'):
+            self.assertEqual(mask, Contract(CONTRACT_TEXT, owner, b'nonce')._build_shard_mask(
+                16, 'transfer', ['abc', 'def', 100]))
+
+
+class ShardMaskTemplateTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.analysis = ContractAnalysis.from_source(CONTRACT_TEXT, source_digest(CONTRACT_TEXT))
+
+    def test_resources(self):
+        template = self.analysis.shard_mask_template('transfer', 'contract.state.', ['base'])
+        self.assertEqual(template.resources(['abc', 'def', 100]), [
+            'base',
+            'contract.state.owner_name',
+            'contract.state.balance_state.abc',
+            'contract.state.balance_state.def',
+            'contract.state.balance_state.constant_string',
+            'contract.state.balance_state.prefix.def',
+        ])
+
+    def test_build(self):
+        template = self.analysis.shard_mask_template('balance', 'contract.state.', ['base'])
+        self.assertEqual(
+            template.build(16, ['xyz']),
+            ShardMask.resources_to_shard_mask(['base', 'contract.state.balance_state.xyz'], 16))
+
+    def test_parameter_mismatch(self):
+        template = self.analysis.shard_mask_template('balance')
+        with self.assertRaises(AssertionError):
+            template.resources(['a', 'b'])
+
+    def test_no_tree_walk(self):
+        template = self.analysis.shard_mask_template('transfer')
+        with patch.object(EtchParser, 'globals_used') as mock_globals_used:
+            template.resources(['abc', 'def', 100])
+        mock_globals_used.assert_not_called()
+
+    def test_contract_shard_mask(self):
+        contract = Contract(CONCAT_CONTRACT, Entity(), b'nonce')
+        prefix = ShardMask.state_to_address(str(contract.address), '')
+
+        expected = ShardMask.resources_to_shard_mask([
+            'fetch.contract.state.{}'.format(contract.address),
+            prefix + 'balance_state.abc',
+            prefix + 'balance_state.prefix.def',
+        ], 64)
+
+        with patch.object(EtchParser, 'used_globals_to_addresses') as mock_used_globals:
+            self.assertEqual(contract._build_shard_mask(64, 'transfer', ['abc', 'def']), expected)
+            self.assertEqual(contract._build_shard_mask(64, 'transfer', ['abc', 'def']), expected)
+        mock_used_globals.assert_not_called()
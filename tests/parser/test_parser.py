@@ -3,7 +3,8 @@ from unittest.mock import patch
 
 from lark import GrammarError, ParseError, UnexpectedCharacters
 
-from fetchai.ledger.parser.etch_parser import EtchParser, Function
+from fetchai.ledger.parser.etch_parser import EtchParser, EtchParserError, Function, clear_cache, get_parser, \
+    source_digest
 
 CONTRACT_TEXT = """
 persistent sharded balance_state : UInt64;
@@ -441,3 +442,68 @@ class ParserTests(unittest.TestCase):
             tree = self.parser.parse("This code is not valid")
             self.assertFalse(tree)
             self.assertEqual(mock_warn.call_count, 2)
+
+
+class ParserCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_cache()
+
+    def tearDown(self) -> None:
+        clear_cache()
+
+    def test_shared_parser(self):
+        self.assertIs(EtchParser().parser, EtchParser().parser)
+        self.assertIs(get_parser(), get_parser())
+
+    def test_lalr_fallback(self):
+        # the grammar is not LALR compatible, so the Earley parser is used
+        parser = EtchParser(CONTRACT_TEXT, lalr=True)
+        self.assertIsNotNone(parser.parser)
+        self.assertIn('transfer', parser.entry_points()['action'])
+
+    def test_parse_cached(self):
+        with patch.object(get_parser(), 'parse', wraps=get_parser().parse) as mock_parse:
+            first = EtchParser(CONTRACT_TEXT)
+            second = EtchParser(CONTRACT_TEXT)
+
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertIs(first.parsed_tree, second.parsed_tree)
+
+    def test_parse_cached_by_digest(self):
+        digest = source_digest(CONTRACT_TEXT)
+        EtchParser(CONTRACT_TEXT, digest=digest)
+
+        with patch.object(get_parser(), 'parse') as mock_parse:
+            parser = EtchParser(CONTRACT_TEXT, digest=digest)
+
+        mock_parse.assert_not_called()
+        self.assertEqual(len(parser.get_functions()), 4)
+
+    def test_failed_parse_cached(self):
+        with patch('logging.warning') as mock_warn:
+            self.assertFalse(EtchParser().parse("var a = 5;"))
+            self.assertFalse(EtchParser().parse("var a = 5;"))
+            self.assertEqual(mock_warn.call_count, 4)
+
+        # the same message is reported on each hit, without keeping the exception and its traceback alive
+        self.assertEqual(mock_warn.call_args_list[1], mock_warn.call_args_list[3])
+        self.assertIsInstance(mock_warn.call_args_list[3][0][0], str)
+
+    def test_failed_parse_clears_tree(self):
+        parser = EtchParser(CONTRACT_TEXT)
+        with patch('logging.warning'):
+            self.assertFalse(parser.parse("var a = 5;"))
+
+        with self.assertRaises(EtchParserError):
+            parser.parsed_tree
+
+    def test_entry_points_cached(self):
+        parser = EtchParser(CONTRACT_TEXT)
+        entry_points = parser.entry_points()
+        entry_points['action'].append('modified')
+
+        with patch.object(EtchParser, 'get_functions') as mock_functions:
+            cached = EtchParser(CONTRACT_TEXT).entry_points()
+
+        mock_functions.assert_not_called()
+        self.assertEqual(cached, {'init': ['setup'], 'query': ['balance'], 'action': ['transfer']})
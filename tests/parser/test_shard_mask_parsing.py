@@ -41,6 +41,68 @@ function sub(val1 : UInt64, val2 : UInt64) : UInt64
 endfunction 
 """
 
+# Calls through several levels of subfunctions, with literal and parameter arguments
+NESTED_CALLS = """
+persistent sharded balance_state : UInt64;
+persistent total : UInt64;
+
+@action
+function transfer(from: Address, to: Address, amount: UInt64)
+  move(from, to, amount);
+  touch("reserve");
+endfunction
+
+function move(source: Address, target: Address, amount: UInt64)
+  use balance_state[source, target];
+  touch(source);
+  balance_state.set(source, 0u64);
+endfunction
+
+function touch(account: Address)
+  use balance_state[account];
+  use total;
+  record(account);
+endfunction
+
+function record(account: Address)
+  touch(account);
+endfunction
+"""
+
+# A subfunction whose shard key depends on a local variable
+UNRESOLVED_CALL = """
+persistent sharded balance_state : UInt64;
+
+@action
+function transfer(from: Address)
+  var other = from;
+  set_balance(other);
+endfunction
+
+function set_balance(owner: Address)
+  use balance_state[owner];
+endfunction
+"""
+
+STATE_USAGE = """
+@action
+function set_value(name: String, value: UInt64)
+  State<UInt64>('counter').set(value);
+  State<UInt64>(name).set(value);
+endfunction
+
+@action
+function set_dynamic(value: UInt64)
+  var name = 'abc';
+  State<UInt64>(name).set(value);
+endfunction
+
+@action
+function set_sharded(value: UInt64)
+  ShardedState<UInt64>('values').set('abc', value);
+endfunction
+"""
+
 USE_ANY_NON_SHARDED = """
 persistent var1 : UInt64;
 persistent var2 : UInt64;
@@ -78,10 +140,10 @@ class ShardMaskParsingTests(unittest.TestCase):
         """Test handling of calls to subfunctions containing use statements"""
         self.parser.parse(NON_ENTRY_GLOBAL)
 
-        # Detect call to non-entry function that uses globals
-        with self.assertRaises(UnparsableAddress):
-            glob_used = self.parser.globals_used('setup', ['abc'])
-            self.assertEqual(len(glob_used), 0, "Unexpected used globals found when declared in non annotated function")
+        # Globals used by a called non-entry function are bound to the arguments of the call
+        glob_used = self.parser.globals_used('setup', ['abc'])
+        self.assertEqual(len(glob_used), 1)
+        self.assertEqual('{}.{}'.format(glob_used[0][0], glob_used[0][1].value), 'balance_state.abc')
 
         # Test transfer function, which calls a non-global-using subfunction
         glob_used = self.parser.globals_used('transfer', ['abc', 'def', 100])
@@ -97,9 +159,8 @@ class ShardMaskParsingTests(unittest.TestCase):
         self.assertIn('set_balance', global_using_subfunctions)
         self.assertNotIn('sub', global_using_subfunctions)
 
-        # Test that wildcard used when annotated function calls global using subfunction
-        with self.assertRaises(UnparsableAddress):
-            self.parser.used_globals_to_addresses('setup', ['abc'])
+        # Test that the globals used by the subfunction are attributed to the calling entry point
+        self.assertEqual(self.parser.used_globals_to_addresses('setup', ['abc']), ['balance_state.abc'])
 
         # Parsing of function that doesn't call global-using-subfunction should succeed
         glob_addresses = self.parser.used_globals_to_addresses('transfer', ['abc', 'def', 100])
@@ -126,3 +187,29 @@ class ShardMaskParsingTests(unittest.TestCase):
 
         with self.assertRaises(EtchParserError):
             used_globals = self.parser.globals_used('entry', [])
+
+    def test_nested_calls(self):
+        """Test propagation of globals through nested and recursive subfunction calls"""
+        self.parser.parse(NESTED_CALLS)
+
+        addresses = self.parser.used_globals_to_addresses('transfer', ['abc', 'def', 100])
+        self.assertEqual(addresses, ['balance_state.abc', 'balance_state.def', 'total', 'balance_state.reserve'])
+
+    def test_unresolved_call_argument(self):
+        """Test that unresolvable shard keys in subfunctions are reported"""
+        self.parser.parse(UNRESOLVED_CALL)
+
+        with self.assertRaises(UnparsableAddress):
+            self.parser.used_globals_to_addresses('transfer', ['abc'])
+
+    def test_state_usage(self):
+        """Test resolution of State names from literals and parameters"""
+        self.parser.parse(STATE_USAGE)
+
+        self.assertEqual(self.parser.used_globals_to_addresses('set_value', ['xyz', 5]), ['counter', 'xyz'])
+
+        with self.assertRaises(UseWildcardShardMask):
+            self.parser.used_globals_to_addresses('set_dynamic', [5])
+
+        with self.assertRaises(UseWildcardShardMask):
+            self.parser.used_globals_to_addresses('set_sharded', [5])
@@ -1,9 +1,52 @@
 import io
+import random
 
-from fetchai.ledger.serialisation.integer import encode, decode
+from fetchai.ledger.serialisation.integer import encode, decode, encode_many, decode_many, encode_fixed
 from .common import SerialisationUnitTest
 
 
+def _reference_encode(stream, value: int):
+    # original loop based implementation, retained to check the optimised codec produces identical output
+    is_signed = value < 0
+    abs_value = abs(value)
+
+    if not is_signed and abs_value <= 0x7f:
+        stream.write(bytes([abs_value]))
+    elif is_signed and abs_value <= 0x1F:
+        stream.write(bytes([0xE0 | abs_value]))
+    else:
+        for log2_num_bytes in range(4):
+            if abs_value < 1 << ((1 << log2_num_bytes) * 8):
+                break
+        else:
+            raise RuntimeError('Unable to calculate the number of bytes required for this value')
+
+        num_bytes = 1 << log2_num_bytes
+        header = (0xD0 if is_signed else 0xC0) | (log2_num_bytes & 0xF)
+        values = [(abs_value >> (n * 8)) & 0xFF for n in reversed(range(num_bytes))]
+        stream.write(bytes([header] + values))
+
+
+def _reference_encode_fixed(stream, value: int, num_bytes: int = 8):
+    stream.write(bytes([value >> n * 8 & 0xFF for n in reversed(range(num_bytes))]))
+
+
+def _interesting_values():
+    values = list(range(-0x200, 0x200))
+    for shift in (8, 16, 32, 64):
+        limit = 1 << shift
+        values += [limit - 2, limit - 1, -(limit - 1), -(limit - 2)]
+        if shift < 64:
+            values += [limit, limit + 1, -limit, -(limit + 1)]
+
+    rng = random.Random(42)
+    for _ in range(2000):
+        value = rng.getrandbits(rng.choice([8, 16, 32, 64]))
+        values.append(-value if rng.random() < 0.5 else value)
+
+    return values
+
+
 class IntegerSerialisationTests(SerialisationUnitTest):
     def test_small_unsigned_encode(self):
         buffer = io.BytesIO()
@@ -104,3 +147,62 @@ class IntegerSerialisationTests(SerialisationUnitTest):
         buffer = io.BytesIO()
         with self.assertRaises(RuntimeError):
             encode(buffer, too_big)
+
+    def test_truncated_stream(self):
+        with self.assertRaises(RuntimeError):
+            decode(self._from_hex('C3EDEF'))
+
+    # Equivalence with the original implementation
+
+    def test_encode_matches_reference(self):
+        for value in _interesting_values():
+            expected = io.BytesIO()
+            _reference_encode(expected, value)
+
+            actual = io.BytesIO()
+            encode(actual, value)
+
+            self.assertEqual(actual.getvalue(), expected.getvalue(), 'Mismatch encoding {}'.format(value))
+
+    def test_roundtrip(self):
+        for value in _interesting_values():
+            buffer = io.BytesIO()
+            encode(buffer, value)
+            buffer.seek(0)
+
+            self.assertEqual(decode(buffer), value)
+            self.assertEqual(buffer.read(), b'')
+
+    def test_encode_fixed_matches_reference(self):
+        for value in [0, 1, 0xFF, 0x1234, (1 << 64) - 1, 1 << 64, -1]:
+            for num_bytes in (1, 2, 8):
+                expected = io.BytesIO()
+                _reference_encode_fixed(expected, value, num_bytes)
+
+                actual = io.BytesIO()
+                encode_fixed(actual, value, num_bytes)
+
+                self.assertEqual(actual.getvalue(), expected.getvalue())
+
+    # Bulk operations
+
+    def test_encode_many(self):
+        values = _interesting_values()
+
+        expected = io.BytesIO()
+        for value in values:
+            _reference_encode(expected, value)
+
+        actual = io.BytesIO()
+        encode_many(actual, values)
+
+        self.assertEqual(actual.getvalue(), expected.getvalue())
+
+    def test_decode_many(self):
+        values = _interesting_values()
+
+        buffer = io.BytesIO()
+        encode_many(buffer, values)
+        buffer.seek(0)
+
+        self.assertEqual(decode_many(buffer, len(values)), values)
@@ -0,0 +1,73 @@
+import threading
+import unittest
+
+import msgpack
+
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.serialisation.payload import encode_arguments, encode_arguments_many, ADDRESS_EXT_TYPE
+
+
+def _reference_encode(*args):
+    # the original implementation, which only supported primitives and addresses
+    items = []
+    for value in args:
+        if isinstance(value, (bool, int, float, str)):
+            items.append(value)
+        elif isinstance(value, Address):
+            items.append(msgpack.ExtType(77, bytes(value)))
+        else:
+            raise RuntimeError('Unknown item to pack: ' + value.__class__.__name__)
+    return msgpack.packb(items)
+
+
+class PayloadEncodingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.entity = Entity()
+        self.address = Address(self.entity)
+
+    def test_matches_reference(self):
+        cases = [
+            (),
+            (1, 2, 3),
+            (True, False, -1, 2 ** 63, 1.5, 'text', ''),
+            (self.address, 'transfer', 1000),
+        ]
+        for args in cases:
+            self.assertEqual(encode_arguments(args), _reference_encode(*args))
+
+    def test_nested(self):
+        encoded = encode_arguments([[1, self.address], {'key': [self.address, 'value']}])
+        decoded = msgpack.unpackb(encoded, raw=False)
+
+        address_ext = msgpack.ExtType(ADDRESS_EXT_TYPE, bytes(self.address))
+        self.assertEqual(decoded, [[1, address_ext], {'key': [address_ext, 'value']}])
+
+    def test_identity(self):
+        self.assertEqual(encode_arguments([self.entity]), encode_arguments([self.address]))
+
+    def test_unknown_type(self):
+        with self.assertRaises(RuntimeError):
+            encode_arguments([object()])
+
+        # the reused packer must not be left with partial output
+        self.assertEqual(encode_arguments([1]), _reference_encode(1))
+
+    def test_many(self):
+        calls = [(n, self.address, 'x' * n) for n in range(50)]
+        self.assertEqual(encode_arguments_many(calls), [_reference_encode(*args) for args in calls])
+        self.assertEqual(encode_arguments_many([]), [])
+
+    def test_threads(self):
+        results = {}
+
+        def encode(n):
+            results[n] = [encode_arguments([n, self.address]) for _ in range(100)]
+
+        threads = [threading.Thread(target=encode, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for n in range(4):
+            self.assertEqual(set(results[n]), {_reference_encode(n, self.address)})
@@ -427,3 +427,109 @@ class TransactionSerialisation(unittest.TestCase):
     def assertTxAreEqual(self, reference: Transaction, other: Transaction):
         self.assertEqual(reference, other)
         self.assertEqual(list(reference.signatures), list(other.signatures))
+
+
+class TxTemplateTests(unittest.TestCase):
+    FIELDS = [
+        dict(valid_until=100, charge_limit=20, counter=0),
+        dict(valid_until=70100, charge_limit=1 << 40, counter=(1 << 64) - 1, valid_from=70000),
+        dict(valid_until=5, charge_limit=1, counter=12345, valid_from=1, charge_rate=3),
+    ]
+
+    def assertMatchesPrototype(self, prototype: Transaction, data: bytes = b''):
+        template = transaction.TxTemplate(prototype)
+        for fields in self.FIELDS:
+            tx = template.build(data=data, **fields)
+            self.assertEqual(template.encode_payload(data=data, **fields), transaction.encode_payload(tx))
+
+            # the built transaction only differs from the prototype in the variable fields
+            prototype.data = data
+            prototype.valid_from = fields.get('valid_from', 0)
+            prototype.valid_until = fields['valid_until']
+            prototype.charge_rate = fields.get('charge_rate', 1)
+            prototype.charge_limit = fields['charge_limit']
+            prototype.counter = fields['counter']
+            self.assertEqual(tx, prototype)
+
+    def test_transfers(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.add_transfer(IDENTITIES[1], 256)
+        tx.add_transfer(IDENTITIES[2], 1)
+        tx.add_signer(IDENTITIES[0])
+        self.assertMatchesPrototype(tx)
+
+    def test_replaced_transfers(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.add_transfer(IDENTITIES[1], 1)
+        tx.add_signer(IDENTITIES[0])
+        template = transaction.TxTemplate(tx)
+
+        transfers = [(Address(IDENTITIES[2]), 1 << 40)]
+        built = template.build(100, 20, 3, transfers=transfers)
+        self.assertEqual(built.transfers, {Address(IDENTITIES[2]): 1 << 40})
+        self.assertEqual(template.encode_payload(100, 20, 3, transfers=transfers), transaction.encode_payload(built))
+
+        with self.assertRaises(ValueError):
+            template.encode_payload(100, 20, 3, transfers=[])
+        with self.assertRaises(ValueError):
+            template.build(100, 20, 3, transfers=transfers * 2)
+
+    def test_chain_code(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.target_chain_code('fetch.token', BitVector())
+        tx.action = 'addStake'
+        tx.add_signer(IDENTITIES[0])
+        self.assertMatchesPrototype(tx, json.dumps({'amount': 1000}).encode('ascii'))
+
+    def test_smart_contract(self):
+        for mask in (BitVector.from_indices([1], 2), BitVector.from_indices([3], 4),
+                     BitVector.from_indices([1, 100], 512)):
+            tx = Transaction()
+            tx.from_address = IDENTITIES[0]
+            tx.target_contract(Address(IDENTITIES[4]), mask)
+            tx.action = 'transfer'
+            tx.add_signer(IDENTITIES[0])
+            tx.add_signer(IDENTITIES[1])
+            self.assertMatchesPrototype(tx, b'\x01' * 300)
+
+    def test_synergetic(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.target_synergetic_data(Address(IDENTITIES[4]), BitVector.from_indices([0], 4))
+        tx.action = 'data'
+        tx.add_signer(IDENTITIES[0])
+        self.assertMatchesPrototype(tx, b'{}')
+
+    def test_many_signers(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.target_chain_code('fetch.token', BitVector())
+        tx.action = 'deed'
+        for _ in range(0x42):
+            tx.add_signer(Entity())
+        self.assertMatchesPrototype(tx, b'{}')
+
+    def test_data_requires_contract(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.add_transfer(IDENTITIES[1], 1)
+        tx.add_signer(IDENTITIES[0])
+
+        with self.assertRaises(AssertionError):
+            transaction.TxTemplate(tx).encode_payload(100, 1, 0, data=b'data')
+
+    def test_signed_template_transaction_is_valid(self):
+        tx = Transaction()
+        tx.from_address = IDENTITIES[0]
+        tx.target_chain_code('fetch.token', BitVector())
+        tx.action = 'collectStake'
+        tx.add_signer(IDENTITIES[0])
+
+        template = transaction.TxTemplate(tx)
+        built = template.build(valid_until=100, charge_limit=10, counter=1)
+        built.add_signature(IDENTITIES[0], ENTITIES[0].sign(template.encode_payload(100, 10, 1)))
+
+        self.assertTrue(built.is_valid())
@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.archive import TransactionArchive, ArchiveError
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.serialisation import sha256_hash
+
+ENTITIES = [Entity() for _ in range(3)]
+
+
+def _transfer(entity: Entity, amount: int, counter: int):
+    tx = TokenTxFactory.transfer(entity, ENTITIES[-1], amount, 20, [entity])
+    tx.valid_until = 100
+    tx.counter = counter
+    tx.sign(entity)
+    return tx
+
+
+class TransactionArchiveTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'txs.archive')
+        self.txs = [_transfer(ENTITIES[n % 2], n + 1, n) for n in range(6)]
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_append_and_lookup(self):
+        with TransactionArchive(self.path) as archive:
+            digests = archive.extend(self.txs[:4])
+            digests.append(archive.append(self.txs[4].encode()))
+
+            self.assertEqual(len(archive), 5)
+            self.assertEqual(digests[0], sha256_hash(self.txs[0].encode()))
+
+            entry = archive.get(digests[2])
+            self.assertEqual(bytes(entry.data), self.txs[2].encode())
+            self.assertEqual(entry.transaction, self.txs[2])
+            self.assertEqual(list(entry.transaction.signatures), list(self.txs[2].signatures))
+            self.assertEqual(entry.from_address, Address(ENTITIES[0]))
+            self.assertEqual(entry.counter, 2)
+
+            self.assertIn(digests[4].hex(), archive)
+            self.assertNotIn(b'\x00' * 32, archive)
+            self.assertIsNone(archive.get(b'\x00' * 32))
+
+    def test_lookup_by_sender_and_counter(self):
+        with TransactionArchive(self.path) as archive:
+            archive.extend(self.txs)
+
+            sent = archive.by_sender(ENTITIES[1])
+            self.assertEqual([entry.counter for entry in sent], [1, 3, 5])
+
+            entry = archive.find(ENTITIES[1], 3)
+            self.assertEqual(entry.transaction, self.txs[3])
+            self.assertIsNone(archive.find(ENTITIES[1], 2))
+            self.assertEqual(archive.by_sender(ENTITIES[2]), [])
+
+    def test_appends_do_not_remap(self):
+        with TransactionArchive(self.path) as archive:
+            with patch.object(TransactionArchive, '_map', wraps=TransactionArchive._map) as remap:
+                for tx in self.txs:
+                    archive.append(tx)
+                self.assertEqual(remap.call_count, 0)
+
+                # the first read past the mapped data remaps each file once
+                self.assertEqual(archive.get(sha256_hash(self.txs[-1].encode())).transaction, self.txs[-1])
+                self.assertEqual([entry.counter for entry in archive], list(range(6)))
+                self.assertEqual(remap.call_count, 2)
+
+    def test_close_releases_mappings(self):
+        archive = TransactionArchive(self.path)
+        digests = archive.extend(self.txs)
+        archive.get(digests[0]).transaction
+        data_map, index_map = archive._data_map, archive._index_map
+        archive.close()
+
+        self.assertTrue(data_map.closed)
+        self.assertTrue(index_map.closed)
+
+    def test_close_with_entries_in_use(self):
+        archive = TransactionArchive(self.path)
+        digests = archive.extend(self.txs)
+        entry = archive.get(digests[1])
+        archive.close()
+
+        # the data of the entry remains valid until it is released
+        self.assertEqual(bytes(entry.data), self.txs[1].encode())
+
+    def test_reopen(self):
+        with TransactionArchive(self.path) as archive:
+            archive.extend(self.txs[:3])
+
+        with TransactionArchive(self.path) as archive:
+            archive.extend(self.txs[3:])
+            self.assertEqual([entry.transaction for entry in archive], self.txs)
+
+        with TransactionArchive(self.path, readonly=True) as archive:
+            self.assertEqual(len(archive), 6)
+            self.assertEqual(archive.get(sha256_hash(self.txs[5].encode())).transaction, self.txs[5])
+            with self.assertRaises(ArchiveError):
+                archive.append(self.txs[0])
+
+    def test_partial_record_is_discarded(self):
+        with TransactionArchive(self.path) as archive:
+            archive.extend(self.txs[:2])
+            size = os.path.getsize(self.path)
+            archive.append(self.txs[2])
+
+        # simulate a crash part way through writing the last record
+        with open(self.path, 'r+b') as fp:
+            fp.truncate(size + 10)
+
+        with TransactionArchive(self.path) as archive:
+            self.assertEqual(len(archive), 2)
+            self.assertEqual(os.path.getsize(self.path), size)
+
+            archive.append(self.txs[2])
+            self.assertEqual([entry.transaction for entry in archive], self.txs[:3])
+
+    def test_missing_index_entries_are_rebuilt(self):
+        with TransactionArchive(self.path) as archive:
+            archive.extend(self.txs)
+            index_path = archive.index_path
+
+        # simulate a crash after writing the records but before writing their index entries
+        with open(index_path, 'r+b') as fp:
+            fp.truncate(os.path.getsize(index_path) - 100)
+
+        with self.assertRaises(ArchiveError):
+            TransactionArchive(self.path, readonly=True)
+
+        with TransactionArchive(self.path) as archive:
+            self.assertEqual(len(archive), 6)
+            self.assertEqual(archive.find(ENTITIES[1], 5).transaction, self.txs[5])
+
+    def test_incomplete_transactions_are_rejected(self):
+        tx = TokenTxFactory.transfer(ENTITIES[0], ENTITIES[1], 1, 20, [ENTITIES[0]])
+        with TransactionArchive(self.path) as archive:
+            with self.assertRaises(ArchiveError):
+                archive.append(tx)
+            self.assertEqual(len(archive), 0)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as fp:
+            fp.write(b'not an archive')
+
+        with self.assertRaises(ArchiveError):
+            TransactionArchive(self.path)
+
+    def test_readonly_requires_archive(self):
+        with self.assertRaises(ArchiveError):
+            TransactionArchive(self.path, readonly=True)
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.api.tx import TxContents
+from fetchai.ledger.backfill import ContentsBackfill, ContentsStore
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.testing import MockLedgerNode
+
+ENTITY = Entity()
+TARGET = Address(Entity())
+
+
+def _transfer(amount: int, counter: int):
+    tx = TokenTxFactory.transfer(ENTITY, TARGET, amount, 20, [ENTITY])
+    tx.valid_until = 1000
+    tx.counter = counter
+    tx.sign(ENTITY)
+    return tx
+
+
+class ContentsBackfillTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'contents.db')
+
+        self.node = MockLedgerNode(block_interval=None)
+        self.node.start()
+        self.api = LedgerApi(self.node.host, self.node.port)
+
+        self.digests = self.api.tokens.submit_signed_txs([_transfer(n + 1, n) for n in range(10)])
+
+    def tearDown(self) -> None:
+        self.node.stop()
+        shutil.rmtree(self.directory)
+
+    def _backfill(self, store, **kwargs) -> ContentsBackfill:
+        kwargs.setdefault('retry_interval', 0.01)
+        return ContentsBackfill(self.api, store, **kwargs)
+
+    def test_contents_are_stored(self):
+        with ContentsStore(self.path) as store:
+            result = self._backfill(store, batch_size=4).run(self.digests + self.digests[:2])
+
+            self.assertTrue(result.complete)
+            self.assertEqual(result.fetched, 10)
+            self.assertEqual(len(store), 10)
+
+            contents = store.get(self.digests[3])
+            expected = self.api.tx.contents(self.digests[3])
+            self.assertEqual(contents.transfers_to(TARGET), 4)
+            self.assertEqual(contents.transfers, expected.transfers)
+            self.assertEqual(contents.from_address, Address(ENTITY))
+            self.assertIsNone(store.get('00' * 32))
+
+    def test_stored_contents_are_skipped(self):
+        with ContentsStore(self.path) as store:
+            self._backfill(store).run(self.digests[:6])
+
+        with ContentsStore(self.path) as store:
+            self.assertIn(self.digests[0], store)
+            self.assertEqual(store.missing(self.digests), [bytes.fromhex(d) for d in self.digests[6:]])
+
+            with patch.object(self.api.tx, 'contents_json', wraps=self.api.tx.contents_json) as mock_contents:
+                result = self._backfill(store).run(self.digests)
+
+            self.assertEqual(result.skipped, 6)
+            self.assertEqual(result.fetched, 4)
+            self.assertEqual(mock_contents.call_count, 4)
+            self.assertEqual(len(store), 10)
+
+    def test_unknown_transactions_are_not_stored(self):
+        unknown = 'ab' * 32
+        with ContentsStore(self.path) as store:
+            result = self._backfill(store).run([unknown] + self.digests[:2])
+
+            self.assertFalse(result.complete)
+            self.assertEqual(result.not_found, [bytes.fromhex(unknown)])
+            self.assertNotIn(unknown, store)
+            self.assertEqual(len(store), 2)
+
+    def test_failed_requests_are_retried(self):
+        self.node.fail_next(3)
+        with ContentsStore(self.path) as store:
+            result = self._backfill(store, workers=1).run(self.digests)
+
+            self.assertTrue(result.complete)
+            self.assertEqual(len(store), 10)
+
+    def test_failures_are_reported(self):
+        self.node.failure_rate = 1.0
+        with ContentsStore(self.path) as store:
+            result = self._backfill(store, retries=1).run(self.digests[:3])
+
+            self.assertEqual(len(result.failed), 3)
+            self.assertEqual(result.fetched, 0)
+            self.assertEqual(len(store), 0)
+
+    def test_contents_many(self):
+        contents = self.api.tx.contents_many(self.digests[:3] + ['cd' * 32])
+        self.assertEqual([c.transfers_to(TARGET) for c in contents[:3]], [1, 2, 3])
+        self.assertIsNone(contents[3])
+
+    def test_contents_json_many(self):
+        contents = self.api.tx.contents_json_many(self.digests[:2] + ['cd' * 32], workers=2)
+        self.assertEqual([TxContents.from_json(c).transfers_to(TARGET) for c in contents[:2]], [1, 2])
+        self.assertEqual(contents[2], {})
@@ -54,3 +54,66 @@ class BitVectorSerialisationTests(unittest.TestCase):
     def test_from_array(self):
         bits = BitVector.from_array([0, 0, 0, 1, 1, 1, 1, 1])
         self.assertEqual('00011111', bits.as_binary())
+
+    def test_from_indices(self):
+        bits = BitVector.from_indices([0, 3, 9], 16)
+        self.assertEqual(bits.as_hex(), '0209')
+        self.assertEqual(list(bits.iter_set_bits()), [0, 3, 9])
+
+    def test_wire_format(self):
+        bits = BitVector.from_hex_string('0102')
+        self.assertEqual(bytes(bits), bytes([0x01, 0x02]))
+        self.assertEqual(bits.get(1), 1)
+        self.assertEqual(bits.get(8), 1)
+        self.assertEqual(bits.popcount(), 2)
+
+    def test_from_bytes_partial_byte(self):
+        bits = BitVector.from_bytes(bytes([0x0f]), 4)
+        self.assertEqual(len(bits), 4)
+        self.assertEqual(bytes(bits), bytes([0x0f]))
+
+    def test_clear_bit(self):
+        bits = BitVector.from_hex_string('c8')
+        bits.set(3, 0)
+        self.assertEqual(bits.as_hex(), 'c0')
+
+    def test_out_of_range(self):
+        bits = BitVector(8)
+        with self.assertRaises(IndexError):
+            bits.get(8)
+        with self.assertRaises(IndexError):
+            bits.set(8, 1)
+
+    def test_bitwise_operations(self):
+        a = BitVector.from_indices([0, 1, 2], 8)
+        b = BitVector.from_indices([2, 3], 8)
+
+        self.assertEqual(list((a | b).iter_set_bits()), [0, 1, 2, 3])
+        self.assertEqual(list((a & b).iter_set_bits()), [2])
+        self.assertEqual(list((a ^ b).iter_set_bits()), [0, 1, 3])
+        self.assertEqual(list((~a).iter_set_bits()), [3, 4, 5, 6, 7])
+        self.assertTrue(a.overlaps(b))
+        self.assertFalse(a.overlaps(BitVector.from_indices([5], 8)))
+
+        a |= b
+        self.assertEqual(a.popcount(), 4)
+
+    def test_mismatched_sizes(self):
+        with self.assertRaises(ValueError):
+            _ = BitVector(8) | BitVector(16)
+
+    def test_any(self):
+        self.assertFalse(BitVector(8).any())
+        self.assertTrue(BitVector.from_indices([7], 8).any())
+
+    def test_resize(self):
+        bits = BitVector.from_indices([1, 6], 8)
+
+        # shrinking folds lanes onto their lower counterparts
+        self.assertEqual(list(bits.resize(4).iter_set_bits()), [1, 2])
+
+        # growing sets every lane that the original lanes could map to
+        self.assertEqual(list(bits.resize(16).iter_set_bits()), [1, 6, 9, 14])
+
+        with self.assertRaises(ValueError):
+            bits.resize(6)
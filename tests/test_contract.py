@@ -148,6 +148,32 @@ class ContractTests(unittest.TestCase):
                                                      shard_mask=BitVector())
 
 
+    def test_query_many(self):
+        contract = Contract(CONTRACT_TEXT, Entity())
+
+        def post(query, prefix, data):
+            if data.get('fail'):
+                return False, {'msg': 'failed'}
+            return True, {'status': 'success', 'result': data.get('value', 0)}
+
+        api = mock.Mock(spec=LedgerApi)
+        api.contracts = ContractsApi('127.0.0.1', 8000)
+        api.contracts._post_json = mock.Mock(side_effect=post)
+
+        results = contract.query_many(api, [
+            ('query1', {'value': 1}),
+            ('query1', {'fail': True}),
+            ('query2', {}),
+            ('query1', {'value': 1}),
+        ], workers=2)
+
+        # the duplicate query is only requested once
+        self.assertEqual(api.contracts._post_json.call_count, 3)
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2], 0)
+        self.assertEqual(results[3], 1)
+
     def test_init_fail_multiple_inits(self):
         # Test rejection of contract with multiple init statements
         owner = Entity()
@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.contract import Contract
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.crypto import signing
+from fetchai.ledger.testing import MockLedgerNode
+
+CONTRACT_TEXT = """
+persistent sharded balance_state : UInt64;
+
+@action
+function transfer(from: Address, to: Address, amount: UInt64)
+  use balance_state[from, to];
+endfunction
+"""
+
+
+class ContractBatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.node = MockLedgerNode(lanes=8, block_interval=None)
+        self.node.start()
+        self.node.advance_blocks(10)
+        self.api = LedgerApi(self.node.host, self.node.port)
+
+        self.entity = Entity()
+        self.others = [Address(Entity()) for _ in range(5)]
+        self.contract = Contract(CONTRACT_TEXT, self.entity, b'nonce')
+
+    def tearDown(self) -> None:
+        self.node.stop()
+
+    def test_build(self):
+        batch = self.contract.batch(self.entity, 100)
+        for other in self.others:
+            batch.add('transfer', Address(self.entity), other, 10)
+        self.assertEqual(len(batch), 5)
+
+        with patch.object(self.api.contracts, 'current_block_number', return_value=10) as mock_block_number:
+            txs = batch.build(self.api)
+        mock_block_number.assert_called_once_with()
+
+        self.assertEqual(len(txs), 5)
+        for tx, other in zip(txs, self.others):
+            self.assertTrue(tx.is_valid())
+            self.assertEqual(tx.action, 'transfer')
+            self.assertEqual(tx.valid_from, 10)
+            self.assertEqual(tx.valid_until, 110)
+            self.assertEqual(tx.shard_mask, self.contract._build_shard_mask(8, 'transfer', [
+                Address(self.entity), other, 10]))
+            self.assertEqual(len(tx.shard_mask), 8)
+
+    def test_submit(self):
+        batch = self.contract.batch(self.entity, 100)
+        batch.extend(('transfer', [Address(self.entity), other, 10]) for other in self.others)
+
+        with patch.object(self.api.contracts, '_post_tx_json_many',
+                          wraps=self.api.contracts._post_tx_json_many) as mock_post:
+            digests = batch.submit(self.api)
+
+        self.assertEqual(len(digests), 5)
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(mock_post.call_count, 1)
+
+        self.api.sync(digests)
+        self.assertEqual(len(self.node.transactions), 5)
+        for digest in digests:
+            self.assertEqual(self.node.transaction(digest).action, 'transfer')
+
+    def test_submit_chunked(self):
+        txs = []
+        for other in self.others:
+            tx = self.api.tokens._create_skeleton_tx(10)
+            tx.from_address = self.entity
+            tx.add_transfer(other, 1)
+            tx.add_signer(self.entity)
+            tx.sign(self.entity)
+            txs.append(tx)
+
+        with patch.object(self.api.tokens, '_post_tx_json_many',
+                          wraps=self.api.tokens._post_tx_json_many) as mock_post:
+            digests = self.api.tokens.submit_signed_txs(txs, chunk_size=2)
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(len(set(digests)), 5)
+        self.api.sync(digests)
+
+
+class SignManyTests(unittest.TestCase):
+    def test_sign_in_process(self):
+        entity = Entity()
+        messages = [bytes([n]) * 32 for n in range(10)]
+
+        signatures = signing.sign_many(entity, messages)
+        for message, signature in zip(messages, signatures):
+            self.assertTrue(entity.verify(message, signature))
+
+    def test_sign_in_workers(self):
+        entity = Entity()
+        messages = [bytes([n]) * 32 for n in range(10)]
+
+        with patch.object(signing, 'MIN_SIGNATURES_PER_WORKER', 2):
+            signatures = signing.sign_many(entity, messages, workers=2)
+
+        self.assertEqual(len(signatures), 10)
+        for message, signature in zip(messages, signatures):
+            self.assertTrue(entity.verify(message, signature))
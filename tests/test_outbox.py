@@ -0,0 +1,266 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.api.common import ApiError
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.outbox import OutboundQueue, QueueError, QUEUED_STATUS, REJECTED_STATUS, SUBMITTED_STATUS
+from fetchai.ledger.testing import MockLedgerNode
+
+ENTITY = Entity()
+TARGET = Address(Entity())
+
+
+def _transfer(amount: int, counter: int):
+    tx = TokenTxFactory.transfer(ENTITY, TARGET, amount, 20, [ENTITY])
+    tx.valid_until = 1000
+    tx.counter = counter
+    tx.sign(ENTITY)
+    return tx
+
+
+class OutboundQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'outbound.log')
+
+        self.node = MockLedgerNode(block_interval=None)
+        self.node.start()
+        self.api = LedgerApi(self.node.host, self.node.port)
+
+    def tearDown(self) -> None:
+        self.node.stop()
+        shutil.rmtree(self.directory)
+
+    def _queue(self, **kwargs) -> OutboundQueue:
+        kwargs.setdefault('poll_interval', 0.02)
+        kwargs.setdefault('retry_interval', 0.02)
+        return OutboundQueue(self.path, self.api, **kwargs)
+
+    def test_queued_transactions_are_submitted(self):
+        with self._queue() as queue:
+            digests = queue.enqueue_many([_transfer(n + 1, n) for n in range(5)])
+            self.assertTrue(queue.wait(timeout=5))
+
+            self.assertEqual(len(queue), 0)
+            self.assertEqual([queue.status(d) for d in digests], ['Executed'] * 5)
+
+        self.assertEqual(self.node.balance(TARGET), 15)
+
+    def test_transactions_survive_restart(self):
+        queue = self._queue()
+        digests = queue.enqueue_many([_transfer(1, 0), _transfer(2, 1)])
+        self.assertEqual(queue.status(digests[0]), QUEUED_STATUS)
+        queue.close()
+
+        with self._queue() as queue:
+            self.assertTrue(queue.wait(digests, timeout=5))
+            self.assertEqual(queue.status(digests[1]), 'Executed')
+
+        self.assertEqual(self.node.balance(TARGET), 3)
+
+    def test_completed_transactions_are_not_replayed(self):
+        with self._queue() as queue:
+            digest = queue.enqueue(_transfer(1, 0))
+            self.assertTrue(queue.wait(timeout=5))
+
+        queue = self._queue()
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(queue.status(digest), 'Executed')
+        queue.close()
+
+    def test_reconcile_does_not_resubmit_known_transactions(self):
+        tx = _transfer(1, 0)
+        queue = self._queue()
+        digest = queue.enqueue(tx)
+        queue.close()
+
+        # the transaction reached the node before the process stopped
+        self.node.execution_delay = 0.2
+        self.api.tokens.submit_signed_tx(tx)
+
+        queue = self._queue()
+        with patch.object(self.api.tokens, 'submit_signed_txs') as mock_submit:
+            queue.reconcile()
+            self.assertEqual(queue.status(digest), SUBMITTED_STATUS)
+
+            queue.start()
+            self.assertTrue(queue.wait(timeout=5))
+            queue.close()
+
+        mock_submit.assert_not_called()
+        self.assertEqual(queue.status(digest), 'Executed')
+
+    def test_failed_submission_is_retried(self):
+        self.node.fail_next(1)
+        with self._queue() as queue:
+            queue.enqueue(_transfer(1, 0))
+            self.assertTrue(queue.wait(timeout=5))
+
+        self.assertEqual(self.node.balance(TARGET), 1)
+
+    def test_resubmission_is_idempotent(self):
+        tx = _transfer(1, 0)
+        with self._queue() as queue:
+            first = queue.enqueue(tx)
+            second = queue.enqueue(tx.encode())
+            self.assertEqual(first, second)
+            self.assertTrue(queue.wait(timeout=5))
+
+        self.assertEqual(len(self.node.transactions), 1)
+        self.assertEqual(self.node.balance(TARGET), 1)
+
+    def test_incomplete_record_is_discarded(self):
+        queue = self._queue()
+        digest = queue.enqueue(_transfer(1, 0))
+        queue.close()
+
+        with open(self.path, 'ab') as fp:
+            fp.write(b'\x01\x00\x00\x01\x00partial')
+
+        queue = self._queue()
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.status(digest), QUEUED_STATUS)
+        queue.close()
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as fp:
+            fp.write(b'not a queue')
+
+        with self.assertRaises(QueueError):
+            self._queue()
+
+    def test_log_is_compacted(self):
+        with self._queue(compact_threshold=3) as queue:
+            queue.enqueue_many([_transfer(1, n) for n in range(3)])
+            self.assertTrue(queue.wait(timeout=5))
+            queue.stop()
+            pending = queue.enqueue(_transfer(1, 10))
+
+        # only the transaction which has not completed remains in the log
+        queue = self._queue()
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.status(pending), QUEUED_STATUS)
+        queue.close()
+
+    def test_concurrent_writers_share_fsyncs(self):
+        real_fsync = os.fsync
+        calls = []
+
+        def slow_fsync(fd):
+            calls.append(fd)
+            time.sleep(0.05)
+            real_fsync(fd)
+
+        queue = self._queue()
+        with patch('fetchai.ledger.outbox.os.fsync', side_effect=slow_fsync):
+            threads = [threading.Thread(target=queue.enqueue, args=(_transfer(1, n),)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(queue), 8)
+        self.assertLess(len(calls), 8)
+        queue.close()
+
+    def test_compaction_while_enqueue_is_waiting_for_fsync(self):
+        queue = self._queue(compact_threshold=1)
+        wait_durable = queue._wait_durable
+
+        def compact_then_wait(sequence):
+            # another thread completes a transaction and compacts the log before the enqueued records are synced
+            queue._compact()
+            wait_durable(sequence)
+
+        with patch.object(queue, '_wait_durable', side_effect=compact_then_wait):
+            digest = queue.enqueue(_transfer(1, 0))
+        self.assertEqual(queue.status(digest), QUEUED_STATUS)
+        queue.close()
+
+        queue = self._queue()
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.status(digest), QUEUED_STATUS)
+        queue.close()
+
+    def test_enqueue_while_compaction_is_syncing(self):
+        queue = self._queue(compact_threshold=1)
+        first = queue.enqueue(_transfer(1, 0))
+
+        real_fsync = os.fsync
+        compacting = threading.Event()
+        release = threading.Event()
+
+        def fsync(fd):
+            # only the first sync of the compacted log is held up
+            if not compacting.is_set() and fd != queue._file.fileno():
+                compacting.set()
+                release.wait(5)
+            real_fsync(fd)
+
+        with patch('fetchai.ledger.outbox.os.fsync', side_effect=fsync):
+            compaction = threading.Thread(target=queue._compact)
+            compaction.start()
+            self.assertTrue(compacting.wait(5))
+
+            # enqueueing is not blocked by the compaction and its record is carried over to the new log
+            second = queue.enqueue(_transfer(2, 1))
+            release.set()
+            compaction.join()
+
+        queue.close()
+
+        queue = self._queue()
+        self.assertEqual(len(queue), 2)
+        self.assertEqual([queue.status(d) for d in (first, second)], [QUEUED_STATUS] * 2)
+        queue.close()
+
+    def test_reject_counts_survive_compaction(self):
+        queue = self._queue(max_attempts=3)
+        digest = bytes.fromhex(queue.enqueue(_transfer(1, 0)))
+        batch = [(digest, queue._queued[digest])]
+
+        with patch.object(self.api.tokens, 'submit_signed_txs', side_effect=ApiError('rejected')):
+            for _ in range(3):
+                queue._submit(batch)
+                queue._compact()
+
+        self.assertEqual(queue.status(digest.hex()), REJECTED_STATUS)
+        queue.close()
+
+    def test_rejected_transaction_does_not_block_the_queue(self):
+        encoded = bytearray(_transfer(100, 100).encode())
+        encoded[-1] ^= 0xff
+        rejected = bytes(encoded)
+
+        with self._queue(max_attempts=2) as queue:
+            queue.stop()
+            bad = queue.enqueue(rejected)
+            good = queue.enqueue_many([_transfer(n + 1, n) for n in range(4)])
+            queue.start()
+
+            self.assertTrue(queue.wait(timeout=5))
+            self.assertEqual(queue.status(bad), REJECTED_STATUS)
+            self.assertEqual([queue.status(d) for d in good], ['Executed'] * 4)
+
+        self.assertEqual(self.node.balance(TARGET), 10)
+
+    def test_submitted_transactions_are_polled_while_submission_fails(self):
+        self.node.execution_delay = 0.1
+        with self._queue(max_attempts=1000) as queue:
+            digest = queue.enqueue(_transfer(1, 0))
+            deadline = time.monotonic() + 5
+            while queue.status(digest) == QUEUED_STATUS and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            with patch.object(self.api.tokens, 'submit_signed_txs', side_effect=ApiError('rejected')):
+                queue.enqueue(_transfer(2, 1))
+                self.assertTrue(queue.wait([digest], timeout=5))
+
+            self.assertEqual(queue.status(digest), 'Executed')
@@ -0,0 +1,136 @@
+import unittest
+from unittest.mock import MagicMock
+
+from fetchai.ledger.bitvector import BitVector
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.scheduler import TransactionScheduler
+from fetchai.ledger.transaction import Transaction
+
+CONTRACT = Address(Entity())
+
+
+def _contract_tx(lanes, num_lanes=8, action='action'):
+    tx = Transaction()
+    tx.target_contract(CONTRACT, BitVector.from_indices(lanes, num_lanes) if lanes is not None else BitVector())
+    tx.action = action
+    return tx
+
+
+class TransactionSchedulerTests(unittest.TestCase):
+    def test_invalid_lanes(self):
+        with self.assertRaises(ValueError):
+            TransactionScheduler(3)
+
+    def test_disjoint_transactions_share_a_wave(self):
+        scheduler = TransactionScheduler(8)
+        scheduler.extend([_contract_tx([0]), _contract_tx([1, 2]), _contract_tx([3])])
+
+        waves = scheduler.plan()
+        self.assertEqual(len(waves), 1)
+        self.assertEqual(len(waves[0]), 3)
+        self.assertEqual(waves[0].lanes_used, 4)
+        self.assertAlmostEqual(waves[0].utilisation, 0.5)
+
+    def test_conflicting_transactions_keep_their_order(self):
+        first = _contract_tx([0, 1])
+        second = _contract_tx([1])
+        third = _contract_tx([2])
+        fourth = _contract_tx([1, 3])
+
+        scheduler = TransactionScheduler(8)
+        scheduler.extend([first, second, third, fourth])
+
+        waves = scheduler.plan()
+        self.assertEqual([w.transactions for w in waves], [[first, third], [second], [fourth]])
+
+    def test_packed_plan(self):
+        small = [_contract_tx([i]) for i in range(4)]
+        wide = _contract_tx([4, 5, 6, 7])
+        conflict = _contract_tx([0, 4])
+
+        scheduler = TransactionScheduler(8, preserve_order=False)
+        scheduler.extend(small + [conflict, wide])
+
+        waves = scheduler.plan()
+        self.assertEqual(len(waves), 2)
+        self.assertEqual(waves[0].lanes_used, 8)
+        self.assertEqual(waves[0].transactions, [wide] + small)
+        self.assertEqual(waves[1].transactions, [conflict])
+
+    def test_wildcards_are_held_back(self):
+        wildcard = _contract_tx(None)
+        normal = [_contract_tx([0]), _contract_tx([1])]
+
+        scheduler = TransactionScheduler(8, preserve_order=False)
+        scheduler.extend([wildcard] + normal)
+
+        waves = scheduler.plan()
+        self.assertEqual(len(waves), 2)
+        self.assertEqual(waves[0].transactions, normal)
+        self.assertTrue(waves[1].wildcard)
+        self.assertEqual(waves[1].transactions, [wildcard])
+        self.assertAlmostEqual(waves[1].utilisation, 1 / 8)
+
+    def test_wildcards_keep_their_order(self):
+        first = [_contract_tx([0]), _contract_tx([1])]
+        wildcard = _contract_tx(None)
+        second = [_contract_tx([2]), _contract_tx([0])]
+
+        scheduler = TransactionScheduler(8)
+        scheduler.extend(first + [wildcard] + second)
+
+        # transactions after the wildcard can not join the earlier wave, even though their lanes are free
+        waves = scheduler.plan()
+        self.assertEqual([w.transactions for w in waves], [first, [wildcard], second])
+        self.assertEqual([w.wildcard for w in waves], [False, True, False])
+
+    def test_masks_are_resized(self):
+        scheduler = TransactionScheduler(4)
+        mask = scheduler.lane_mask(_contract_tx([5], num_lanes=8))
+        self.assertEqual(mask, BitVector.from_indices([1], 4))
+
+    def test_transfers_use_token_state(self):
+        sender, receiver = Entity(), Entity()
+        tx = Transaction()
+        tx.from_address = sender
+        tx.add_transfer(receiver, 10)
+
+        scheduler = TransactionScheduler(16)
+        mask = scheduler.lane_mask(tx)
+        self.assertEqual(len(mask), 16)
+        self.assertIn(mask.popcount(), (1, 2))
+
+        # a transfer from the same account must not run alongside
+        self.assertTrue(mask.overlaps(scheduler.lane_mask(tx)))
+
+    def test_submit(self):
+        txs = [_contract_tx([0]), _contract_tx([0]), _contract_tx([1])]
+
+        api = MagicMock()
+        api.tokens.submit_signed_tx.side_effect = ['a', 'b', 'c']
+
+        scheduler = TransactionScheduler(8)
+        scheduler.extend(txs)
+        report = scheduler.submit(api, wait=True)
+
+        self.assertEqual(len(scheduler), 0)
+        self.assertEqual(report.digests, [['a', 'b'], ['c']])
+        self.assertEqual(report.num_transactions, 3)
+        self.assertAlmostEqual(report.parallelism, 1.5)
+        self.assertAlmostEqual(report.lane_utilisation, (2 / 8 + 1 / 8) / 2)
+        self.assertEqual(api.sync.call_count, 2)
+        api.sync.assert_any_call(['a', 'b'], timeout=None)
+
+    def test_failed_submission_keeps_unsubmitted_transactions(self):
+        txs = [_contract_tx([0]), _contract_tx([0]), _contract_tx([0])]
+
+        api = MagicMock()
+        api.tokens.submit_signed_tx.side_effect = ['a', RuntimeError('node unavailable')]
+
+        scheduler = TransactionScheduler(8)
+        scheduler.extend(txs)
+        with self.assertRaises(RuntimeError):
+            scheduler.submit(api)
+
+        self.assertEqual(len(scheduler), 2)
+        self.assertEqual([w.transactions for w in scheduler.plan()], [[txs[1]], [txs[2]]])
@@ -0,0 +1,106 @@
+import threading
+import unittest
+
+from fetchai.ledger.api import LedgerApi
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.crypto import Address, Entity, Identity
+from fetchai.ledger.session import SenderSession, MAX_COUNTER
+from fetchai.ledger.testing import MockLedgerNode
+from fetchai.ledger.transaction import Transaction
+
+
+def _reference_transfer(entity: Entity, to: Address, amount: int, fee: int, valid_from: int, valid_until: int,
+                        counter: int) -> Transaction:
+    tx = TokenTxFactory.transfer(entity, to, amount, fee, [entity])
+    tx.valid_from = valid_from
+    tx.valid_until = valid_until
+    tx.counter = counter
+    return tx
+
+
+class SenderSessionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.entity = Entity()
+        self.to = Address(Entity())
+
+    def test_payload_matches_transaction_encoding(self):
+        session = SenderSession(self.entity, counter=0)
+
+        cases = [
+            (1, 0, 0, 100),
+            (127, 20, 0, 1),
+            (1000, 1 << 40, 5, 105),
+            ((1 << 63) + 1, 300, 70000, 70100),
+        ]
+        for amount, fee, valid_from, valid_until in cases:
+            counter = session.next_counter()
+            expected = _reference_transfer(self.entity, self.to, amount, fee, valid_from, valid_until, counter)
+
+            payload = session.encode_transfer_payload(self.to, amount, fee, valid_until, valid_from, counter)
+            self.assertEqual(payload, expected.encode_payload())
+
+    def test_encoded_transfer_is_valid(self):
+        session = SenderSession(self.entity, counter=42)
+        encoded = session.encode_transfer(str(self.to), 10, 20, valid_until=200, valid_from=100)
+
+        tx = Transaction.decode(encoded)
+        self.assertIsNotNone(tx)
+        self.assertEqual(tx.from_address, Address(self.entity))
+        self.assertEqual(dict(tx.transfers), {self.to: 10})
+        self.assertEqual(tx.valid_from, 100)
+        self.assertEqual(tx.valid_until, 200)
+        self.assertEqual(tx.charge_rate, 1)
+        self.assertEqual(tx.charge_limit, 20)
+        self.assertEqual(tx.counter, 42)
+        self.assertEqual(tx.signers, [Identity(self.entity)])
+
+    def test_counters_are_sequential_and_wrap(self):
+        session = SenderSession(self.entity, counter=MAX_COUNTER - 1)
+        self.assertEqual(session.next_counters(3), [MAX_COUNTER - 1, MAX_COUNTER, 0])
+        self.assertEqual(session.next_counter(), 1)
+
+    def test_counters_are_unique_across_threads(self):
+        session = SenderSession(self.entity, counter=0)
+        counters = []
+        lock = threading.Lock()
+
+        def reserve():
+            values = [session.next_counter() for _ in range(200)]
+            with lock:
+                counters.extend(values)
+
+        threads = [threading.Thread(target=reserve) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(counters), list(range(800)))
+
+    def test_validity_requires_api(self):
+        session = SenderSession(self.entity)
+        with self.assertRaises(RuntimeError):
+            session.encode_transfer(self.to, 10, 20)
+        with self.assertRaises(RuntimeError):
+            session.transfer(self.to, 10, 20)
+
+    def test_submit_transfers(self):
+        with MockLedgerNode(block_interval=None) as node:
+            node.advance_blocks(10)
+            node.set_balance(self.entity, 1000)
+            api = LedgerApi(node.host, node.port)
+            session = SenderSession(self.entity, api, counter=7, validity_period=50)
+
+            digest = session.transfer(self.to, 10, 20)
+            digests = session.transfers([(self.to, 1), (self.to, 1)], 20)
+            self.assertEqual(len(set([digest] + digests)), 3)
+
+            txs = [node.transaction(d) for d in [digest] + digests]
+            self.assertEqual([tx.counter for tx in txs], [7, 8, 9])
+            for tx in txs:
+                self.assertTrue(tx.is_valid())
+                self.assertEqual(tx.valid_from, node.block_number)
+                self.assertEqual(tx.valid_until, node.block_number + 50)
+
+            api.sync([digest] + digests)
+            self.assertEqual(api.tokens.balance(self.to), 12)
@@ -0,0 +1,239 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.crypto.deed import Deed, Operation
+from fetchai.ledger.serialisation import bytearray, integer, sha256_hash
+from fetchai.ledger.signing import SignatureCoordinator, SigningError, sign_compact, sign_partial, \
+    encode_signature_response, decode_signature_response
+from fetchai.ledger.testing import MockSigner
+from fetchai.ledger.transaction import Transaction
+
+MULTISIG = Entity()
+TARGET = Entity()
+
+
+def _transfer(signatories):
+    tx = TokenTxFactory.transfer(MULTISIG, TARGET, 250, 20, signatories)
+    tx.valid_until = 100
+    tx.counter = 1
+    return tx
+
+
+class SignatureCoordinatorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.board = [Entity() for _ in range(4)]
+
+        self.deed = Deed()
+        for signee, weight in zip(self.board, (1, 1, 1, 2)):
+            self.deed.set_signee(signee, weight)
+        self.deed.set_operation(Operation.amend, 5)
+        self.deed.set_operation(Operation.transfer, 3)
+
+        # half of the board is reached over http and the other half over unix sockets
+        self.signers = []
+        for n, entity in enumerate(self.board):
+            unix_path = os.path.join(self.directory, 'signer{}.sock'.format(n)) if n % 2 else None
+            signer = MockSigner(entity, unix_path=unix_path)
+            signer.start()
+            self.signers.append(signer)
+
+    def tearDown(self) -> None:
+        for signer in self.signers:
+            signer.stop()
+        shutil.rmtree(self.directory)
+
+    def _coordinator(self, **kwargs) -> SignatureCoordinator:
+        transports = {signer.entity: signer.transport() for signer in self.signers}
+        return SignatureCoordinator(transports, **kwargs)
+
+    def test_gather(self):
+        tx = _transfer(self.board)
+        with self._coordinator() as coordinator:
+            self.assertIs(coordinator.gather(tx), tx)
+
+        self.assertFalse(tx.is_incomplete)
+        self.assertTrue(tx.is_valid())
+        self.assertTrue(Transaction.decode(tx.encode()))
+
+    def test_gather_partial_responses(self):
+        for signer in self.signers[:2]:
+            signer.compact = False
+
+        tx = _transfer(self.board)
+        with self._coordinator() as coordinator:
+            coordinator.gather(tx)
+
+        self.assertTrue(tx.is_valid())
+
+    def test_compact_response_for_another_payload_is_rejected(self):
+        other_payload = _transfer(self.board[1:]).encode_partial()
+        self.signers[1].handle = lambda data: sign_compact(self.board[1], other_payload)
+
+        with self._coordinator() as coordinator:
+            with self.assertRaises(SigningError) as context:
+                coordinator.gather(_transfer(self.board))
+
+        self.assertEqual(context.exception.failed, {Address(self.board[1])})
+
+    def test_signers_are_asked_concurrently(self):
+        for signer in self.signers:
+            signer.delay = 0.2
+
+        tx = _transfer(self.board)
+        with self._coordinator() as coordinator:
+            started = time.monotonic()
+            coordinator.gather(tx)
+            self.assertLess(time.monotonic() - started, 0.6)
+
+        self.assertTrue(tx.is_valid())
+
+    def test_signatures_already_present_are_not_requested(self):
+        tx = _transfer(self.board)
+        tx.sign(self.board[0])
+        with self._coordinator() as coordinator:
+            coordinator.gather(tx)
+
+        self.assertEqual(self.signers[0].request_count, 0)
+        self.assertTrue(tx.is_valid())
+
+    def test_timeout(self):
+        self.signers[2].delay = 1.0
+        tx = _transfer(self.board)
+        with self._coordinator() as coordinator:
+            coordinator.add_signer(self.board[2], self.signers[2].transport(), timeout=0.1)
+
+            started = time.monotonic()
+            with self.assertRaises(SigningError) as context:
+                coordinator.gather(tx)
+            self.assertLess(time.monotonic() - started, 0.5)
+
+        self.assertEqual(context.exception.failed, {Address(self.board[2])})
+
+    def test_requests_do_not_outlive_the_gather(self):
+        # both transports give up when the gather does, rather than holding the only thread for the signer timeout
+        for slow in (1, 2):
+            self.signers[slow].delay = 1.0
+            with self._coordinator(workers=1, timeout=5.0) as coordinator:
+                with self.assertRaises(SigningError):
+                    coordinator.gather(_transfer([self.board[slow]]), timeout=0.2)
+
+                tx = _transfer([self.board[0]])
+                coordinator.gather(tx, timeout=0.5)
+                self.assertTrue(tx.is_valid())
+
+    def test_request_threads_grow_with_the_signers(self):
+        for signer in self.signers:
+            signer.delay = 0.2
+
+        with SignatureCoordinator({self.signers[0].entity: self.signers[0].transport()}) as coordinator:
+            coordinator.gather(_transfer(self.board[:1]))
+            for signer in self.signers[1:]:
+                coordinator.add_signer(signer.entity, signer.transport())
+
+            tx = _transfer(self.board)
+            started = time.monotonic()
+            coordinator.gather(tx)
+            self.assertLess(time.monotonic() - started, 0.6)
+
+        self.assertTrue(tx.is_valid())
+
+    def test_refusal(self):
+        self.signers[1].accept = lambda tx: False
+        with self._coordinator() as coordinator:
+            with self.assertRaises(SigningError) as context:
+                coordinator.gather(_transfer(self.board))
+
+        self.assertEqual(context.exception.failed, {Address(self.board[1])})
+
+    def test_unknown_signer(self):
+        with self._coordinator() as coordinator:
+            with self.assertRaises(SigningError):
+                coordinator.gather(_transfer(self.board + [Entity()]))
+
+    def test_signatories_must_meet_threshold(self):
+        with self._coordinator(deed=self.deed) as coordinator:
+            with self.assertRaises(SigningError):
+                coordinator.gather(_transfer(self.board[:2]), Operation.transfer)
+
+            tx = coordinator.gather(_transfer(self.board[2:]), Operation.transfer)
+            self.assertTrue(tx.is_valid())
+
+    def test_sign_asks_the_fastest_signers(self):
+        for signer, delay in zip(self.signers, (0.0, 0.0, 0.3, 0.3)):
+            signer.delay = delay
+
+        with self._coordinator(deed=self.deed) as coordinator:
+            for signer, latency in zip(self.board, (0.01, 0.05, 0.3, 0.02)):
+                coordinator.planner.record_latency(signer, latency)
+
+            tx = coordinator.sign(Operation.transfer, _transfer)
+
+        self.assertEqual(set(Address(s) for s in tx.all_signers), {Address(self.board[0]), Address(self.board[3])})
+        self.assertTrue(tx.is_valid())
+        self.assertEqual(self.signers[2].request_count, 0)
+
+    def test_sign_replaces_failed_signers(self):
+        self.signers[3].stop()
+
+        with self._coordinator(deed=self.deed) as coordinator:
+            coordinator.planner.record_latency(self.board[3], 0.01)
+            tx = coordinator.sign(Operation.transfer, _transfer)
+
+        self.assertNotIn(Address(self.board[3]), set(Address(s) for s in tx.all_signers))
+        self.assertTrue(self.deed.is_satisfied(Operation.transfer, tx.all_signers))
+        self.assertTrue(tx.is_valid())
+
+    def test_sign_partial_returns_only_the_new_signature(self):
+        tx = _transfer(self.board[:2])
+        tx.sign(self.board[1])
+
+        valid, signed = Transaction.decode_partial(sign_partial(self.board[0], tx.encode_partial()))
+        self.assertFalse(valid)
+        self.assertEqual(set(signed.present_signers), {signed.signers[0]})
+
+        with self.assertRaises(SigningError):
+            sign_partial(self.board[2], tx.encode_partial())
+
+
+class SignatureResponseTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = [Entity() for _ in range(20)]
+        self.tx = _transfer(self.board)
+
+    def test_encode_and_decode(self):
+        digest = sha256_hash(self.tx.encode_payload())
+        encoded = encode_signature_response(digest, 300, b'signature')
+        self.assertEqual(decode_signature_response(encoded), (digest, 300, b'signature'))
+
+        negative_index = io.BytesIO()
+        negative_index.write(encoded[:1 + len(digest)])
+        integer.encode(negative_index, -1)
+        bytearray.encode(negative_index, b'signature')
+
+        for invalid in (encoded[:-1], encoded + b'\x00', b'\xa1' + encoded[1:], b'', negative_index.getvalue()):
+            with self.assertRaises(SigningError):
+                decode_signature_response(invalid)
+
+        with self.assertRaises(ValueError):
+            encode_signature_response(digest[:-1], 0, b'signature')
+        with self.assertRaises(ValueError):
+            encode_signature_response(digest, -1, b'signature')
+
+    def test_sign_compact(self):
+        payload = self.tx.encode_payload()
+        digest, index, signature = decode_signature_response(sign_compact(self.board[7], self.tx.encode_partial()))
+
+        self.assertEqual(digest, sha256_hash(payload))
+        self.assertEqual(self.tx.signers[index], self.board[7])
+        self.assertTrue(self.board[7].verify(payload, signature))
+
+    def test_compact_response_is_smaller(self):
+        data = self.tx.encode_partial()
+        self.assertLess(len(sign_compact(self.board[0], data)) * 10, len(sign_partial(self.board[0], data)))
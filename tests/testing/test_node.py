@@ -0,0 +1,114 @@
+import base64
+from unittest import TestCase
+
+import requests
+
+from fetchai.ledger.api import LedgerApi, ApiError
+from fetchai.ledger.api.token import TokenTxFactory
+from fetchai.ledger.crypto import Address, Entity
+from fetchai.ledger.testing import MockLedgerNode
+
+
+class MockLedgerNodeTests(TestCase):
+    def setUp(self) -> None:
+        self.node = MockLedgerNode(lanes=4, block_interval=None)
+        self.node.start()
+        self.api = LedgerApi(self.node.host, self.node.port)
+        self.entity = Entity()
+        self.other = Entity()
+
+    def tearDown(self) -> None:
+        self.node.stop()
+
+    def test_status(self):
+        self.assertEqual(self.api.server.num_lanes(), 4)
+        self.assertEqual(self.api.tokens.current_block_number(), 0)
+
+        self.node.advance_blocks(5)
+        self.assertEqual(self.api.tokens.current_block_number(), 5)
+
+    def test_transfer(self):
+        self.node.set_balance(self.entity, 1000)
+
+        digest = self.api.tokens.transfer(self.entity, self.other, 250, 20)
+        self.api.sync(digest)
+
+        self.assertEqual(self.api.tokens.balance(self.entity), 750)
+        self.assertEqual(self.api.tokens.balance(self.other), 250)
+
+        contents = self.api.tx.contents(digest)
+        self.assertEqual(contents.from_address, Address(self.entity))
+        self.assertEqual(contents.transfers_to(self.other), 250)
+
+        tx = self.node.transaction(digest)
+        self.assertEqual(tx.transfers, {Address(self.other): 250})
+
+    def test_insufficient_funds(self):
+        self.node.enforce_balances = True
+
+        digest = self.api.tokens.transfer(self.entity, self.other, 250, 20)
+        with self.assertRaises(RuntimeError):
+            self.api.sync(digest)
+
+    def test_unknown_transaction(self):
+        status = self.api.tx.status('00' * 32)
+        self.assertEqual(status.status, 'Unknown')
+        self.assertIsNone(self.api.tx.contents('00' * 32))
+
+    def test_execution_delay(self):
+        self.node.execution_delay = 60
+
+        digest = self.api.tokens.transfer(self.entity, self.other, 250, 20)
+        self.assertEqual(self.api.tx.status(digest).status, 'Pending')
+
+    def test_bulk_submit(self):
+        txs = []
+        for amount in (1, 2, 3):
+            tx = TokenTxFactory.transfer(self.entity, self.other, amount, 20, [self.entity])
+            tx.valid_until = 100
+            tx.sign(self.entity)
+            txs.append({'ver': '1.2', 'data': base64.b64encode(tx.encode()).decode()})
+
+        url = 'http://{}:{}/api/contract/submit'.format(self.node.host, self.node.port)
+        response = requests.post(url, json=txs, headers={'content-type': 'application/vnd+fetch.transaction+json'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['txs']), 3)
+        self.assertEqual(len(self.node.transactions), 3)
+
+    def test_invalid_transaction_rejected(self):
+        tx = TokenTxFactory.transfer(self.entity, self.other, 1, 20, [self.entity])
+        tx.add_signature(self.entity, self.other.sign(tx.encode_payload()))
+
+        with self.assertRaises(ApiError):
+            self.api.tokens._post_tx_json(tx.encode_partial(), 'transfer')
+
+    def test_failure_injection(self):
+        self.node.fail_next(1)
+
+        with self.assertRaises(ApiError):
+            self.api.server.status()
+
+        # subsequent requests succeed
+        self.assertEqual(self.api.server.status()['lanes'], 4)
+
+    def test_contract_query(self):
+        contract_address = Address(Entity())
+
+        # by default queries succeed with no result
+        success, response = self.api.contracts.query(contract_address, 'balanceOf', owner=Address(self.entity))
+        self.assertTrue(success)
+        self.assertIsNone(response['result'])
+
+        queries = []
+
+        def handler(address, name, params):
+            queries.append((address, name, params))
+            return {'status': 'success', 'result': 42}
+
+        self.node.set_query_handler(handler)
+        success, response = self.api.contracts.query(contract_address, 'balanceOf', owner=Address(self.entity))
+
+        self.assertTrue(success)
+        self.assertEqual(response['result'], 42)
+        self.assertEqual(queries, [(contract_address, 'balanceOf', {'owner': str(Address(self.entity))})])